@@ -1,19 +1,33 @@
 """赞意AI · 小红书KOL审稿系统"""
 import streamlit as st
-import sys, os
+import sys, os, json, hashlib, time
 
 sys.path.insert(0, os.path.dirname(__file__))
-from core.config_loader import load_config, list_configs
-from core.text_utils import count_chinese, read_docx
+from core.config_loader import REGISTRY
+from core.text_utils import count_chinese, read_docx, parse_input, parse_kol
 from core.hard_checks import run_all_checks
 from core.auto_fix import auto_fix_all, highlight_original, highlight_revised, diff_highlight
-from core.llm_client import rewrite_full_body
+from core import speculative
+from core.jobs import JOBS, DONE, FAILED, CANCELLED
+from core.llm_metrics import METRICS
+from core.history import HISTORY, draft_hash
+from core.batch_upload import SORT_KEYS, audit_files, reaudit, sort_queue
+from core.bulk_export import export_zip_bytes
+from core.draft_index import draft_index
+from core.near_dup import near_dup_index
+from core.prompts import size_report as prompt_size_report
 from core.doc_export import generate_diff_docx, generate_clean_docx
 from ui.styles import MAIN_CSS
 
 st.set_page_config(page_title="赞意AI - 审稿系统", page_icon="✦", layout="wide", initial_sidebar_state="expanded")
 st.markdown(MAIN_CSS, unsafe_allow_html=True)
 
+# 局部刷新：片段内的控件只重跑片段本身（streamlit < 1.37 退化为整页刷新）
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+if fragment is None:
+    def fragment(func=None, **_):
+        return func if func is not None else (lambda f: f)
+
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 #  工具函数
@@ -44,49 +58,57 @@ def build_full_text(titles, body, tags):
     return "\n".join(parts)
 
 
-def parse_input(text):
-    lines = text.strip().split('\n')
-    titles, body_lines, tags_line, section = [], [], "", None
-    for line in lines:
-        s = line.strip()
-        if not s:
-            if section == 'body' and body_lines and body_lines[-1] != "":
-                body_lines.append("")
-            continue
-        if s.startswith(('一、', '二、', '三、', '四、')):
-            section = 'title' if '标题' in s else ('body' if any(x in s for x in ['笔记', '内容']) else 'skip')
-            continue
-        if any(s.startswith(p) for p in ['达人昵称', '合作形式', '合作方向', '发布时间', '拍图', 'live图']):
-            continue
-        if s.startswith('标题') and '备选' in s:
-            section = 'title'; continue
-        if s.startswith('大纲'):
-            section = 'body'
-            rest = s.split('）')[-1].strip() if '）' in s else s.split(')')[-1].strip() if ')' in s else ""
-            if rest and len(rest) > 5:
-                body_lines.append(rest)
-            continue
-        if '话题标签' in s or s.count('#') >= 3:
-            t = s.split('：')[-1].strip() if '话题标签' in s and '：' in s else s
-            if t.count('#') >= 2:
-                tags_line = t
-            continue
-        if section == 'title' and len(titles) < 5:
-            titles.append(s)
-            if len(titles) >= 3:
-                section = 'body'
-            continue
-        if section in ('body', None):
-            section = 'body'; body_lines.append(s)
-    cleaned, prev = [], False
-    for l in body_lines:
-        if l == "":
-            if not prev:
-                cleaned.append("")
-            prev = True
-        else:
-            cleaned.append(l); prev = False
-    return titles[:3], '\n'.join(cleaned).strip(), tags_line
+HISTORY_STAGES = {"initial": "初审", "fixed": "修复后", "ai": "改写后", "final": "终检"}
+
+
+def record_history(stage, titles, body, tags, results, changes=None):
+    """审核结果写入历史库（后台线程批量落盘，不阻塞页面）"""
+    h = HISTORY.record(titles, body, tags, results, config, stage=stage, kol=st.session_state.kol,
+                       changes=changes, source=st.session_state.source_hash)
+    if stage == "initial":
+        st.session_state.source_hash = h
+
+
+def open_draft(t, b, tg, kol="", results=None):
+    """把一篇稿件载入 4 步流程（results 为已有的初审结果，没有时现审）"""
+    st.session_state.titles = t
+    st.session_state.body = b
+    st.session_state.tags = tg
+    st.session_state.results = results if results is not None else run_all_checks(t, b, tg, config)
+    st.session_state.kol = kol
+    st.session_state.source_hash = None
+    # 先查近似重复再登记；只排除本次会话（含批量上传）才登记的稿件，以前审过的同一稿件原样重投照常报出
+    if HISTORY.enabled:
+        own = draft_hash(t, b, tg)
+        dups = near_dup_index().query(b, since=st.session_state.session_started)
+        st.session_state.near_dups = [{**d, "exact": d["draft"] == own} for d in dups]
+    else:
+        st.session_state.near_dups = []
+    record_history("initial", t, b, tg, st.session_state.results)
+    if st.session_state.get("spec_on"):
+        speculative.start(t, b, tg, config)
+    for k in ["is_fixed", "fixed_titles", "fixed_body", "fixed_tags", "changes",
+               "ai_body", "ai_error", "ai_done", "ai_results",
+               "final_titles", "final_body", "final_tags", "final_results", "ai_job"]:
+        st.session_state[k] = INIT[k]
+    st.session_state.nav_to = "基础审核"
+
+
+def load_queue(files):
+    """多篇上传：并行读取 + 初审，结果进队列并记入审核历史；同一批文件只在换方向时重审"""
+    key = tuple((f.name, f.size) for f in files)
+    if st.session_state.queue_key == (key, config["_fingerprint"]):
+        return
+    if st.session_state.queue and st.session_state.queue_key[0] == key:
+        items = reaudit(st.session_state.queue, config)
+    else:
+        items = audit_files([(f.name, f.getvalue()) for f in files], config)
+    for it in items:
+        if it["error"] is None:
+            HISTORY.record(it["titles"], it["body"], it["tags"], it["results"], config, kol=it["kol"])
+    st.session_state.queue = items
+    st.session_state.queue_key = (key, config["_fingerprint"])
+    st.session_state.queue_open = None
 
 
 def render_sp_table(sp_result):
@@ -99,6 +121,9 @@ def render_sp_table(sp_result):
                 continue
             kws = ""
             for kw in sp.get("keywords", []):
+                if kw.get("misplaced"):
+                    kws += f'<span class="tag-warn" title="写在了别的段落">{kw["keyword"]}</span> '
+                    continue
                 c = "tag-pass" if kw["found"] else "tag-fail"
                 kws += f'<span class="{c}">{kw["keyword"]}</span> '
             icon = '<span class="status-pass">通过</span>' if sp["pass"] else '<span class="status-fail">未通过</span>'
@@ -117,6 +142,66 @@ def render_audit_table(results):
     return html
 
 
+@st.cache_resource(show_spinner=False)
+def config_registry():
+    """进程内只执行一次：预加载全部配置并开启热更新"""
+    REGISTRY.warm()
+    REGISTRY.watch()
+    return REGISTRY
+
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+DIFF_INLINE_LIMIT = 20000  # 两侧合计超过这个字数的 diff 放到后台任务
+
+
+def slot_job(slot, name, fn, *args):
+    """会话内按 slot 复用后台任务：参数没变返回原任务，变了（或被取消）重新提交"""
+    key = hashlib.sha1(json.dumps(args, ensure_ascii=False).encode("utf-8")).hexdigest()
+    cur = st.session_state.jobs.get(slot)
+    if cur and cur[0] == key:
+        job = JOBS.get(cur[1])
+        if job is not None and job.state != CANCELLED:
+            return job
+    job_id = JOBS.submit(name, fn, *args)
+    st.session_state.jobs[slot] = (key, job_id)
+    return JOBS.get(job_id)
+
+
+def render_docx_download(slot, label, file_name, fn, *args):
+    """后台生成 docx，生成好之前显示占位按钮"""
+    job = slot_job(slot, label, fn, *args)
+    if job.state == DONE:
+        st.download_button(label, data=job.result, file_name=file_name, mime=DOCX_MIME,
+                           use_container_width=True, key=f"dl_{slot}")
+    elif job.state == FAILED:
+        st.error(f"文档生成失败: {job.error}")
+    else:
+        st.button(f"{label}（生成中…）", disabled=True, use_container_width=True, key=f"wait_{slot}")
+
+
+def render_diff(slot, text_before, text_after):
+    """diff 高亮；长文本放后台任务，未完成返回 None"""
+    if len(text_before) + len(text_after) <= DIFF_INLINE_LIMIT:
+        return diff_highlight(text_before, text_after)
+    job = slot_job(slot, "对比高亮", diff_highlight, text_before, text_after)
+    return job.result if job.state == DONE else None
+
+
+def jobs_pending():
+    """当前会话是否还有未结束的后台任务（决定是否继续轮询）"""
+    ids = [job_id for _, job_id in st.session_state.jobs.values()]
+    if st.session_state.ai_job:
+        ids.append(st.session_state.ai_job)
+    return any(JOBS.get(i) is not None and not JOBS.get(i).done for i in ids)
+
+
+@fragment(run_every=0.5)
+def poll_jobs():
+    """有后台任务未结束时轮询；任务都结束后整页刷新一次显示结果"""
+    if not jobs_pending():
+        st.rerun()
+
+
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 #  State
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -129,6 +214,9 @@ INIT = {
     "ai_results": None,
     "final_titles": None, "final_body": None, "final_tags": None,
     "final_results": None,
+    "ai_job": None, "jobs": {},
+    "kol": "", "source_hash": None, "near_dups": [], "session_started": time.time(),
+    "queue": [], "queue_key": None, "queue_open": None,
 }
 for k, v in INIT.items():
     if k not in st.session_state:
@@ -150,38 +238,46 @@ with st.sidebar:
     st.caption("小红书 KOL 审稿系统")
     st.markdown("---")
 
-    configs = list_configs()
+    registry = config_registry()
+    configs = registry.list()
     labels = [c["label"] for c in configs]
     sel = st.selectbox("审核方向", range(len(configs)), format_func=lambda i: labels[i])
-    config = load_config(configs[sel]["file"])
+    config = registry.get(configs[sel]["file"])
     m = config["meta"]
     st.caption(f"{m['brand']} · {m['direction']} · {m['platform']}")
+    for name, err in registry.error_messages().items():
+        st.warning(f"配置 {name} 未加载：{err}")
     st.markdown("---")
 
     method = st.radio("输入方式", ["上传文件", "粘贴文本"], horizontal=True, label_visibility="collapsed")
     if "up_text" not in st.session_state:
         st.session_state.up_text = ""
     if method == "上传文件":
-        f = st.file_uploader("上传 KOL 稿件", type=["docx"], help="支持 .docx 格式")
-        if f:
-            st.session_state.up_text = read_docx(f)
-            st.success(f"已读取 {f.name}")
+        files = st.file_uploader("上传 KOL 稿件", type=["docx"], accept_multiple_files=True,
+                                 help="支持 .docx 格式，可一次选多篇")
+        if len(files) == 1:
+            st.session_state.up_text = read_docx(files[0])
+            st.success(f"已读取 {files[0].name}")
+        elif files:
+            st.session_state.up_text = ""
+            load_queue(files)
+            q_ok = sum(1 for it in st.session_state.queue if it["passed"])
+            st.success(f"已读取 {len(files)} 篇，初审通过 {q_ok} 篇，在右侧队列中逐篇打开")
     else:
         st.session_state.up_text = st.text_area("粘贴内容", height=200, key="raw_in", placeholder="将稿件内容粘贴到这里...")
 
+    st.toggle(
+        "后台预计算修复与AI改写", value=speculative.enabled_by_default(), key="spec_on",
+        help="初审后立即在后台跑一键修复和 AI 改写，点击时直接出结果（会额外消耗 AI 调用）",
+    )
+
     st.markdown('<div style="height:12px"></div>', unsafe_allow_html=True)
     if st.button("开始审核", type="primary", use_container_width=True):
         raw = st.session_state.up_text
         if raw.strip():
             t, b, tg = parse_input(raw)
-            st.session_state.titles = t
-            st.session_state.body = b
-            st.session_state.tags = tg
-            st.session_state.results = run_all_checks(t, b, tg, config)
-            for k in ["is_fixed", "fixed_titles", "fixed_body", "fixed_tags", "changes",
-                       "ai_body", "ai_error", "ai_done", "ai_results",
-                       "final_titles", "final_body", "final_tags", "final_results"]:
-                st.session_state[k] = INIT[k]
+            open_draft(t, b, tg, kol=parse_kol(raw))
+            st.session_state.queue_open = None
         else:
             st.error("请先上传文件或粘贴稿件")
 
@@ -210,6 +306,61 @@ with st.sidebar:
                 unsafe_allow_html=True,
             )
 
+    # AI 调用计量
+    llm_summary = METRICS.summary_by_config()
+    if llm_summary:
+        st.markdown("---")
+        with st.expander("AI 调用统计"):
+            st.dataframe(llm_summary, hide_index=True, use_container_width=True)
+            prompt_tokens = sum(r["tokens"] for r in prompt_size_report(config))
+            st.caption(f"当前方向改写 prompt 静态部分约 {prompt_tokens} tokens")
+            st.download_button(
+                "导出 JSON", data=json.dumps(METRICS.export_json(), ensure_ascii=False, indent=2),
+                file_name="llm_metrics.json", mime="application/json", use_container_width=True,
+            )
+            st.download_button(
+                "导出 Prometheus", data=METRICS.export_prometheus(),
+                file_name="llm_metrics.prom", mime="text/plain", use_container_width=True,
+            )
+
+    # 审核历史看板：直接读历史库，不重跑审核
+    if HISTORY.enabled:
+        st.markdown("---")
+        with st.expander("审核历史"):
+            h_stage = st.selectbox("环节", list(HISTORY_STAGES), format_func=HISTORY_STAGES.get, key="hist_stage")
+            h_days = st.selectbox("时间", [1, 7, 30, 365], index=1, format_func=lambda d: f"近 {d} 天", key="hist_days")
+            h_all = st.toggle("全部方向", value=False, key="hist_all")
+            h_filter = {"stage": h_stage, "since": time.time() - h_days * 86400,
+                        "config": None if h_all else configs[sel]["file"]}
+            h_sum = HISTORY.summary(**h_filter)
+            st.caption(f"共 {h_sum['audits']} 次审核，通过 {h_sum['passed']}（{h_sum['pass_rate']:.0%}）")
+            if h_sum["failed_checks"]:
+                st.dataframe([{"未通过项": k, "次数": v} for k, v in h_sum["failed_checks"].items()],
+                             hide_index=True, use_container_width=True)
+            if h_sum["by_kol"]:
+                st.dataframe([{"达人": r["kol"] or "（未填）", "稿件": r["drafts"], "审核": r["audits"],
+                               "通过率": f"{r['pass_rate']:.0%}"} for r in h_sum["by_kol"]],
+                             hide_index=True, use_container_width=True)
+            h_rows = HISTORY.query(**h_filter, limit=50)
+            if h_rows:
+                st.dataframe([{"时间": r["created"][5:16].replace("T", " "), "达人": r["kol"], "标题": r["title"],
+                               "结果": "通过" if r["passed"] else "、".join(r["failed"])} for r in h_rows],
+                             hide_index=True, use_container_width=True)
+
+            # 规则影响查询：倒排索引查已通过稿件，不重跑审核
+            st.markdown('<div class="sidebar-section-title">规则影响查询</div>', unsafe_allow_html=True)
+            q_word = st.text_input("新违禁词", key="impact_word", placeholder="如：最")
+            q_exc = st.text_input("例外用法（逗号分隔）", key="impact_exc", placeholder="如：最近,最后")
+            if q_word.strip():
+                q_hits = draft_index().search(
+                    q_word.strip(), [e.strip() for e in q_exc.replace("，", ",").split(",") if e.strip()],
+                    config=None if h_all else configs[sel]["file"],
+                )
+                st.caption(f"已通过的稿件中有 {len(q_hits)} 篇受影响")
+                if q_hits:
+                    st.dataframe([{"稿件": h["draft"][:8], "达人": h["kol"], "次数": h["count"]} for h in q_hits[:200]],
+                                 hide_index=True, use_container_width=True)
+
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 #  主区域
@@ -221,6 +372,46 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+# 批量上传的稿件队列：点列名排序，选一篇打开进入 4 步流程
+if st.session_state.queue:
+    queue = st.session_state.queue
+    q_ok = sum(1 for it in queue if it["passed"])
+    with st.expander(f"批量稿件 · {len(queue)} 篇，初审通过 {q_ok} 篇", expanded=not st.session_state.results):
+        q_sort = st.selectbox("排序", list(SORT_KEYS), format_func=lambda k: SORT_KEYS[k][0], key="queue_sort")
+        queue = sort_queue(queue, q_sort)
+        st.dataframe([{
+            "状态": "⚠️ 读取失败" if it["error"] else ("✅ 通过" if it["passed"] else f"❌ {len(it['failed'])} 项未通过"),
+            "文件": it["name"],
+            "达人": it["kol"],
+            "字数": it["words"],
+            "未通过项": it["error"] or "、".join(r["name"] for r in it["results"] if not r["pass"]),
+            "当前": "●" if it["name"] == st.session_state.queue_open else "",
+        } for it in queue], hide_index=True, use_container_width=True)
+        openable = [it for it in queue if it["error"] is None]
+        if openable:
+            q_col1, q_col2 = st.columns([4, 1])
+            with q_col1:
+                q_pick = st.selectbox("打开稿件", range(len(openable)), key="queue_pick", label_visibility="collapsed",
+                                      format_func=lambda i: f"{'通过' if openable[i]['passed'] else '未通过'} · {openable[i]['name']}")
+            with q_col2:
+                if st.button("打开审核", type="primary", use_container_width=True, key="queue_open_btn"):
+                    it = openable[q_pick]
+                    open_draft(it["titles"], it["body"], it["tags"], kol=it["kol"], results=it["results"])
+                    st.session_state.queue_open = it["name"]
+                    st.rerun()
+        # 批量导出：后台任务里用进程池生成每篇的标注版 / 修复版，连同汇总 CSV 打成一个 zip
+        if st.button("打包导出全部（标注版 + 修复版 + 汇总表）", use_container_width=True, key="queue_export_btn"):
+            st.session_state.queue_export = True
+        if st.session_state.get("queue_export"):
+            q_job = slot_job("bulk_zip", "批量导出", export_zip_bytes, st.session_state.queue, config)
+            if q_job.state == DONE:
+                st.download_button("下载 zip", data=q_job.result, file_name=f"审稿结果_{config['_name']}.zip",
+                                   mime="application/zip", use_container_width=True, key="dl_bulk_zip")
+            elif q_job.state == FAILED:
+                st.error(f"打包失败: {q_job.error}")
+            else:
+                st.button("打包中…", disabled=True, use_container_width=True, key="wait_bulk_zip")
+
 if not st.session_state.results:
     st.markdown(
         '<div class="empty-state">'
@@ -230,6 +421,8 @@ if not st.session_state.results:
         '</div>',
         unsafe_allow_html=True,
     )
+    if jobs_pending():
+        poll_jobs()
     st.stop()
 
 results = st.session_state.results
@@ -237,17 +430,102 @@ titles = st.session_state.titles
 body = st.session_state.body
 tags = st.session_state.tags
 
+# 近似重复：以前审过几乎一样的正文
+if st.session_state.near_dups:
+    top = st.session_state.near_dups[0]
+    if any(d.get("exact") for d in st.session_state.near_dups):
+        st.warning("这篇稿件以前原样审核过（可能是换方向 / 换活动重投），可先查看以前的审核结果")
+    else:
+        st.warning(f"正文与 {len(st.session_state.near_dups)} 篇历史稿件高度相似（最高 {top['similarity']:.0%}），可先查看以前的审核结果")
+    with st.expander("查看相似的历史稿件"):
+        for dup in st.session_state.near_dups:
+            earlier = HISTORY.draft(dup["source"])
+            if earlier is None:
+                continue
+            first = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(dup["first_seen"]))
+            st.markdown(
+                ("**原样重投（与以前审过的稿件完全相同）**" if dup.get("exact") else f"**相似度 {dup['similarity']:.0%}**")
+                + f" · 达人 {dup['kol'] or '（未填）'} · 方向 {'、'.join(dup['configs']) or '—'} · 首次审核 {first}"
+            )
+            if earlier["titles"]:
+                st.caption(earlier["titles"][0])
+            st.dataframe([{"时间": a["created"][5:16].replace("T", " "), "环节": HISTORY_STAGES.get(a["stage"], a["stage"]),
+                           "方向": a["config"], "结果": "通过" if a["passed"] else "、".join(a["failed"])}
+                          for a in earlier["audits"]], hide_index=True, use_container_width=True)
+
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-#  Tabs 布局
+#  局部刷新片段：输入时只重跑片段本身，保存时整页刷新
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
-tab1, tab2, tab3, tab4 = st.tabs(["基础审核", "卖点审核", "人话修改", "终检"])
+@fragment
+def title_fix_editor(fixed_titles):
+    edited_fix_titles = []
+    for i, t in enumerate(fixed_titles):
+        et = st.text_input(f"标题{i+1}", value=t, key=f"fix_title_{i}")
+        edited_fix_titles.append(et)
+    if st.button("保存标题", key="save_fix_titles"):
+        st.session_state.fixed_titles = edited_fix_titles
+        st.session_state.results = run_all_checks(
+            edited_fix_titles, st.session_state.fixed_body, st.session_state.fixed_tags, config,
+        )
+        record_history("fixed", edited_fix_titles, st.session_state.fixed_body, st.session_state.fixed_tags,
+                       st.session_state.results, st.session_state.changes)
+        st.rerun()
+
+
+@fragment
+def ai_editor(ai_body, fixed_tags, fixed_titles):
+    edited_body = st.text_area("编辑正文", value=ai_body, height=400, key="edit_ai_body")
+    st.caption(f"字数: {count_chinese(edited_body)}")
+    edited_tags = st.text_area("编辑标签", value=fixed_tags, height=60, key="edit_ai_tags")
+    edited_titles = []
+    for i, t in enumerate(fixed_titles):
+        et = st.text_input(f"标题{i+1}", value=t, key=f"edit_ai_title_{i}")
+        edited_titles.append(et)
+    if st.button("保存并重新审核", key="save_ai_edit"):
+        st.session_state.ai_body = edited_body
+        st.session_state.fixed_titles = edited_titles
+        st.session_state.fixed_tags = edited_tags
+        st.session_state.ai_results = run_all_checks(edited_titles, edited_body, edited_tags, config)
+        record_history("ai", edited_titles, edited_body, edited_tags, st.session_state.ai_results)
+        st.rerun()
+
+
+@fragment
+def final_editor(final_body, final_tags, final_titles):
+    ed_body = st.text_area("编辑正文", value=final_body, height=400, key="final_edit_body")
+    st.caption(f"字数: {count_chinese(ed_body)}")
+    ed_tags = st.text_area("编辑标签", value=final_tags, height=60, key="final_edit_tags")
+    ed_titles = []
+    for i, t in enumerate(final_titles):
+        et = st.text_input(f"标题{i+1}", value=t, key=f"final_edit_title_{i}")
+        ed_titles.append(et)
+    if st.button("保存并重新终检", type="primary", key="btn_recheck"):
+        st.session_state.final_titles = ed_titles
+        st.session_state.final_body = ed_body
+        st.session_state.final_tags = ed_tags
+        st.session_state.final_results = run_all_checks(ed_titles, ed_body, ed_tags, config)
+        record_history("final", ed_titles, ed_body, ed_tags, st.session_state.final_results)
+        st.rerun()
+
+
+@fragment(run_every=1)
+def ai_progress(job_id):
+    """AI 改写进行中：每秒只重跑这个片段刷新耗时，结束后整页刷新取结果"""
+    ai_job = JOBS.get(job_id)
+    if ai_job is None or ai_job.done:
+        st.rerun()
+    st.info(f"AI 正在改写中，已用 {ai_job.to_dict()['elapsed']:.0f} 秒...")
+    if st.button("取消改写", use_container_width=True, key="btn_ai_cancel"):
+        JOBS.cancel(ai_job.id)
+        st.session_state.ai_job = None
+        st.rerun()
 
 
 # ══════════════════════════════
 #  Tab 1 — 基础审核
 # ══════════════════════════════
-with tab1:
+def render_basic():
     basic_ids = {"word_count", "title_count", "title_keywords", "hashtags", "forbidden_words"}
     basic_checks = [r for r in results if r["id"] in basic_ids]
     fw_r = find_check(results, "forbidden_words")
@@ -282,13 +560,18 @@ with tab1:
         for v in fw_r["violations"]:
             w = v["word"]
             if w not in by_word:
-                by_word[w] = {"count": 0, "cat": v["category"], "repl": v["replacement"]}
+                by_word[w] = {"count": 0, "cat": v["category"], "repl": v["replacement"], "variants": []}
             by_word[w]["count"] += 1
+            # 规避写法（繁体、插空格等）在原文里的样子
+            matched = v.get("matched", w)
+            if matched != w and matched not in by_word[w]["variants"]:
+                by_word[w]["variants"].append(matched)
         d = '<table class="audit-table"><tr><th>违禁词</th><th>分类</th><th>次数</th><th>替换为</th></tr>'
         for w, info in by_word.items():
             repl = info["repl"] if info["repl"] else "删除"
+            variants = f'<br><span class="tag-warn">原文：{"、".join(info["variants"])}</span>' if info["variants"] else ""
             d += (
-                f'<tr><td><span class="status-fail">{w}</span></td>'
+                f'<tr><td><span class="status-fail">{w}</span>{variants}</td>'
                 f'<td>{info["cat"]}</td><td>{info["count"]}</td>'
                 f'<td><span class="tag-pass">{repl}</span></td></tr>'
             )
@@ -300,13 +583,19 @@ with tab1:
     if not st.session_state.is_fixed:
         st.caption("自动修复违禁词替换、标签补齐、特殊替换规则")
         if st.button("一键修复", type="primary", use_container_width=True, key="btn_fix"):
-            ft, fb, ftg, changes = auto_fix_all(titles, body, tags, config)
+            pre = speculative.get_fix(titles, body, tags, config)
+            if pre:
+                ft, fb, ftg, changes, fixed_results = pre
+            else:
+                ft, fb, ftg, changes = auto_fix_all(titles, body, tags, config)
+                fixed_results = run_all_checks(ft, fb, ftg, config)
             st.session_state.fixed_titles = ft
             st.session_state.fixed_body = fb
             st.session_state.fixed_tags = ftg
             st.session_state.changes = changes
             st.session_state.is_fixed = True
-            st.session_state.results = run_all_checks(ft, fb, ftg, config)
+            st.session_state.results = fixed_results
+            record_history("fixed", ft, fb, ftg, fixed_results, changes)
             st.rerun()
     else:
         changes = st.session_state.changes
@@ -359,22 +648,13 @@ with tab1:
         if not title_kw_r["pass"]:
             st.markdown("---")
             st.warning(f"标题关键词缺失：{'、'.join(title_kw_r['missing'])}，请编辑标题补充")
-            edited_fix_titles = []
-            for i, t in enumerate(fixed_titles):
-                et = st.text_input(f"标题{i+1}", value=t, key=f"fix_title_{i}")
-                edited_fix_titles.append(et)
-            if st.button("保存标题", key="save_fix_titles"):
-                st.session_state.fixed_titles = edited_fix_titles
-                st.session_state.results = run_all_checks(
-                    edited_fix_titles, st.session_state.fixed_body, st.session_state.fixed_tags, config,
-                )
-                st.rerun()
+            title_fix_editor(fixed_titles)
 
 
 # ══════════════════════════════
 #  Tab 2 — 卖点审核
 # ══════════════════════════════
-with tab2:
+def render_selling():
     if not st.session_state.is_fixed:
         st.markdown(
             '<div class="tab-locked">'
@@ -425,7 +705,7 @@ with tab2:
 # ══════════════════════════════
 #  Tab 3 — 人话修改
 # ══════════════════════════════
-with tab3:
+def render_humanize():
     if not st.session_state.is_fixed:
         st.markdown(
             '<div class="tab-locked">'
@@ -436,25 +716,47 @@ with tab3:
         )
     else:
         current_body = st.session_state.fixed_body
-        paras_config = config["hard_rules"]["structure"]["paragraphs"]
 
         if not st.session_state.ai_done:
+            spec_state = speculative.ai_status(
+                st.session_state.fixed_titles, current_body, st.session_state.fixed_tags, config,
+            )
+            if spec_state == "done":
+                st.caption("后台改写已完成，点击即可查看")
+            elif spec_state == "running":
+                st.caption("后台改写进行中，点击后等待其完成")
+            ai_job = JOBS.get(st.session_state.ai_job) if st.session_state.ai_job else None
+            if ai_job and ai_job.done:
+                st.session_state.ai_job = None
+                if ai_job.state == DONE and ai_job.result[0]:
+                    st.session_state.ai_body, st.session_state.ai_results, _ = ai_job.result
+                    st.session_state.ai_done = True
+                    st.session_state.ai_error = None
+                    record_history("ai", st.session_state.fixed_titles, st.session_state.ai_body,
+                                   st.session_state.fixed_tags, st.session_state.ai_results)
+                elif ai_job.state == DONE:
+                    st.session_state.ai_error = ai_job.result[2]
+                elif ai_job.state == FAILED:
+                    st.session_state.ai_error = ai_job.error
+                st.rerun()
+
             col_ai1, col_ai2 = st.columns([1, 1])
             with col_ai1:
-                if st.button("AI 一键人话改写", type="primary", use_container_width=True, key="btn_ai"):
-                    with st.spinner("AI 正在改写中，请稍候..."):
-                        result, error = rewrite_full_body(current_body, config, paras_config)
-                        if result:
-                            ai_t = list(st.session_state.fixed_titles)
-                            ai_tg = st.session_state.fixed_tags
-                            _, result, _, _ = auto_fix_all(ai_t, result, ai_tg, config)
-                            st.session_state.ai_body = result
-                            st.session_state.ai_done = True
-                            st.session_state.ai_error = None
-                            st.session_state.ai_results = run_all_checks(ai_t, result, ai_tg, config)
-                        else:
-                            st.session_state.ai_error = error
-                        st.rerun()
+                if ai_job:
+                    ai_progress(ai_job.id)
+                elif st.button("AI 一键人话改写", type="primary", use_container_width=True, key="btn_ai"):
+                    args = (st.session_state.fixed_titles, current_body, st.session_state.fixed_tags, config)
+                    pre = speculative.get_ai(*args, timeout=0)
+                    if pre:
+                        st.session_state.ai_body, st.session_state.ai_results, _ = pre
+                        st.session_state.ai_done = True
+                        st.session_state.ai_error = None
+                        record_history("ai", st.session_state.fixed_titles, st.session_state.ai_body,
+                                       st.session_state.fixed_tags, st.session_state.ai_results)
+                    else:
+                        st.session_state.ai_error = None
+                        st.session_state.ai_job = JOBS.submit("AI 改写", speculative.rewrite, *args)
+                    st.rerun()
             with col_ai2:
                 if st.button("跳过，直接手动编辑", use_container_width=True, key="btn_skip_ai"):
                     st.session_state.ai_body = current_body
@@ -462,6 +764,7 @@ with tab3:
                     ai_t = st.session_state.fixed_titles
                     ai_tg = st.session_state.fixed_tags
                     st.session_state.ai_results = run_all_checks(ai_t, current_body, ai_tg, config)
+                    record_history("ai", ai_t, current_body, ai_tg, st.session_state.ai_results)
                     st.rerun()
 
             if st.session_state.ai_error:
@@ -473,7 +776,7 @@ with tab3:
             # 对比
             st.markdown('<div class="section-label">人话修改对比</div>', unsafe_allow_html=True)
             st.caption("红色=删除 · 黄色=被替换 · 绿色=新增")
-            before_hl, after_hl = diff_highlight(st.session_state.fixed_body, ai_body)
+            before_hl, after_hl = render_diff("diff_ai", st.session_state.fixed_body, ai_body) or ("对比生成中…", "对比生成中…")
             col_l, col_r = st.columns(2)
             with col_l:
                 st.markdown('<div class="diff-label orig">修复后版本</div>', unsafe_allow_html=True)
@@ -493,44 +796,20 @@ with tab3:
             st.markdown('<div class="section-label">下载文档</div>', unsafe_allow_html=True)
             dl1, dl2 = st.columns(2)
             with dl1:
-                diff_doc = generate_diff_docx(
-                    st.session_state.fixed_titles,
-                    st.session_state.fixed_body, ai_body,
-                    st.session_state.fixed_tags,
-                    title_label="人话修改 · 标注对比",
-                )
-                st.download_button(
-                    "下载标注版 .docx", data=diff_doc,
-                    file_name="人话修改_标注版.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                    use_container_width=True,
+                render_docx_download(
+                    "doc_ai_diff", "下载标注版 .docx", "人话修改_标注版.docx", generate_diff_docx,
+                    st.session_state.fixed_titles, st.session_state.fixed_body, ai_body,
+                    st.session_state.fixed_tags, "人话修改 · 标注对比",
                 )
             with dl2:
-                clean_doc = generate_clean_docx(
+                render_docx_download(
+                    "doc_ai_clean", "下载纯净版 .docx", "人话修改_纯净版.docx", generate_clean_docx,
                     st.session_state.fixed_titles, ai_body, st.session_state.fixed_tags,
                 )
-                st.download_button(
-                    "下载纯净版 .docx", data=clean_doc,
-                    file_name="人话修改_纯净版.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                    use_container_width=True,
-                )
 
             # 在线微调
             with st.expander("在线微调"):
-                edited_body = st.text_area("编辑正文", value=ai_body, height=400, key="edit_ai_body")
-                st.caption(f"字数: {count_chinese(edited_body)}")
-                edited_tags = st.text_area("编辑标签", value=st.session_state.fixed_tags, height=60, key="edit_ai_tags")
-                edited_titles = []
-                for i, t in enumerate(st.session_state.fixed_titles):
-                    et = st.text_input(f"标题{i+1}", value=t, key=f"edit_ai_title_{i}")
-                    edited_titles.append(et)
-                if st.button("保存并重新审核", key="save_ai_edit"):
-                    st.session_state.ai_body = edited_body
-                    st.session_state.fixed_titles = edited_titles
-                    st.session_state.fixed_tags = edited_tags
-                    st.session_state.ai_results = run_all_checks(edited_titles, edited_body, edited_tags, config)
-                    st.rerun()
+                ai_editor(ai_body, st.session_state.fixed_tags, st.session_state.fixed_titles)
 
             # 审核结果
             if st.session_state.ai_results:
@@ -559,13 +838,16 @@ with tab3:
                 st.session_state.final_results = run_all_checks(
                     st.session_state.fixed_titles, st.session_state.ai_body, st.session_state.fixed_tags, config,
                 )
+                record_history("final", st.session_state.final_titles, st.session_state.final_body,
+                               st.session_state.final_tags, st.session_state.final_results)
+                st.session_state.nav_to = "终检"
                 st.rerun()
 
 
 # ══════════════════════════════
 #  Tab 4 — 终检
 # ══════════════════════════════
-with tab4:
+def render_final():
     if not st.session_state.final_results:
         st.markdown(
             '<div class="tab-locked">'
@@ -604,7 +886,7 @@ with tab4:
         # 对比
         st.markdown('<div class="section-label">原稿 vs 终稿</div>', unsafe_allow_html=True)
         st.caption("红色=删除 · 黄色=被替换 · 绿色=新增")
-        final_before_hl, final_after_hl = diff_highlight(body, final_body)
+        final_before_hl, final_after_hl = render_diff("diff_final", body, final_body) or ("对比生成中…", "对比生成中…")
         col_fl, col_fr = st.columns(2)
         with col_fl:
             st.markdown('<div class="diff-label orig">原稿</div>', unsafe_allow_html=True)
@@ -631,23 +913,14 @@ with tab4:
         st.markdown('<div class="section-label">下载文档</div>', unsafe_allow_html=True)
         dl_f1, dl_f2 = st.columns(2)
         with dl_f1:
-            final_diff_doc = generate_diff_docx(
-                final_titles, body, final_body, final_tags,
-                title_label="终稿 · 原稿对比标注",
-            )
-            st.download_button(
-                "下载标注版 .docx", data=final_diff_doc,
-                file_name="终稿_标注版.docx",
-                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                use_container_width=True,
+            render_docx_download(
+                "doc_final_diff", "下载标注版 .docx", "终稿_标注版.docx", generate_diff_docx,
+                final_titles, body, final_body, final_tags, "终稿 · 原稿对比标注",
             )
         with dl_f2:
-            final_clean_doc = generate_clean_docx(final_titles, final_body, final_tags)
-            st.download_button(
-                "下载终稿 .docx", data=final_clean_doc,
-                file_name="终稿.docx",
-                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                use_container_width=True,
+            render_docx_download(
+                "doc_final_clean", "下载终稿 .docx", "终稿.docx", generate_clean_docx,
+                final_titles, final_body, final_tags,
             )
 
         # 复制
@@ -658,16 +931,21 @@ with tab4:
         # 未通过 → 继续修改
         if not all_pass:
             with st.expander("继续修改"):
-                ed_body = st.text_area("编辑正文", value=final_body, height=400, key="final_edit_body")
-                st.caption(f"字数: {count_chinese(ed_body)}")
-                ed_tags = st.text_area("编辑标签", value=final_tags, height=60, key="final_edit_tags")
-                ed_titles = []
-                for i, t in enumerate(final_titles):
-                    et = st.text_input(f"标题{i+1}", value=t, key=f"final_edit_title_{i}")
-                    ed_titles.append(et)
-                if st.button("保存并重新终检", type="primary", key="btn_recheck"):
-                    st.session_state.final_titles = ed_titles
-                    st.session_state.final_body = ed_body
-                    st.session_state.final_tags = ed_tags
-                    st.session_state.final_results = run_all_checks(ed_titles, ed_body, ed_tags, config)
-                    st.rerun()
+                final_editor(final_body, final_tags, final_titles)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  步骤导航：只渲染当前步骤
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+STEPS = {"基础审核": render_basic, "卖点审核": render_selling, "人话修改": render_humanize, "终检": render_final}
+
+nav_to = st.session_state.pop("nav_to", None)
+if nav_to:
+    st.session_state.active_step = nav_to
+step = st.radio("步骤", list(STEPS), horizontal=True, key="active_step", label_visibility="collapsed")
+STEPS[step]()
+
+# 有后台任务未结束时轮询（任务本身不占脚本线程，轮询只重跑一个空片段）
+if jobs_pending():
+    poll_jobs()
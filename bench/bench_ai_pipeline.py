@@ -0,0 +1,91 @@
+"""Tab 3 AI 流水线压测：改写 → auto_fix → 复检，离线可复现
+
+    python -m bench.bench_ai_pipeline --config nengen_direction1 -n 200 -c 8 \
+        --latency lognormal:0.8,0.4 --error-rate 0.05 --seed 42
+    python -m bench.bench_ai_pipeline --http http://127.0.0.1:8765/generate -n 200 -c 8
+
+不指定 --http 时使用进程内 MockBackend；指定时走 HTTP 替身（含序列化和网络栈开销）。
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.corpus import sample_draft
+from core.ai_pipeline import run_ai_rewrite
+from core.config_loader import load_config
+from core.llm_backends import HTTPBackend, MockBackend
+from core.llm_metrics import METRICS
+
+
+def percentile(sorted_values, p):
+    """最近秩百分位"""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[k]
+
+
+def run(config, backend, n, concurrency):
+    """跑 n 次流水线，返回统计 dict"""
+    titles, body, tags = sample_draft(config)
+
+    def one(_):
+        t0 = time.perf_counter()
+        ai_body, _, error = run_ai_rewrite(titles, body, tags, config, backend=backend)
+        return time.perf_counter() - t0, ai_body is not None
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(one, range(n)))
+    wall = time.perf_counter() - t0
+
+    latencies = sorted(s[0] for s in samples)
+    ok = sum(1 for s in samples if s[1])
+    return {
+        "requests": n,
+        "concurrency": concurrency,
+        "ok": ok,
+        "errors": n - ok,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(n / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="AI 流水线吞吐 / 尾延迟压测")
+    ap.add_argument("--config", default="nengen_direction1")
+    ap.add_argument("-n", type=int, default=100, help="请求数")
+    ap.add_argument("-c", type=int, default=4, help="并发数")
+    ap.add_argument("--latency", default="const:0")
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--http", help="HTTP 替身地址，不填则用进程内 Mock")
+    ap.add_argument("--retries", type=int, default=1, help="LLM_MAX_RETRIES")
+    ap.add_argument("--backoff", type=float, default=0.0, help="LLM_RETRY_BACKOFF（秒）")
+    ap.add_argument("--metrics", choices=["json", "prom"], help="结束后输出 LLM 计量")
+    args = ap.parse_args()
+    os.environ["LLM_MAX_RETRIES"] = str(args.retries)
+    os.environ["LLM_RETRY_BACKOFF"] = str(args.backoff)
+
+    config = load_config(args.config)
+    if args.http:
+        backend = HTTPBackend(args.http)
+    else:
+        backend = MockBackend(args.latency, args.error_rate, seed=args.seed)
+    stats = run(config, backend, args.n, args.c)
+    for k, v in stats.items():
+        print(f"{k:>16}: {v}")
+    if args.metrics == "json":
+        print(json.dumps(METRICS.export_json(), ensure_ascii=False, indent=2))
+    elif args.metrics == "prom":
+        print(METRICS.export_prometheus())
+
+
+if __name__ == "__main__":
+    main()
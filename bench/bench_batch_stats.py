@@ -0,0 +1,71 @@
+"""批量统计压测：batch_stats（numpy 列式）vs 逐篇计算
+
+    python -m bench.bench_batch_stats --config nengen_direction1 -n 5000
+
+输出两种方式的总耗时、每篇耗时和结果是否一致；中文字数单独对比（不含归一化）。
+"""
+import argparse
+import json
+import time
+
+from bench.corpus import evasive_draft, sample_draft
+from core import batch_stats as bs
+from core.config_loader import load_config
+from core.text_utils import count_chinese
+
+
+def run(config, n):
+    if not bs.HAS_NUMPY:
+        raise SystemExit("未安装 numpy，batch_stats 使用逐篇计算，无需对比")
+    drafts = []
+    for i in range(n):
+        titles, body, tags = evasive_draft(config, seed=i) if i % 2 else sample_draft(config, 1 + i % 3)
+        drafts.append((titles[:1 + i % 3], f"{body}\n{i}", tags))
+
+    t0 = time.perf_counter()
+    vec = bs.batch_stats(drafts, config)
+    vec_s = time.perf_counter() - t0
+
+    bs.HAS_NUMPY = False
+    try:
+        t0 = time.perf_counter()
+        loop = bs.batch_stats(drafts, config)
+        loop_s = time.perf_counter() - t0
+    finally:
+        bs.HAS_NUMPY = True
+
+    bodies = [b for _, b, _ in drafts]
+    t0 = time.perf_counter()
+    counts = [count_chinese(b) for b in bodies]
+    cjk_loop_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    codes, starts, ends = bs._encode(bodies)
+    vec_counts = bs._segment_sum((codes >= bs.CJK_FIRST) & (codes <= bs.CJK_LAST), starts, ends)
+    cjk_vec_s = time.perf_counter() - t0
+
+    same = (all(vec.columns[c].tolist() == loop.columns[c] for c in vec.columns)
+            and vec.hits.tolist() == loop.hits and vec_counts.tolist() == counts)
+    return {
+        "drafts": n,
+        "keywords": len(vec.keywords),
+        "numpy_ms": round(vec_s * 1e3, 1),
+        "loop_ms": round(loop_s * 1e3, 1),
+        "numpy_us_per_draft": round(vec_s / n * 1e6, 1),
+        "loop_us_per_draft": round(loop_s / n * 1e6, 1),
+        "cjk_numpy_ms": round(cjk_vec_s * 1e3, 1),
+        "cjk_loop_ms": round(cjk_loop_s * 1e3, 1),
+        "results_match": same,
+        "summary": vec.summary(),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--config", default="nengen_direction1")
+    ap.add_argument("-n", type=int, default=5000)
+    args = ap.parse_args()
+    print(json.dumps(run(load_config(args.config), args.n), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""打包语料整库重扫压测：mmap + 多进程 vs 逐篇读 .docx 再审核
+
+    python -m bench.bench_corpus_pack --config nengen_direction1 -n 20000 --workers 4
+
+输出打包文件大小、打包耗时、1 个进程和 --workers 个进程的重扫耗时与 MB/s，
+逐篇审核（违禁词 + 必提词）的耗时，按 --docx 篇实测的读 .docx 单篇耗时推算整库逐个读文件的耗时，
+并校验重扫结果与逐篇审核一致。
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from bench.bench_triage import make_batch
+from core.batch_stats import _keywords
+from core.config_loader import load_config
+from core.corpus_pack import pack_drafts, rescan
+from core.doc_export import generate_clean_docx
+from core.hard_checks import _forbidden_hits
+from core.normalize import normalize, normalize_word
+from core.text_utils import parse_input, read_docx
+
+
+def _per_draft(drafts, hr):
+    """逐篇审核的对照：违禁词计数 + 缺失必提词"""
+    keywords = _keywords(hr)
+    out = []
+    for titles, body, tags in drafts:
+        text = normalize("\n".join(titles) + "\n" + body + "\n" + tags).text
+        counts = {}
+        for fw, _, _ in _forbidden_hits(text, hr["forbidden_words"]):
+            counts[fw["word"]] = counts.get(fw["word"], 0) + 1
+        norm_body = normalize(body).text
+        out.append((counts, [kw for kw in keywords if normalize_word(kw) not in norm_body]))
+    return out
+
+
+def run(config, n, workers, docx=200, seed=0):
+    hr = config["hard_rules"]
+    drafts = [d for _, d in make_batch(config, n, seed)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "archive.pack")
+        t0 = time.perf_counter()
+        pack_drafts(((f"d{i}", t, b, tg, None) for i, (t, b, tg) in enumerate(drafts)), path)
+        pack_s = time.perf_counter() - t0
+        size = os.path.getsize(path)
+
+        single = rescan(path, config, workers=1)
+        multi = rescan(path, config, workers=workers)
+
+        t0 = time.perf_counter()
+        expected = _per_draft(drafts, hr)
+        loop_s = time.perf_counter() - t0
+
+        files = []
+        for i, (t, b, tg) in enumerate(drafts[:docx]):
+            fp = os.path.join(tmp, f"{i}.docx")
+            with open(fp, "wb") as f:
+                f.write(generate_clean_docx(t, b, tg).getvalue())
+            files.append(fp)
+        t0 = time.perf_counter()
+        for fp in files:
+            with open(fp, "rb") as f:
+                parse_input(read_docx(f))
+        docx_us = (time.perf_counter() - t0) / max(len(files), 1) * 1e6
+
+    mismatches = sum(1 for r, (counts, missing) in zip(multi["results"], expected)
+                     if r["forbidden"] != counts or r["missing_keywords"] != missing)
+    mismatches += sum(1 for a, b in zip(single["results"], multi["results"]) if a != b)
+    return {
+        "drafts": n,
+        "pack_mb": round(size / 1e6, 1),
+        "pack_s": round(pack_s, 2),
+        "rescan_1_worker_s": single["seconds"],
+        f"rescan_{workers}_workers_s": multi["seconds"],
+        "rescan_mb_per_sec": multi["mb_per_sec"],
+        "per_draft_check_s": round(loop_s, 2),
+        "read_docx_us_per_file": round(docx_us, 1),
+        "estimated_docx_read_s": round(docx_us * n / 1e6, 1),
+        "affected": multi["affected"],
+        "mismatches": mismatches,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--config", default="nengen_direction1")
+    ap.add_argument("-n", type=int, default=20000)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--docx", type=int, default=200, help="实测读 .docx 耗时用的篇数")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    print(json.dumps(run(load_config(args.config), args.n, args.workers, args.docx, args.seed),
+                     ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
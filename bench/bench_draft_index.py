@@ -0,0 +1,67 @@
+"""稿件倒排索引压测：建索引速度、规则影响查询耗时 vs 逐篇重扫
+
+    python -m bench.bench_draft_index --config nengen_direction1 -n 20000
+
+对配置里每个违禁词（含例外）各查一次受影响稿件，与逐篇在归一化全文上跑 _forbidden_hits 的结果对比。
+"""
+import argparse
+import json
+import time
+
+from bench.bench_triage import make_batch
+from core.config_loader import load_config
+from core.draft_index import DraftIndex, full_text
+from core.hard_checks import _forbidden_hits
+from core.history import draft_hash
+from core.normalize import normalize
+
+
+def run(config, n, seed=0):
+    hr = config["hard_rules"]
+    drafts = [d for _, d in make_batch(config, n, seed)]
+
+    idx = DraftIndex()
+    t0 = time.perf_counter()
+    for i, (t, b, tg) in enumerate(drafts):
+        idx.add(draft_hash(t, b, tg), t, b, tg, kol=f"kol{i % 50}", config="bench", passed=i % 3 == 0)
+    build_s = time.perf_counter() - t0
+
+    texts = [(draft_hash(*d), normalize.__wrapped__(full_text(*d)).text) for d in drafts]
+    query_ms, scan_ms, mismatches = {}, {}, 0
+    for fw in hr["forbidden_words"]:
+        t0 = time.perf_counter()
+        hits = idx.search(fw["word"], fw.get("exceptions", []), approved=None)
+        query_ms[fw["word"]] = round((time.perf_counter() - t0) * 1e3, 2)
+
+        t0 = time.perf_counter()
+        expected = {h for h, text in texts if any(True for _ in _forbidden_hits(text, [fw]))}
+        scan_ms[fw["word"]] = round((time.perf_counter() - t0) * 1e3, 1)
+        mismatches += {h["draft"] for h in hits} != expected
+
+    t0 = time.perf_counter()
+    affected = idx.impact(config)
+    impact_ms = (time.perf_counter() - t0) * 1e3
+    return {
+        "drafts": len(idx),
+        "build_s": round(build_s, 2),
+        "build_drafts_per_sec": round(len(idx) / build_s),
+        "index": idx.stats(),
+        "query_ms": query_ms,
+        "scan_ms": scan_ms,
+        "impact_approved_ms": round(impact_ms, 1),
+        "impact_approved_drafts": {w: len(hs) for w, hs in affected.items()},
+        "mismatches": mismatches,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--config", default="nengen_direction1")
+    ap.add_argument("-n", type=int, default=20000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    print(json.dumps(run(load_config(args.config), args.n, args.seed), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""归一化开销压测：归一化 + 在归一化文本上匹配 vs 直接在原文上 str.find
+
+    python -m bench.bench_normalize --config nengen_direction1 -n 2000
+
+输出每篇耗时（微秒）、归一化带来的倍数，以及查出的违禁词中有多少是规避写法。
+"""
+import argparse
+import json
+import time
+
+from bench.corpus import evasive_draft, sample_draft
+from core.config_loader import load_config
+from core.hard_checks import check_forbidden_words, run_all_checks
+from core.normalize import normalize
+
+
+def _raw_scan(text, hr):
+    """基线：原文上逐词 str.find（归一化之前的做法）"""
+    hits = 0
+    words = [fw["word"] for fw in hr["forbidden_words"]]
+    words += [kw for p in hr["structure"]["paragraphs"] for sp in p["selling_points"] for kw in sp["required_keywords"]]
+    words += [req["tag"] for req in hr["hashtags"]["required"]]
+    for w in words:
+        i = text.find(w)
+        while i != -1:
+            hits += 1
+            i = text.find(w, i + 1)
+    return hits
+
+
+def _timeit(fn, drafts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for d in drafts:
+            fn(d)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(drafts) * 1e6
+
+
+def run(config, n, repeat=3):
+    hr = config["hard_rules"]
+    results = {}
+    for label, make in [("plain", lambda i: sample_draft(config)),
+                        ("evasive", lambda i: evasive_draft(config, seed=i))]:
+        # 每篇加一个序号，保证内容不同、不命中 normalize 的缓存
+        drafts = []
+        for i in range(n):
+            titles, body, tags = make(i)
+            drafts.append((titles, f"{body}\n{i}", tags))
+        full_texts = ["\n".join(t) + "\n" + b + "\n" + tg for t, b, tg in drafts]
+        normalize_us = _timeit(normalize.__wrapped__, full_texts, repeat)
+        raw_us = _timeit(lambda text: _raw_scan(text, hr), full_texts, repeat)
+        norm_scan_us = _timeit(lambda text: _raw_scan(normalize.__wrapped__(text).text, hr), full_texts, repeat)
+        checks_us = _timeit(lambda d: (normalize.cache_clear(), run_all_checks(*d, config)), drafts, repeat)
+        violations = [v for t in full_texts for v in check_forbidden_words(t, hr)["violations"]]
+        results[label] = {
+            "drafts": n,
+            "chars_avg": round(sum(map(len, full_texts)) / n),
+            "normalize_us": round(normalize_us, 1),
+            "raw_scan_us": round(raw_us, 1),
+            "normalized_scan_us": round(norm_scan_us, 1),
+            "slowdown": round(norm_scan_us / raw_us, 2),
+            "run_all_checks_us": round(checks_us, 1),
+            "drafts_per_sec": round(1e6 / checks_us),
+            "violations": len(violations),
+            "evasions_caught": sum(1 for v in violations if v["matched"] != v["word"]),
+        }
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--config", default="nengen_direction1")
+    ap.add_argument("-n", type=int, default=1000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    print(json.dumps(run(load_config(args.config), args.n, args.repeat), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
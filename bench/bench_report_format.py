@@ -0,0 +1,67 @@
+"""紧凑审核报告压测：体积和编解码耗时，对比直接 json.dumps(run_all_checks 结果)
+
+    python -m bench.bench_report_format --config nengen_direction1 -n 2000
+
+输出每篇的平均字节数（原结果 JSON / 紧凑 JSON / 二进制）、各格式编码和解码的单篇耗时，
+按单篇体积推算一百万篇需要的存储，并校验两种编码往返后与原报告一致。
+"""
+import argparse
+import io
+import json
+import time
+
+from bench.bench_triage import make_batch
+from core.config_loader import load_config
+from core.hard_checks import run_all_checks
+from core.report_format import CompactReport, compact_report, read_reports, write_reports
+
+
+def _timed(fn, items):
+    t0 = time.perf_counter()
+    out = [fn(x) for x in items]
+    return out, (time.perf_counter() - t0) / max(len(items), 1) * 1e6
+
+
+def run(config, n, seed=0):
+    drafts = [d for _, d in make_batch(config, n, seed)]
+    results = [run_all_checks(t, b, tg, config) for t, b, tg in drafts]
+    reports, convert_us = _timed(lambda a: compact_report(*a[0], config, results=a[1]), list(zip(drafts, results)))
+
+    raw, raw_enc = _timed(lambda r: json.dumps(r, ensure_ascii=False).encode("utf-8"), results)
+    _, raw_dec = _timed(json.loads, raw)
+    js, js_enc = _timed(lambda r: r.to_json().encode("utf-8"), reports)
+    js_back, js_dec = _timed(CompactReport.from_json, js)
+    bs, bs_enc = _timed(CompactReport.to_bytes, reports)
+    bs_back, bs_dec = _timed(CompactReport.from_bytes, bs)
+
+    buf = io.BytesIO()
+    write_reports(reports, buf)
+    mismatches = sum(1 for a, b, c in zip(reports, js_back, bs_back) if not (a == b == c))
+    mismatches += sum(1 for a, b in zip(reports, read_reports(buf.getvalue())) if a != b)
+
+    def fmt(blobs, enc, dec):
+        avg = sum(map(len, blobs)) / n
+        return {"avg_bytes": round(avg), "max_bytes": max(map(len, blobs)), "encode_us": round(enc, 1),
+                "decode_us": round(dec, 1), "per_million_mb": round(avg, 1)}   # 平均字节数 × 100 万 / 1e6
+
+    return {
+        "drafts": n,
+        "convert_us": round(convert_us, 1),
+        "results_json": fmt(raw, raw_enc, raw_dec),
+        "compact_json": fmt(js, js_enc, js_dec),
+        "binary": fmt(bs, bs_enc, bs_dec),
+        "mismatches": mismatches,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--config", default="nengen_direction1")
+    ap.add_argument("-n", type=int, default=2000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    print(json.dumps(run(load_config(args.config), args.n, args.seed), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""快速筛查压测：triage_checks（便宜的先查、遇到不通过就停）vs run_all_checks（七项全量明细）
+
+    python -m bench.bench_triage --config nengen_direction1 -n 500
+
+批次里混有各类不合格稿件（标题数不对、字数不足、缺标签、规避写法违禁词、段落顺序颠倒）和合格稿件。
+输出两种模式的每篇耗时和 drafts/sec、各项检查单独的耗时（决定筛查顺序）、
+筛查结论在各检查项上的分布，并校验筛查结论与全量审核一致。
+"""
+import argparse
+import json
+import random
+import time
+
+from bench.corpus import evasive_draft, sample_draft
+from core.config_loader import load_config
+from core.hard_checks import TRIAGE_ORDER, run_all_checks, triage_checks
+from core.normalize import normalize
+from core.structure import _analyze
+from core.tags import tag_index
+from core.text_utils import count_chinese
+
+
+def _clear_caches():
+    normalize.cache_clear()
+    _analyze.cache_clear()
+    tag_index.cache_clear()
+
+
+def make_batch(config, n, seed=0):
+    """按 seed 随机混合合格稿件和各类不合格稿件"""
+    wc = config["hard_rules"]["word_count"]
+    titles, body, tags = sample_draft(config, repeat=3)
+    # 合格稿件：按段落拼到字数下限，超出上限的从末尾截掉
+    paras = []
+    for p in body.split("\n\n"):
+        if count_chinese("".join(paras)) >= wc["min"]:
+            break
+        paras.append(p)
+    while count_chinese("".join(paras)) > wc["max"]:
+        paras[-1] = paras[-1][:-10]
+    body = "\n\n".join(paras)
+    rnd = random.Random(seed)
+    kinds = {
+        "ok": lambda i: (titles, body, tags),
+        "titles": lambda i: (titles[:-1], body, tags),
+        "short": lambda i: (titles, paras[0], tags),
+        "tags": lambda i: (titles, body, " ".join(tags.split()[1:])),
+        "evasive": lambda i: (titles, evasive_draft(config, seed=i)[1] + "\n\n" + body, tags),
+        "order": lambda i: (titles, "\n\n".join(paras[1:2] + paras[:1] + paras[2:]), tags),
+    }
+    batch = []
+    for i in range(n):
+        kind = rnd.choice(list(kinds))
+        t, b, tg = kinds[kind](i)
+        # 每篇加一个序号，保证内容不同、不命中缓存
+        batch.append((kind, (t, f"{b}\n{i}", tg)))
+    return batch
+
+
+def _timeit(fn, drafts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        _clear_caches()
+        t0 = time.perf_counter()
+        for d in drafts:
+            fn(d)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(drafts) * 1e6
+
+
+def run(config, n, repeat=3, seed=0):
+    hr = config["hard_rules"]
+    batch = make_batch(config, n, seed)
+    drafts = [d for _, d in batch]
+
+    full_us = _timeit(lambda d: run_all_checks(*d, config), drafts, repeat)
+    triage_us = _timeit(lambda d: triage_checks(*d, config), drafts, repeat)
+
+    per_check = {}
+    for check_id, ok in TRIAGE_ORDER:
+        args = [(t, b, tg, "\n".join(t) + "\n" + b + "\n" + tg, hr) for t, b, tg in drafts]
+        per_check[check_id] = round(_timeit(lambda a: ok(*a), args, repeat), 1)
+
+    failed_at, mismatches = {}, 0
+    for kind, d in batch:
+        tri = triage_checks(*d, config)
+        full = run_all_checks(*d, config)
+        failing = [r["id"] for r in full if not r["pass"]]
+        if tri.passed != (not failing) or (failing and tri.failed not in failing):
+            mismatches += 1
+        key = tri.failed or "passed"
+        failed_at[key] = failed_at.get(key, 0) + 1
+
+    return {
+        "drafts": n,
+        "full_us": round(full_us, 1),
+        "triage_us": round(triage_us, 1),
+        "full_drafts_per_sec": round(1e6 / full_us),
+        "triage_drafts_per_sec": round(1e6 / triage_us),
+        "speedup": round(full_us / triage_us, 2),
+        "per_check_us": per_check,
+        "triage_failed_at": failed_at,
+        "verdict_mismatches": mismatches,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--config", default="nengen_direction1")
+    ap.add_argument("-n", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    print(json.dumps(run(load_config(args.config), args.n, args.repeat, args.seed), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""压测语料 - 由配置拼出结构完整的示例稿件（不使用真实 KOL 内容）"""
+from functools import lru_cache
+
+
+def sample_draft(config: dict, repeat: int = 1):
+    """用各卖点的 paraphrase_ref 按段落顺序拼正文，返回 (titles, body, tags)"""
+    hr = config["hard_rules"]
+    paras = []
+    for spec in hr["structure"]["paragraphs"]:
+        refs = [sp.get("paraphrase_ref", "") for sp in spec["selling_points"]]
+        kws = [kw for sp in spec["selling_points"] for kw in sp["required_keywords"]]
+        paras.append("，".join(refs + kws) + "。")
+    body = "\n\n".join(paras * repeat)
+    kw = "、".join(hr["titles"]["keywords"])
+    titles = [f"{kw}（{i + 1}）" for i in range(hr["titles"]["required_count"])]
+    tags = " ".join(req["tag"] for req in hr["hashtags"]["required"] for _ in range(req["min_count"]))
+    return titles, body, tags
+
+
+@lru_cache(maxsize=1)
+def _tricks():
+    from core.normalize import _T2S_SIMP, _T2S_TRAD
+
+    to_trad = dict(zip(_T2S_SIMP, _T2S_TRAD))
+    return [
+        lambda w: "".join(to_trad.get(c, c) for c in w),
+        lambda w: " ".join(w),
+        lambda w: "​".join(w),
+        lambda w: "".join(chr(ord(c) + 0xFEE0) if "!" <= c <= "~" else c for c in w),
+    ]
+
+
+def evade(word: str, rnd) -> str:
+    """随机一种规避写法（繁体 / 词中空格 / 零宽字符 / 全角），归一化后仍是原词
+
+    词中空格只用于全中文的词：英文单词间的空格是正常写法，归一化不会去掉。
+    """
+    tricks = _tricks()
+    if not all("\u4e00" <= c <= "\u9fff" for c in word):
+        tricks = [t for i, t in enumerate(tricks) if i != 1]
+    return rnd.choice(tricks)(word)
+
+
+def evasive_draft(config: dict, seed: int = 0, n: int = 10):
+    """在示例稿件里插入 n 处规避写法的违禁词（繁体 / 词中空格 / 零宽字符 / 全角）"""
+    import random
+
+    tricks = _tricks()
+    rnd = random.Random(seed)
+    titles, body, tags = sample_draft(config)
+    words = [fw["word"] for fw in config["hard_rules"]["forbidden_words"] if len(fw["word"]) > 1]
+    for _ in range(n):
+        pos = rnd.randrange(len(body) + 1)
+        body = body[:pos] + rnd.choice(tricks)(rnd.choice(words)) + body[pos:]
+    return titles, body, tags
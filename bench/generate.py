@@ -0,0 +1,447 @@
+"""合成稿件生成器 - 按配置批量造稿件（不使用真实 KOL 内容），每篇记下预期的审核结论
+
+    python -m bench.generate out/ --config nengen_direction1 -n 1000 --seed 0
+    python -m bench.generate out/ -n 100000 --format txt --fail-rate 0.3 --forbidden-density 5 --verify
+
+    for d in generate(config, 1000, seed=0): ...     # 每篇一个 dict（见 synth_draft）
+    write_drafts(generate(config, 1000), "out/")     # 写 .txt / .docx 和 expected.jsonl
+    verify("out/", config)                           # 读回文件、跑 run_all_checks、与预期逐项对比
+
+每篇稿件按 parse_input 认得的排版（达人昵称 / 一、标题 / 二、笔记内容 / 话题标签）输出：
+- 标题：配置要求的数量，标题关键词轮流分到各标题里
+- 正文：各段按配置顺序，本段的锚点词和必提词打乱后几个一句，其余用中性句子补到目标字数
+- 例外用法（如「最近」「第一口奶粉」）按 --exception-density（每千字几处）插进所有稿件，不应算违禁
+- 标签行：各必需标签按最少次数出现，顺序打乱
+不合格稿件（--fail-rate）随机带 1-2 种毛病：少一个标题、标题缺关键词、少标签、字数不足 / 超出、
+按 --forbidden-density 插入违禁词（--evasive-rate 的比例用规避写法）、两段顺序颠倒、缺一段、缺一个必提词。
+
+expected.jsonl 每行一篇：文件名、毛病列表、各检查项预期是否通过、实际插入的违禁词 / 例外用法数。
+预期结论由构造过程得出，不调用审核引擎。每篇的随机数只由 (seed, 序号) 决定，
+同一 seed 生成 10 篇和 10 万篇时前 10 篇相同；文件每 1000 篇一个子目录。
+"""
+import argparse
+import io
+import json
+import os
+import random
+import time
+import zipfile
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from docx import Document
+
+from bench.corpus import evade
+from core.hard_checks import run_all_checks
+from core.text_utils import DRAFT_EXTS, count_chinese, parse_input, read_draft
+
+MANIFEST = "expected.jsonl"
+SHARD = 1000
+
+DEFECTS = ["titles", "title_keywords", "tags", "short", "long", "forbidden", "order", "missing_section",
+           "selling_point"]
+# 不同时出现的毛病
+_EXCLUSIVE = [{"short", "long"}, {"order", "missing_section"}]
+
+# 中性素材：生成时再按配置筛掉含违禁词、锚点词、必提词的句子
+FILLER = [
+    "带娃这件事，真的是边做边学。",
+    "每天早上起来，先看看宝宝的精神状态。",
+    "冲奶粉的水温我一般控制在四十度左右。",
+    "喂完记得竖着抱一会儿，拍拍小背。",
+    "家里老人总说多穿点，其实也要看室温。",
+    "晚上夜醒的次数慢慢少了，当妈的终于能睡个整觉。",
+    "出门的妈咪包里我会多备一套换洗衣服。",
+    "宝宝的小手小脚肉乎乎的，抱起来特别踏实。",
+    "换季的时候要多留意宝宝的皮肤状态。",
+    "洗澡水温别太高，时间也别太长。",
+    "每次换奶都要循序渐进，不能着急。",
+    "我身边的宝妈也都在聊怎么选奶粉。",
+    "说实话，当妈之后才知道细节有多重要。",
+    "宝宝吃得香、睡得好，全家都开心。",
+    "大便的颜色和次数也能看出不少信息。",
+    "姐妹们有问题可以在评论区一起交流。",
+    "喂养这件事没有标准答案，适合自家娃的就好。",
+    "记得定期带宝宝去做体检。",
+    "辅食添加之前，奶还是主要的口粮。",
+    "冲调的时候先放水再放粉，顺序别弄反。",
+    "奶粉开罐后要密封保存，尽快吃完。",
+    "宝宝哭闹的时候，先排查是不是饿了或者困了。",
+    "抱娃久了手腕容易酸，宝妈也要照顾好自己。",
+    "我家娃现在一顿能喝一百五十毫升。",
+    "每个宝宝的节奏都不一样，不用跟别人比。",
+    "平时多陪宝宝说说话，他会用咿呀回应你。",
+    "天气好的时候带娃出去晒晒太阳。",
+    "家里的湿度保持在合适的范围，宝宝会舒服很多。",
+    "选奶粉的时候我会认真看配料表。",
+    "新手爸妈难免手忙脚乱，慢慢就熟练了。",
+    "宝宝的作息规律了，大人也轻松不少。",
+    "睡前那顿奶喝饱了，夜里能睡得更长。",
+    "口水巾多准备几条，随时换着用。",
+    "这些都是我自己带娃的真实感受。",
+    "有时候一点小变化，也值得记录下来。",
+    "喂奶的姿势找对了，宝宝吃得更顺。",
+    "刚开始的那几个月真的很辛苦。",
+    "看着娃一天天长大，心里特别满足。",
+    "宝宝的衣服我都会单独清洗。",
+    "空调房里记得给宝宝盖个小被子。",
+]
+OPENERS = ["", "先说重点：", "划重点，", "我特意查了一下，", "给大家总结一下：", "这里要提一句，"]
+CLOSERS = ["。", "，这点很关键。", "，记下来不吃亏。", "，值得多了解。"]
+# 插入违禁词 / 例外用法的句子，{} 为插入的词
+PLANT = ["{}这一点我也留意到了。", "有人问{}的事。", "提到{}，大家看法不太一样。", "评论区有姐妹聊到{}。"]
+TITLE_HEADS = ["宝妈必看：", "干货分享｜", "新手爸妈看过来 ", "", "真心话｜"]
+TITLE_TAILS = ["，一篇讲清楚", "，建议收藏", "！真心分享", "", "｜带娃笔记"]
+TITLE_PLAIN = ["带娃心得", "选奶粉那些事", "喂养日记", "宝妈的真实体验"]
+
+
+def _plain_hits(text: str, hr: dict) -> int:
+    """原文上未被例外用法覆盖的违禁词 / 特殊替换命中数（不做归一化，只用来筛素材）"""
+    n = 0
+    for fw in hr["forbidden_words"]:
+        excs = fw.get("exceptions", [])
+        start = text.find(fw["word"])
+        while start != -1:
+            covered = False
+            for exc in excs:
+                k = text.find(exc, max(0, start - len(exc)))
+                while k != -1 and k <= start:
+                    if k + len(exc) >= start + len(fw["word"]):
+                        covered = True
+                        break
+                    k = text.find(exc, k + 1)
+                if covered:
+                    break
+            n += not covered
+            start = text.find(fw["word"], start + 1)
+    for rule in hr.get("special_replacements", []):
+        start = text.find(rule["find"])
+        while start != -1:
+            end = start + len(rule["find"])
+            skip = rule.get("skip_if_followed_by", "")
+            n += not skip or text[end:end + len(skip)] != skip
+            start = text.find(rule["find"], start + 1)
+    return n
+
+
+def _reserved(hr: dict) -> list:
+    """素材里不能出现的词：锚点词、必提词、标题关键词"""
+    words = list(hr["titles"]["keywords"])
+    for spec in hr["structure"]["paragraphs"]:
+        words += spec["anchor_keywords"]
+        words += [kw for sp in spec["selling_points"] for kw in sp["required_keywords"]]
+    return words
+
+
+def vocabulary(hr: dict) -> dict:
+    """按配置筛过的素材；没有可用的中性句子时报错（配置的违禁词 / 锚点词覆盖了全部素材）"""
+    reserved = _reserved(hr)
+
+    def clean(s):
+        return _plain_hits(s, hr) == 0 and not any(w in s for w in reserved)
+
+    voc = {
+        "filler": [s for s in FILLER if clean(s)],
+        "openers": [s for s in OPENERS if clean(s)],
+        "closers": [s for s in CLOSERS if clean(s)],
+        "plant": [s for s in PLANT if clean(s.format(""))],
+        "title_heads": [s for s in TITLE_HEADS if clean(s)],
+        "title_tails": [s for s in TITLE_TAILS if clean(s)],
+        "title_plain": [s for s in TITLE_PLAIN if clean(s)],
+        "forbidden": [fw["word"] for fw in hr["forbidden_words"]],
+        # 插进句子后仍整体被例外覆盖、且不含锚点词 / 必提词的例外用法
+        "exceptions": [exc for fw in hr["forbidden_words"] for exc in fw.get("exceptions", [])
+                       if all(_plain_hits(t.format(exc), hr) == 0 for t in PLANT)
+                       and not any(w in exc for w in reserved)],
+    }
+    for key in ("filler", "openers", "closers", "plant", "title_plain"):
+        if not voc[key]:
+            raise ValueError(f"配置的违禁词 / 锚点词覆盖了全部「{key}」素材，无法生成")
+    return voc
+
+
+def _pick_defects(rnd, fail_rate: float) -> list:
+    if rnd.random() >= fail_rate:
+        return []
+    k = rnd.choice((1, 1, 2))
+    out = []
+    for d in rnd.sample(DEFECTS, len(DEFECTS)):
+        if not any(d in ex and x in ex for ex in _EXCLUSIVE for x in out):
+            out.append(d)
+        if len(out) == k:
+            break
+    return sorted(out, key=DEFECTS.index)
+
+
+def _titles(hr, voc, rnd, defects):
+    count = hr["titles"]["required_count"]
+    keywords = list(hr["titles"]["keywords"])
+    if "title_keywords" in defects and keywords:
+        keywords.remove(rnd.choice(keywords))
+    if "titles" in defects:
+        count = max(count - 1, 0)
+    slots = [[] for _ in range(count)]
+    for i, kw in enumerate(rnd.sample(keywords, len(keywords))):
+        if slots:
+            slots[i % count].append(kw)
+    titles = []
+    for kws in slots:
+        core = "、".join(kws) if kws else rnd.choice(voc["title_plain"])
+        titles.append(f"{rnd.choice(voc['title_heads'] or [''])}{core}{rnd.choice(voc['title_tails'] or [''])}")
+    return titles
+
+
+def _tags(hr, rnd, defects):
+    required = hr["hashtags"]["required"]
+    counts = {req["tag"]: req["min_count"] for req in required}
+    if "tags" in defects and required:
+        tag = rnd.choice(required)["tag"]
+        counts[tag] -= 1
+    tags = [tag for tag, n in counts.items() for _ in range(n)]
+    rnd.shuffle(tags)
+    return " ".join(tags)
+
+
+def _topic_sentences(spec, voc, rnd, drop: str = None) -> list:
+    """一段的锚点词 + 必提词，打乱后 2-3 个一句；drop 为要去掉的必提词（含它的词一并去掉）"""
+    pieces = [kw for sp in spec["selling_points"] for kw in sp["required_keywords"]]
+    pieces += [a for a in spec["anchor_keywords"] if not any(a in p for p in pieces)]
+    pieces = list(dict.fromkeys(p for p in pieces if not (drop and drop in p)))
+    rnd.shuffle(pieces)
+    out = []
+    while pieces:
+        k = rnd.choice((2, 3))
+        chunk, pieces = pieces[:k], pieces[k:]
+        out.append(rnd.choice(voc["openers"]) + "，".join(chunk) + rnd.choice(voc["closers"]))
+    return out
+
+
+def _insert(paras: list, sentence: str, rnd):
+    p = rnd.choice(paras)
+    p.insert(rnd.randint(min(1, len(p)), len(p)), sentence)
+
+
+def synth_draft(config: dict, seed: int, index: int, fail_rate: float = 0.5, forbidden_density: float = 3.0,
+                exception_density: float = 3.0, evasive_rate: float = 0.3, voc: dict = None) -> dict:
+    """第 index 篇合成稿件：{name, kol, titles, body, tags, defects, expected, plan}
+
+    expected 为 检查项 id -> 预期是否通过（与 run_all_checks 的 id 一致），plan 记实际插入的数量和字数。
+    """
+    hr = config["hard_rules"]
+    voc = voc or vocabulary(hr)
+    rnd = random.Random(f"{seed}:{index}")
+    defects = _pick_defects(rnd, fail_rate)
+    wc = hr["word_count"]
+    specs = hr["structure"]["paragraphs"]
+
+    titles = _titles(hr, voc, rnd, defects)
+    tags = _tags(hr, rnd, defects)
+
+    drop = None
+    if "selling_point" in defects:
+        required = [kw for spec in specs for sp in spec["selling_points"] for kw in sp["required_keywords"]]
+        drop = rnd.choice(required) if required else None
+    topics = list(range(len(specs)))
+    if "missing_section" in defects and len(topics) > 1:
+        topics.remove(rnd.choice(topics))
+    swapped = False
+    if "order" in defects and len(topics) > 1:
+        i = rnd.randrange(len(topics) - 1)
+        topics[i], topics[i + 1] = topics[i + 1], topics[i]
+        swapped = True
+    paras = [_topic_sentences(specs[t], voc, rnd, drop) for t in topics]
+
+    longest = max(count_chinese(s) for s in voc["filler"])
+    if "short" in defects:
+        target = rnd.randint(wc["min"] // 2, max(wc["min"] // 2, wc["min"] - longest - 20))
+    elif "long" in defects:
+        target = rnd.randint(wc["max"] + 1, wc["max"] + max(wc["max"] // 3, 1))
+    else:
+        target = rnd.randint(wc["min"], max(wc["min"], (wc["min"] + wc["max"]) // 2 - longest))
+
+    n_forbidden = n_evasive = 0
+    if "forbidden" in defects:
+        n_forbidden = max(1, round(forbidden_density * target / 1000))
+        for _ in range(n_forbidden):
+            word = rnd.choice(voc["forbidden"])
+            if len(word) > 1 and rnd.random() < evasive_rate:
+                word = evade(word, rnd)
+                n_evasive += 1
+            _insert(paras, rnd.choice(voc["plant"]).format(word), rnd)
+    n_exceptions = round(exception_density * target / 1000) if voc["exceptions"] else 0
+    for _ in range(n_exceptions):
+        _insert(paras, rnd.choice(voc["plant"]).format(rnd.choice(voc["exceptions"])), rnd)
+
+    chars = sum(count_chinese(s) for p in paras for s in p)
+    while chars < target:
+        s = rnd.choice(voc["filler"])
+        _insert(paras, s, rnd)
+        chars += count_chinese(s)
+    body = "\n\n".join("".join(p) for p in paras)
+
+    anchors_found = all(any(a in body for a in spec["anchor_keywords"]) for spec in specs)
+    all_titles = " ".join(titles)
+    expected = {
+        "word_count": wc["min"] <= chars <= wc["max"],
+        "title_count": len(titles) == hr["titles"]["required_count"],
+        "title_keywords": all(kw in all_titles for kw in hr["titles"]["keywords"]),
+        "hashtags": "tags" not in defects,
+        "forbidden_words": n_forbidden == 0,
+        "structure": anchors_found and not swapped,
+        "selling_points": all(kw in body for spec in specs for sp in spec["selling_points"]
+                              for kw in sp["required_keywords"]),
+    }
+    return {
+        "name": f"d{index:06d}",
+        "kol": f"合成达人{rnd.randint(1, 50):02d}",
+        "titles": titles,
+        "body": body,
+        "tags": tags,
+        "defects": defects,
+        "expected": expected,
+        "passed": all(expected.values()),
+        "plan": {"chars": chars, "forbidden": n_forbidden, "evasive": n_evasive, "exceptions": n_exceptions,
+                 "dropped_keyword": drop, "topics": topics},
+    }
+
+
+def generate(config: dict, n: int, seed: int = 0, start: int = 0, **knobs):
+    """逐篇产出 synth_draft 的结果（生成器，不把整批留在内存里）"""
+    voc = vocabulary(config["hard_rules"])
+    for i in range(start, start + n):
+        yield synth_draft(config, seed, i, voc=voc, **knobs)
+
+
+def layout(titles, body, tags, kol: str = "压测") -> str:
+    """parse_input 认得的稿件排版（与 .docx 模板一致）"""
+    return "\n".join([f"达人昵称：{kol}", "一、标题", *titles, "二、笔记内容", body, f"话题标签：{tags}"])
+
+
+_MARK = "@@正文@@"
+
+
+@lru_cache(maxsize=1)
+def _docx_template():
+    """python-docx 默认模板拆成 (除 document.xml 外已压缩好的 zip, 段落前的 XML, 段落后的 XML)"""
+    doc = Document()
+    doc.add_paragraph(_MARK)
+    buf = io.BytesIO()
+    doc.save(buf)
+    static = io.BytesIO()
+    with zipfile.ZipFile(buf) as src, zipfile.ZipFile(static, "w", compression=zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            if info.filename == "word/document.xml":
+                xml = src.read(info).decode("utf-8")
+            else:
+                dst.writestr(info, src.read(info))
+    i = xml.index(_MARK)
+    return static.getvalue(), xml[:xml.rindex("<w:p>", 0, i)], xml[xml.index("</w:p>", i) + len("</w:p>"):]
+
+
+def docx_bytes(raw: str) -> bytes:
+    """每行一个段落的 .docx（空行为空段落）
+
+    样式等模板条目（近 800 KB 的 XML）只压缩一次，每篇在其后追加自己的 document.xml，
+    比逐篇用 python-docx 保存快一个数量级，10 万篇也能在几分钟内写完。
+    """
+    static, head, tail = _docx_template()
+    paras = "".join(f'<w:p><w:r><w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>' if line else "<w:p/>"
+                    for line in raw.split("\n"))
+    buf = io.BytesIO(static)
+    with zipfile.ZipFile(buf, "a", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("word/document.xml", head + paras + tail)
+    return buf.getvalue()
+
+
+def _path(out_dir: str, index_name: str, ext: str) -> str:
+    shard = f"{int(index_name[1:]) // SHARD:03d}"
+    return os.path.join(out_dir, shard, index_name + ext)
+
+
+def write_drafts(drafts, out_dir: str, formats=("txt", "docx")) -> dict:
+    """把 drafts 写成 <out_dir>/<子目录>/<name>.txt / .docx，预期结论逐行追加到 expected.jsonl"""
+    t0 = time.perf_counter()
+    n = passed = files = 0
+    defects = {}
+    with open(os.path.join(out_dir, MANIFEST), "w", encoding="utf-8") as manifest:
+        for d in drafts:
+            raw = layout(d["titles"], d["body"], d["tags"], d["kol"])
+            for fmt in formats:
+                fp = _path(out_dir, d["name"], "." + fmt)
+                os.makedirs(os.path.dirname(fp), exist_ok=True)
+                with open(fp, "wb") as f:
+                    f.write(raw.encode("utf-8") if fmt == "txt" else docx_bytes(raw))
+                files += 1
+            manifest.write(json.dumps({k: d[k] for k in ("name", "defects", "expected", "passed", "plan")},
+                                      ensure_ascii=False) + "\n")
+            n += 1
+            passed += d["passed"]
+            for x in d["defects"]:
+                defects[x] = defects.get(x, 0) + 1
+    sec = time.perf_counter() - t0
+    return {"drafts": n, "files": files, "passed": passed, "defects": defects, "seconds": round(sec, 2),
+            "drafts_per_sec": round(n / sec, 1) if sec else None}
+
+
+def outcome(titles, body, tags, config) -> dict:
+    return {r["id"]: r["pass"] for r in run_all_checks(titles, body, tags, config)}
+
+
+def verify(out_dir: str, config: dict, docx_limit: int = 200) -> dict:
+    """读回 .txt（全部）和 .docx（前 docx_limit 篇）、拆分、审核，与 expected.jsonl 逐项对比"""
+    checked = docx_checked = 0
+    mismatches = []
+    with open(os.path.join(out_dir, MANIFEST), encoding="utf-8") as f:
+        for line in f:
+            rec = json.loads(line)
+            for ext in DRAFT_EXTS:
+                fp = _path(out_dir, rec["name"], ext)
+                if not os.path.exists(fp) or (ext == ".docx" and docx_checked >= docx_limit):
+                    continue
+                with open(fp, "rb") as df:
+                    got = outcome(*parse_input(read_draft(df.read(), ext)), config)
+                checked += ext == ".txt"
+                docx_checked += ext == ".docx"
+                diff = [k for k, v in rec["expected"].items() if got.get(k) != v]
+                if diff:
+                    mismatches.append({"name": rec["name"], "file": ext, "checks": diff, "defects": rec["defects"]})
+    return {"txt_checked": checked, "docx_checked": docx_checked, "mismatches": len(mismatches),
+            "examples": mismatches[:20]}
+
+
+def main():
+    from core.config_loader import load_config
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("out")
+    ap.add_argument("--config", default="nengen_direction1")
+    ap.add_argument("-n", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--format", default="txt,docx", help="txt、docx 或 txt,docx")
+    ap.add_argument("--fail-rate", type=float, default=0.5, help="不合格稿件的比例")
+    ap.add_argument("--forbidden-density", type=float, default=3.0, help="含违禁词的稿件每千字插入几处")
+    ap.add_argument("--exception-density", type=float, default=3.0, help="每千字插入几处例外用法")
+    ap.add_argument("--evasive-rate", type=float, default=0.3, help="插入的违禁词里用规避写法的比例")
+    ap.add_argument("--verify", action="store_true", help="写完后读回文件审核，与预期结论对比")
+    ap.add_argument("--verify-docx", type=int, default=200, help="校验时最多读回多少篇 .docx")
+    args = ap.parse_args()
+
+    formats = [f.strip().lower() for f in args.format.split(",") if f.strip()]
+    if not formats or any(f not in ("txt", "docx") for f in formats):
+        raise ValueError(f"不支持的格式: {args.format}")
+    config = load_config(args.config)
+    os.makedirs(args.out, exist_ok=True)
+    drafts = generate(config, args.n, args.seed, fail_rate=args.fail_rate, forbidden_density=args.forbidden_density,
+                      exception_density=args.exception_density, evasive_rate=args.evasive_rate)
+    report = write_drafts(drafts, args.out, formats)
+    if args.verify:
+        t0 = time.perf_counter()
+        report["verify"] = verify(args.out, config, args.verify_docx)
+        report["verify"]["seconds"] = round(time.perf_counter() - t0, 2)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.verify and report["verify"]["mismatches"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""热点路径基准套件：各热点函数在代表性语料上的 ops/sec 和峰值内存，保存基线、超过阈值即失败
+
+    python -m bench.suite                                          # 跑全部，打印结果
+    python -m bench.suite --save bench/baseline.json               # 保存为基线
+    python -m bench.suite --compare bench/baseline.json            # 与基线对比，变慢超过阈值时退出码 1
+    python -m bench.suite --compare bench/baseline.json --threshold 0.3 --mem-threshold 0.5 -k forbidden
+
+热点：check_forbidden_words、auto_fix_all、diff_highlight（原稿 vs 一键修复稿）、parse_input、
+read_docx、generate_diff_docx，以及整篇 run_all_checks。
+语料（由配置拼出，不用真实稿件）：short 短笔记、note900 标准 900 字笔记、long 长文（约 1.2 万字）、
+many_hits 违禁词密集（原词、例外用法和规避写法每隔几个字一处）。
+
+计时方法同 timeit：关掉 GC，每次调用前清空归一化 / 标签 / 结构分析缓存（测冷路径），
+自动定圈数使一轮不少于 --min-time 秒，取 --repeat 轮中最快的一轮。
+峰值内存用 tracemalloc 单独跑一次测量（只计 Python 分配）。
+基线与机器相关，换机器后重新 --save。共享机器上同一项前后两次相差五成很常见，
+所以耗时默认慢一倍才算回退（目标是拦住成倍的变慢）；峰值内存基本不抖。
+"""
+import argparse
+import datetime
+import gc
+import io
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from bench.corpus import evasive_draft, sample_draft
+from bench.generate import docx_bytes, layout
+from core.auto_fix import auto_fix_all, diff_highlight
+from core.config_loader import load_config
+from core.doc_export import generate_diff_docx
+from core.hard_checks import check_forbidden_words, run_all_checks
+from core.normalize import normalize, normalize_word
+from core.structure import _analyze
+from core.tags import tag_index
+from core.text_utils import count_chinese, parse_input, read_docx
+
+SCHEMA = 1
+
+
+def _clear_caches():
+    normalize.cache_clear()
+    normalize_word.cache_clear()
+    _analyze.cache_clear()
+    tag_index.cache_clear()
+
+
+def _note900(config):
+    wc = config["hard_rules"]["word_count"]
+    titles, body, tags = sample_draft(config, repeat=3)
+    paras = []
+    for p in body.split("\n\n"):
+        if count_chinese("\n\n".join(paras)) >= wc["min"]:
+            break
+        paras.append(p)
+    while count_chinese("\n\n".join(paras)) > wc["max"]:
+        paras[-1] = paras[-1][:-10]
+    return titles, "\n\n".join(paras), tags
+
+
+def _long(config, chars=12000, seed=0):
+    """约 chars 字的长文：示例正文的短句打乱重组成段（避免整段重复让 diff 退化到最坏情况）"""
+    rnd = random.Random(seed)
+    titles, body, tags = sample_draft(config)
+    clauses = [c for p in body.split("\n\n") for c in p.rstrip("。").split("，") if c]
+    paras, total = [], 0
+    while total < chars:
+        p = "，".join(rnd.sample(clauses, min(8, len(clauses)))) + "。"
+        paras.append(p)
+        total += len(p) + 2
+    return titles, "\n\n".join(paras), tags
+
+
+def _many_hits(config, seed=0, every=8):
+    """900 字笔记里每隔约 every 个字插一处违禁词 / 例外用法 / 规避写法"""
+    rnd = random.Random(seed)
+    titles, body, tags = _note900(config)
+    fws = config["hard_rules"]["forbidden_words"]
+    plain = [fw["word"] for fw in fws] + [exc for fw in fws for exc in fw.get("exceptions", [])]
+    evasive = evasive_draft(config, seed=seed, n=len(body) // every // 3)[1]
+    out = []
+    for i in range(0, len(body), every):
+        out.append(body[i:i + every])
+        out.append(rnd.choice(plain))
+    return titles, "".join(out) + "\n\n" + evasive[:len(body) // 2], tags
+
+
+def corpora(config) -> dict:
+    titles, body, tags = sample_draft(config)
+    drafts = {
+        "short": (titles, body.split("\n\n")[0], tags),
+        "note900": _note900(config),
+        "long": _long(config),
+        "many_hits": _many_hits(config),
+    }
+    out = {}
+    for name, (t, b, tg) in drafts.items():
+        raw = layout(t, b, tg)
+        ft, fb, ftg, _ = auto_fix_all(t, b, tg, config)
+        out[name] = {"titles": t, "body": b, "tags": tg, "full": "\n".join(t) + "\n" + b + "\n" + tg,
+                     "raw": raw, "docx": docx_bytes(raw), "fixed_titles": ft, "fixed_body": fb, "fixed_tags": ftg,
+                     "chars": len(b)}
+    return out
+
+
+# 每个热点：(语料, 配置) -> 无参调用
+CASES = {
+    "check_forbidden_words": lambda d, c: lambda: check_forbidden_words(d["full"], c["hard_rules"]),
+    "auto_fix_all": lambda d, c: lambda: auto_fix_all(d["titles"], d["body"], d["tags"], c),
+    "diff_highlight": lambda d, c: lambda: diff_highlight(d["body"], d["fixed_body"]),
+    "parse_input": lambda d, c: lambda: parse_input(d["raw"]),
+    "read_docx": lambda d, c: lambda: read_docx(io.BytesIO(d["docx"])),
+    "generate_diff_docx": lambda d, c: lambda: generate_diff_docx(d["fixed_titles"], d["body"], d["fixed_body"],
+                                                                  d["fixed_tags"]),
+    "run_all_checks": lambda d, c: lambda: run_all_checks(d["titles"], d["body"], d["tags"], c),
+}
+
+
+def _time(fn, min_time: float, repeat: int) -> float:
+    """每次调用的最短耗时（秒）"""
+    def one_round(loops):
+        total = 0.0
+        for _ in range(loops):
+            _clear_caches()
+            t0 = time.perf_counter()
+            fn()
+            total += time.perf_counter() - t0
+        return total
+
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        loops = 1
+        while True:
+            t = one_round(loops)
+            if t >= min_time or loops >= 1 << 20:
+                break
+            loops = max(loops * 2, int(loops * min_time / max(t, 1e-9)) + 1)
+        best = t / loops
+        for _ in range(repeat - 1):
+            best = min(best, one_round(loops) / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best
+
+
+def _peak_kb(fn) -> float:
+    _clear_caches()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run(config, select=None, min_time=0.2, repeat=3, log=None) -> dict:
+    data = corpora(config)
+    results = {}
+    for case, make in CASES.items():
+        for corpus, d in data.items():
+            key = f"{case}/{corpus}"
+            if select and not any(s in key for s in select):
+                continue
+            fn = make(d, config)
+            sec = _time(fn, min_time, repeat)
+            results[key] = {"ops_per_sec": round(1 / sec, 2), "us_per_op": round(sec * 1e6, 1),
+                            "peak_kb": round(_peak_kb(fn), 1)}
+            if log:
+                log(key, results[key])
+    return {
+        "schema": SCHEMA,
+        "meta": {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()}",
+            "config": config.get("_name", ""),
+            "corpora": {name: d["chars"] for name, d in data.items()},
+            "min_time": min_time,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = 1.0, mem_threshold: float = 1.0) -> list[dict]:
+    """与基线逐项对比，返回超过阈值的回退：耗时超过基线 (1 + threshold) 倍，或峰值内存超过 (1 + mem_threshold) 倍"""
+    if baseline.get("schema") != SCHEMA:
+        raise ValueError(f"基线格式版本不符: {baseline.get('schema')}")
+    out = []
+    for key, cur in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        slower = cur["us_per_op"] / base["us_per_op"]
+        bigger = cur["peak_kb"] / base["peak_kb"] if base["peak_kb"] else 1.0
+        if slower > 1 + threshold:
+            out.append({"case": key, "metric": "time", "ratio": round(slower, 2),
+                        "baseline": base["us_per_op"], "current": cur["us_per_op"]})
+        if bigger > 1 + mem_threshold:
+            out.append({"case": key, "metric": "memory", "ratio": round(bigger, 2),
+                        "baseline": base["peak_kb"], "current": cur["peak_kb"]})
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--config", default="nengen_direction1")
+    ap.add_argument("-k", action="append", help="只跑名字含该子串的项（可多次）")
+    ap.add_argument("--min-time", type=float, default=0.2, help="每轮最少耗时（秒）")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--save", help="把结果保存为基线 JSON")
+    ap.add_argument("--compare", help="与基线 JSON 对比")
+    ap.add_argument("--threshold", type=float, default=1.0, help="耗时允许超过基线的比例（1.0 即慢一倍）")
+    ap.add_argument("--mem-threshold", type=float, default=1.0, help="峰值内存允许超过基线的比例")
+    ap.add_argument("--json", action="store_true", help="输出完整 JSON 而不是表格")
+    args = ap.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    def log(key, r):
+        if args.json:
+            return
+        line = f"{key:<42}{r['ops_per_sec']:>12.1f} ops/s{r['us_per_op']:>12.1f} µs{r['peak_kb']:>10.1f} KB"
+        base = baseline and baseline["results"].get(key)
+        if base:
+            line += f"   ×{r['us_per_op'] / base['us_per_op']:.2f}"
+        print(line, flush=True)
+
+    report = run(load_config(args.config), args.k, args.min_time, args.repeat, log)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if baseline is not None:
+        regressions = compare(report, baseline, args.threshold, args.mem_threshold)
+        for r in regressions:
+            print(f"回退 {r['case']} {r['metric']}: {r['baseline']} -> {r['current']}（×{r['ratio']}）", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"与基线相比没有超过阈值的回退（耗时 +{args.threshold:.0%}，内存 +{args.mem_threshold:.0%}）", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""AI 人话改写流水线：改写 → auto_fix 清理 → 复检（Tab 3 与压测共用）"""
+from core.auto_fix import auto_fix_all
+from core.hard_checks import run_all_checks
+from core.llm_client import rewrite_full_body
+
+
+def run_ai_rewrite(titles, body, tags, config, backend=None):
+    """改写正文并清理违禁词、重新审核
+
+    Returns: (ai_body, ai_results, error)，失败时前两项为 None
+    """
+    result, error = rewrite_full_body(body, config, backend=backend)
+    if not result:
+        return None, None, error
+    _, result, _, _ = auto_fix_all(list(titles), result, tags, config)
+    return result, run_all_checks(list(titles), result, tags, config), None
@@ -1,142 +1,44 @@
 """自动修复引擎 - 一键修复所有可自动修复的问题"""
-import re
 import difflib
-from core.text_utils import count_chinese
+from core.rewrite import get_rewrite_tables
+from core.tags import complete_tags, fix_problem_tags
 
 
 def auto_fix_all(titles, body, tags, config):
-    """自动修复所有违禁词和特殊替换，返回修复后的内容和变更记录"""
+    """自动修复所有违禁词和特殊替换，返回修复后的内容和变更记录
+
+    替换按加载配置时编译好的单遍改写表（rewrite.py）执行，一次调用即到不动点：
+    对输出再调用一次不会产生新的变更。
+    """
     hr = config["hard_rules"]
+    tables = get_rewrite_tables(config)
     changes = []
 
-    new_titles = list(titles)
-    new_body = body
-    new_tags = tags
-
-    # 1. 修复违禁词
-    for fw in hr["forbidden_words"]:
-        word = fw["word"]
-        replacement = fw.get("replacement", "")
-        exceptions = fw.get("exceptions", [])
-
-        if not replacement:
-            continue  # 没有替换建议的跳过自动修复
-
-        # 在正文中替换
-        for text_type, text in [("正文", new_body), ("标签", new_tags)]:
-            count = 0
-            result = ""
-            i = 0
-            while i < len(text):
-                idx = text.find(word, i)
-                if idx == -1:
-                    result += text[i:]
-                    break
-                # 检查例外
-                is_exc = False
-                for exc in exceptions:
-                    exc_idx = text.find(exc, max(0, idx - len(exc)))
-                    if exc_idx != -1 and idx >= exc_idx and idx < exc_idx + len(exc):
-                        is_exc = True
-                        break
-                if is_exc:
-                    result += text[i:idx + len(word)]
-                    i = idx + len(word)
-                else:
-                    result += text[i:idx] + replacement
-                    count += 1
-                    i = idx + len(word)
-
-            if count > 0:
-                if text_type == "正文":
-                    new_body = result
-                else:
-                    new_tags = result
-                changes.append({
-                    "type": "违禁词",
-                    "old": word,
-                    "new": replacement,
-                    "count": count,
-                    "scope": text_type,
-                })
-
-        # 在标题中替换
-        for ti in range(len(new_titles)):
-            t = new_titles[ti]
-            if word in t:
-                is_exc = any(exc in t and t.find(word) >= t.find(exc) and t.find(word) < t.find(exc) + len(exc) for exc in exceptions if exc in t)
-                if not is_exc:
-                    new_titles[ti] = t.replace(word, replacement)
-                    changes.append({
-                        "type": "违禁词",
-                        "old": word,
-                        "new": replacement,
-                        "count": t.count(word),
-                        "scope": f"标题{ti+1}",
-                    })
-
-    # 2. 特殊替换（通用逻辑）
-    for rule in hr.get("special_replacements", []):
-        find = rule["find"]
-        replace = rule["replace_with"][-1]  # 用最后一个选项
-        skip_suffix = rule.get("skip_if_followed_by", "")
-
-        for text_type, text in [("正文", new_body)]:
-            count = 0
-            result = ""
-            i = 0
-            while i < len(text):
-                idx = text.find(find, i)
-                if idx == -1:
-                    result += text[i:]
-                    break
-                # 跳过条件：后面紧跟指定字符（如"粉"）
-                skip = False
-                if skip_suffix:
-                    next_pos = idx + len(find)
-                    if next_pos < len(text) and text[next_pos:next_pos + len(skip_suffix)] == skip_suffix:
-                        skip = True
-                # 跳过条件：已经是完整替换词的一部分
-                if not skip and replace in text[max(0, idx - len(replace)):idx + len(find) + len(replace)]:
-                    skip = True
-
-                if skip:
-                    result += text[i:idx + len(find)]
-                    i = idx + len(find)
-                else:
-                    result += text[i:idx] + replace
-                    count += 1
-                    i = idx + len(find)
-
-            if count > 0:
-                new_body = result
-                changes.append({
-                    "type": "特殊替换",
-                    "old": find,
-                    "new": replace,
-                    "count": count,
-                    "scope": text_type,
-                })
-
-    # 3. 修复标签中的违禁标签
-    problem_tags = {"#新生儿奶粉": None, "#防敏感奶粉": "#防敏奶粉"}
-    for bad_tag, good_tag in problem_tags.items():
-        if bad_tag in new_tags:
-            if good_tag:
-                new_tags = new_tags.replace(bad_tag, good_tag)
-                changes.append({"type": "标签修复", "old": bad_tag, "new": good_tag, "count": 1, "scope": "标签"})
-            else:
-                new_tags = new_tags.replace(bad_tag, "")
-                changes.append({"type": "标签删除", "old": bad_tag, "new": "(删除)", "count": 1, "scope": "标签"})
-
-    # 4. 补齐缺失标签
-    required_tags = hr["hashtags"]["required"]
-    for req in required_tags:
-        tag = req["tag"]
-        if tag not in new_tags:
-            sep = " " if new_tags and not new_tags.endswith(" ") else ""
-            new_tags = new_tags.rstrip() + sep + tag
-            changes.append({"type": "标签补齐", "old": "(缺失)", "new": tag, "count": 1, "scope": "标签"})
+    def record(table, counts, scope):
+        for idx in sorted(counts):
+            rule = table.rules[idx]
+            changes.append({**rule, "count": counts[idx], "scope": scope})
+
+    # 1. 正文：违禁词 + 特殊替换
+    new_body, counts = tables["body"].apply(body)
+    record(tables["body"], counts, "正文")
+
+    # 2. 标签：先整词修复 / 删除问题标签（避免「#防敏感奶粉」先被「敏感」改坏），再替换违禁词
+    new_tags, tag_changes = fix_problem_tags(tags, hr)
+    changes += tag_changes
+    new_tags, counts = tables["tags"].apply(new_tags)
+    record(tables["tags"], counts, "标签")
+
+    # 3. 标题：违禁词
+    new_titles = []
+    for ti, t in enumerate(titles):
+        fixed, counts = tables["titles"].apply(t)
+        new_titles.append(fixed)
+        record(tables["titles"], counts, f"标题{ti+1}")
+
+    # 4. 补齐次数不足的必带标签
+    new_tags, tag_changes = complete_tags(new_tags, hr)
+    changes += tag_changes
 
     return new_titles, new_body, new_tags, changes
 
@@ -0,0 +1,211 @@
+"""批量统计 - 投放复盘报表：上千篇稿件的字数、标题长度、标签数、必提词命中率
+
+    stats = batch_stats(drafts, config)        # drafts: [(titles, body, tags)]
+    stats.columns["cjk"]                       # 每篇的中文字数（按列存放）
+    stats.hits                                 # (篇数, 必提词数) 的命中矩阵；stats.bitmap() 为按位压缩
+    stats.histogram("cjk", bins=10)            # (计数, 分箱边界)
+    stats.summary()                            # 汇总：分位数、字数达标率、各必提词命中率、直方图
+    stats.rows()                               # 逐篇一行的 dict，写 CSV 用
+
+装了 numpy 时：全部正文（以及标题、标签）各拼成一个 UTF-32 码点数组，篇与篇之间用 0 隔开，
+中文字数用前缀和按篇作差；整批正文只归一化一次，必提词用逐位比较的布尔数组一次找出全部出现位置
+再按篇号归并，不再对每篇稿件各跑一遍正则。没有 numpy 时按篇逐个计算，结果相同。
+必提词在归一化文本上匹配（与 check_selling_points 一致），字数按原文统计（与 check_word_count 一致）。
+"""
+from core.normalize import normalize, normalize_word
+from core.text_utils import count_chinese
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+CJK_FIRST, CJK_LAST = 0x4E00, 0x9FFF
+_SPACES = " \t\n\r　"
+_SPACE_CODES = [ord(c) for c in _SPACES]
+
+
+def _keywords(hr: dict) -> list:
+    out = []
+    for p in hr["structure"]["paragraphs"]:
+        for sp in p["selling_points"]:
+            for kw in sp["required_keywords"]:
+                if kw not in out:
+                    out.append(kw)
+    return out
+
+
+def _tag_count(tags: str) -> int:
+    """「#」后面紧跟非空白字符才算一个标签"""
+    return sum(1 for i, c in enumerate(tags) if c in "#＃" and i + 1 < len(tags) and tags[i + 1] not in _SPACES)
+
+
+class BatchStats:
+    """列式统计结果：columns 为 列名 -> 每篇一个值；hits[i][k] 为第 i 篇是否含第 k 个必提词"""
+
+    def __init__(self, columns: dict, keywords: list, hits, word_range: tuple):
+        self.columns = columns
+        self.keywords = keywords
+        self.hits = hits
+        self.word_range = word_range
+
+    def __len__(self):
+        return len(self.columns["cjk"])
+
+    def bitmap(self):
+        """必提词命中按位压缩，每篇 ceil(必提词数 / 8) 字节"""
+        if HAS_NUMPY:
+            return np.packbits(self.hits, axis=1)
+        return [bytes(sum(1 << (7 - j) for j, h in enumerate(row[b:b + 8]) if h)
+                      for b in range(0, len(row), 8)) for row in self.hits]
+
+    def histogram(self, column: str, bins=10):
+        values = self.columns[column]
+        if HAS_NUMPY:
+            return np.histogram(values, bins=bins)
+        lo, hi = (min(values), max(values)) if values else (0, 1)
+        if not isinstance(bins, int):
+            edges = list(bins)
+        else:
+            width = (hi - lo) / bins or 1
+            edges = [lo + width * i for i in range(bins + 1)]
+        counts = [0] * (len(edges) - 1)
+        for v in values:
+            for i in range(len(counts)):
+                if edges[i] <= v < edges[i + 1] or (i == len(counts) - 1 and v == edges[-1]):
+                    counts[i] += 1
+                    break
+        return counts, edges
+
+    def summary(self) -> dict:
+        n = len(self)
+        lo, hi = self.word_range
+        cjk = self.columns["cjk"]
+        if HAS_NUMPY:
+            quant = lambda col: [int(q) for q in np.percentile(self.columns[col], [0, 50, 90, 100])] if n else []
+            in_range = int(((cjk >= lo) & (cjk <= hi)).sum())
+            rates = self.hits.mean(axis=0).round(4).tolist() if n else [0.0] * len(self.keywords)
+            all_hit = int(self.hits.all(axis=1).sum())
+        else:
+            def quant(col):
+                values = sorted(self.columns[col])
+                return [values[min(int(q * (n - 1) + 0.5), n - 1)] for q in (0, 0.5, 0.9, 1)] if n else []
+            in_range = sum(1 for v in cjk if lo <= v <= hi)
+            rates = [round(sum(row[k] for row in self.hits) / n, 4) if n else 0.0 for k in range(len(self.keywords))]
+            all_hit = sum(1 for row in self.hits if all(row))
+        counts, edges = self.histogram("cjk", bins=[0, lo, hi + 1, max(hi + 2, int(max(cjk, default=0)) + 1)])
+        return {
+            "drafts": n,
+            "cjk_min_p50_p90_max": quant("cjk"),
+            "title_len_min_p50_p90_max": quant("title_len_max"),
+            "tags_min_p50_p90_max": quant("tags"),
+            "word_count_in_range": in_range,
+            "word_count_histogram": {"below": int(counts[0]), "in_range": int(counts[1]), "above": int(counts[2])},
+            "all_keywords_hit": all_hit,
+            "keyword_hit_rate": dict(zip(self.keywords, rates)),
+        }
+
+    def rows(self) -> list:
+        names = list(self.columns)
+        cols = [self.columns[c].tolist() if HAS_NUMPY else self.columns[c] for c in names]
+        hit_counts = self.hits.sum(axis=1).tolist() if HAS_NUMPY else [sum(row) for row in self.hits]
+        return [{**dict(zip(names, values)), "keywords_hit": k} for values, k in zip(zip(*cols), hit_counts)]
+
+
+def _encode(texts: list):
+    """拼成一个 UTF-32 码点数组，篇间插入 0；返回 (码点数组, 每篇起点, 每篇终点)"""
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+    starts = np.zeros(len(texts), dtype=np.int64)
+    if len(texts) > 1:
+        starts[1:] = np.cumsum(lengths + 1)[:-1]
+    codes = np.frombuffer("\0".join(texts).encode("utf-32-le"), dtype=np.uint32)
+    return codes, starts, starts + lengths
+
+
+def _segment_sum(mask, starts, ends):
+    """mask 在每个 [start, end) 区间内的 True 个数"""
+    cs = np.zeros(len(mask) + 1, dtype=np.int64)
+    np.cumsum(mask, out=cs[1:])
+    return cs[ends] - cs[starts]
+
+
+def _find_all(codes, word: str):
+    """码点数组中 word 的全部出现起点（逐位比较，向量化）"""
+    w = np.frombuffer(word.encode("utf-32-le"), dtype=np.uint32)
+    span = len(codes) - len(w) + 1
+    if span <= 0:
+        return np.empty(0, dtype=np.int64)
+    # 首字只扫一遍全数组，后续各位只在剩下的候选上比较
+    cand = np.flatnonzero(codes[:span] == w[0])
+    for j in range(1, len(w)):
+        if not len(cand):
+            break
+        cand = cand[codes[cand + j] == w[j]]
+    return cand
+
+
+def _stats_numpy(drafts, keywords):
+    n = len(drafts)
+    bodies = [b for _, b, _ in drafts]
+    codes, starts, ends = _encode(bodies)
+    cjk = _segment_sum((codes >= CJK_FIRST) & (codes <= CJK_LAST), starts, ends)
+
+    titles = [t for ts, _, _ in drafts for t in ts]
+    title_count = np.fromiter((len(ts) for ts, _, _ in drafts), dtype=np.int64, count=n)
+    title_len = np.fromiter((len(t) for t in titles), dtype=np.int64, count=len(titles))
+    title_len_max = np.zeros(n, dtype=np.int64)
+    if len(titles):
+        owner = np.repeat(np.arange(n), title_count)
+        np.maximum.at(title_len_max, owner, title_len)
+
+    tag_codes, tag_starts, tag_ends = _encode([tg for _, _, tg in drafts])
+    is_hash = (tag_codes == ord("#")) | (tag_codes == ord("＃"))
+    next_ok = np.ones(len(tag_codes), dtype=bool)
+    next_ok[:-1] = ~np.isin(tag_codes[1:], _SPACE_CODES + [0])
+    next_ok[-1:] = False
+    tags = _segment_sum(is_hash & next_ok, tag_starts, tag_ends)
+
+    # 整批只归一化一次：篇间用「换行 + \0」隔开，换行挡住标签空白的回看，\0 归一化后原样保留，用来找篇界
+    norm_text = normalize.__wrapped__("\n\0".join(bodies)).text
+    norm_codes = np.frombuffer(norm_text.encode("utf-32-le"), dtype=np.uint32)
+    norm_starts = np.concatenate([[0], np.flatnonzero(norm_codes == 0) + 1])
+    hits = np.zeros((n, len(keywords)), dtype=bool)
+    for k, kw in enumerate(keywords):
+        pos = _find_all(norm_codes, normalize_word(kw))
+        if len(pos):
+            # 关键词不含 0，不会跨篇命中
+            hits[np.searchsorted(norm_starts, pos, side="right") - 1, k] = True
+
+    columns = {
+        "cjk": cjk,
+        "chars": ends - starts,
+        "title_count": title_count,
+        "title_len_max": title_len_max,
+        "tags": tags,
+    }
+    return columns, hits
+
+
+def _stats_python(drafts, keywords):
+    norm_keywords = [normalize_word(kw) for kw in keywords]
+    columns = {"cjk": [], "chars": [], "title_count": [], "title_len_max": [], "tags": []}
+    hits = []
+    for titles, body, tags in drafts:
+        columns["cjk"].append(count_chinese(body))
+        columns["chars"].append(len(body))
+        columns["title_count"].append(len(titles))
+        columns["title_len_max"].append(max(map(len, titles), default=0))
+        columns["tags"].append(_tag_count(tags))
+        text = normalize.__wrapped__(body).text
+        hits.append([kw in text for kw in norm_keywords])
+    return columns, hits
+
+
+def batch_stats(drafts: list, config: dict) -> BatchStats:
+    """drafts 为 [(titles, body, tags)]；config 为完整配置或 hard_rules"""
+    hr = config.get("hard_rules", config)
+    keywords = _keywords(hr)
+    drafts = list(drafts)
+    columns, hits = (_stats_numpy if HAS_NUMPY else _stats_python)(drafts, keywords)
+    return BatchStats(columns, keywords, hits, (hr["word_count"]["min"], hr["word_count"]["max"]))
@@ -0,0 +1,110 @@
+"""批量上传 - 一次交付几十篇稿件：并行读取 .docx、拆分、初审，结果列成队列逐篇打开
+
+    items = audit_files([(文件名, 字节), ...], config)   # 与输入同序，每篇一个 dict（见 _process）
+    items = reaudit(items, config)                       # 换方向后只重跑审核，不再读文件
+    sort_queue(items, "failed")                          # 未通过项多的在前
+
+读取（python-docx 解析）和初审都是纯 Python 计算，放进进程池才能并行；进程池在第一次批量上传时创建，
+之后复用，不再为每批付启动开销。进程数：环境变量或 .env 的 UPLOAD_WORKERS，默认 min(8, CPU 核数)；
+只有 1 核、篇数不足 PARALLEL_MIN 或进程池不可用时在当前线程逐篇处理，结果相同。
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from core.hard_checks import run_all_checks
+from core.history import draft_hash
+from core.llm_backends import load_env
+from core.text_utils import count_chinese, parse_input, parse_kol, read_draft
+
+PARALLEL_MIN = 4
+
+SORT_KEYS = {
+    "failed": ("未通过项多的在前", lambda it: (it["error"] is None, -len(it["failed"]), it["name"])),
+    "name": ("文件名", lambda it: it["name"]),
+    "kol": ("达人", lambda it: (it["kol"] or "￿", it["name"])),
+    "words": ("字数", lambda it: (it["words"], it["name"])),
+}
+
+
+def _workers() -> int:
+    try:
+        n = int(load_env("UPLOAD_WORKERS", "0"))
+    except ValueError:
+        n = 0
+    return n if n > 0 else min(8, os.cpu_count() or 1)
+
+
+def _audit(item: dict, config: dict) -> dict:
+    results = run_all_checks(item["titles"], item["body"], item["tags"], config)
+    failed = [r["id"] for r in results if not r["pass"]]
+    return {**item, "results": results, "passed": not failed, "failed": failed}
+
+
+def _process(name: str, data: bytes, config: dict) -> dict:
+    """读取 + 拆分 + 初审一篇；读不出来的记 error，不影响同批其他稿件"""
+    item = {"name": name, "titles": [], "body": "", "tags": "", "kol": "", "hash": None, "words": 0,
+            "results": [], "passed": False, "failed": [], "error": None}
+    try:
+        raw = read_draft(data, os.path.splitext(name)[1])
+    except Exception as e:
+        return {**item, "error": f"读取失败: {type(e).__name__}: {e}"}
+    titles, body, tags = parse_input(raw)
+    if not (titles or body):
+        return {**item, "error": "没有识别出标题和正文"}
+    item.update(titles=titles, body=body, tags=tags, kol=parse_kol(raw), hash=draft_hash(titles, body, tags),
+                words=count_chinese(body))
+    return _audit(item, config)
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(max_workers=workers)
+        return _POOL
+
+
+def _reset_pool():
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+            _POOL = None
+
+
+def _map(fn, args: list, config: dict, workers: int = None) -> list:
+    workers = workers or _workers()
+    if workers <= 1 or len(args) < PARALLEL_MIN:
+        return [fn(*a, config) for a in args]
+    chunksize = max(1, len(args) // (workers * 4))
+    try:
+        return list(_pool(workers).map(fn, *zip(*args), [config] * len(args), chunksize=chunksize))
+    except (BrokenProcessPool, OSError):
+        # 子进程被杀 / 系统不允许再开进程：重建留给下一批，这一批在当前线程做完
+        _reset_pool()
+        return [fn(*a, config) for a in args]
+
+
+def audit_files(files, config: dict, workers: int = None) -> list[dict]:
+    """files 为 [(文件名, 字节)]，返回与输入同序的审核结果"""
+    return _map(_process, [(name, data) for name, data in files], config, workers)
+
+
+def reaudit(items: list, config: dict, workers: int = None) -> list[dict]:
+    """按新配置重跑初审（读取失败的原样保留）"""
+    todo = [i for i, it in enumerate(items) if it["error"] is None]
+    done = _map(_audit, [(items[i],) for i in todo], config, workers)
+    out = list(items)
+    for i, it in zip(todo, done):
+        out[i] = it
+    return out
+
+
+def sort_queue(items: list, key: str = "failed") -> list[dict]:
+    return sorted(items, key=SORT_KEYS[key][1])
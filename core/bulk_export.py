@@ -0,0 +1,168 @@
+"""批量导出 - 一批稿件的标注版 / 修复版 .docx 和审核汇总 CSV 打成一个 zip，发给机构
+
+    export_zip(items, config, "导出.zip")             # items 为 batch_upload.audit_files 的结果
+    data = export_zip_bytes(items, config)            # 页面下载用
+
+    python -m core.bulk_export 导出.zip 稿件目录/ [更多文件或目录] --config nengen_direction1 [--workers 8]
+
+每篇稿件：一键修复后生成「<原名>_标注版.docx」（原稿与修复稿的红绿黄对比）和「<原名>_修复版.docx」；
+zip 根目录的「审核汇总.csv」逐篇列出各检查项初审 / 修复后的结果（UTF-8 带 BOM，Excel 直接打开不乱码）。
+
+每篇的修复和两份文档在进程池里生成（与批量上传共用进程池），同时在途的稿件不超过进程数的两倍，
+按输入顺序逐篇写进 zip、写完即丢，内存占用与批次大小无关。.docx 本身是压缩包，在 zip 里只存储不再压缩。
+"""
+import argparse
+import collections
+import csv
+import io
+import json
+import os
+import time
+import zipfile
+from concurrent.futures.process import BrokenProcessPool
+
+from core.auto_fix import auto_fix_all
+from core.batch_upload import _pool, _reset_pool, _workers, audit_files
+from core.doc_export import generate_clean_docx, generate_diff_docx
+from core.hard_checks import run_all_checks
+from core.text_utils import DRAFT_EXTS
+
+SUMMARY_NAME = "审核汇总.csv"
+
+# 汇总表的检查项列，与 run_all_checks 的顺序一致
+CHECK_COLUMNS = [
+    ("word_count", "字数"), ("title_count", "标题数量"), ("title_keywords", "标题关键词"), ("hashtags", "话题标签"),
+    ("forbidden_words", "违禁词"), ("structure", "结构"), ("selling_points", "卖点必提词"),
+]
+
+
+def _render(item: dict, config: dict) -> dict:
+    """一篇稿件：一键修复 + 复检 + 两份 .docx 的字节"""
+    if item["error"] is not None:
+        return {"item": item, "fixed_results": [], "changes": 0, "files": []}
+    ft, fb, ftg, changes = auto_fix_all(item["titles"], item["body"], item["tags"], config)
+    fixed_results = run_all_checks(ft, fb, ftg, config)
+    diff = generate_diff_docx(ft, item["body"], fb, ftg, "一键修复 · 标注对比").getvalue()
+    clean = generate_clean_docx(ft, fb, ftg).getvalue()
+    return {"item": item, "fixed_results": fixed_results, "changes": len(changes),
+            "files": [("标注版", diff), ("修复版", clean)]}
+
+
+def _iter_rendered(items: list, config: dict, workers: int):
+    """按输入顺序产出 _render 的结果；并行时在途任务不超过 workers * 2"""
+    if workers <= 1 or len(items) < 2:
+        for it in items:
+            yield _render(it, config)
+        return
+    pool = _pool(workers)
+    pending = iter(items)
+    window = collections.deque(pool.submit(_render, it, config) for _, it in zip(range(workers * 2), pending))
+    while window:
+        done = window.popleft().result()
+        nxt = next(pending, None)
+        if nxt is not None:
+            window.append(pool.submit(_render, nxt, config))
+        yield done
+
+
+def _summary_row(rendered: dict) -> dict:
+    item = rendered["item"]
+    status = {r["id"]: r["pass"] for r in item["results"]}
+    fixed = {r["id"]: r["pass"] for r in rendered["fixed_results"]}
+    row = {"文件": item["name"], "达人": item["kol"], "正文字数": item["words"],
+           "初审": "读取失败" if item["error"] else ("通过" if item["passed"] else "未通过")}
+    for cid, label in CHECK_COLUMNS:
+        row[label] = "" if cid not in status else ("通过" if status[cid] else "未通过")
+    row["修复处数"] = rendered["changes"] if item["error"] is None else ""
+    row["修复后"] = "" if not fixed else ("通过" if all(fixed.values()) else "未通过")
+    row["修复后未通过项"] = "、".join(label for cid, label in CHECK_COLUMNS if fixed.get(cid) is False)
+    row["错误"] = item["error"] or ""
+    return row
+
+
+def _arc_stem(name: str, used: set) -> str:
+    stem = os.path.splitext(os.path.basename(name))[0] or "稿件"
+    out, n = stem, 1
+    while out in used:
+        n += 1
+        out = f"{stem}_{n}"
+    used.add(out)
+    return out
+
+
+def export_zip(items: list, config: dict, out, workers: int = None) -> dict:
+    """把 items 的标注版 / 修复版 .docx 和汇总 CSV 写进 out（路径或可写文件对象），返回统计"""
+    t0 = time.perf_counter()
+    workers = workers or _workers()
+    rows, used = [], set()
+    n_files = 0
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+
+        def write(rendered):
+            nonlocal n_files
+            stem = _arc_stem(rendered["item"]["name"], used)
+            for suffix, data in rendered["files"]:
+                zf.writestr(zipfile.ZipInfo(f"{stem}_{suffix}.docx", time.localtime()[:6]), data,
+                            compress_type=zipfile.ZIP_STORED)
+                n_files += 1
+            rows.append(_summary_row(rendered))
+
+        try:
+            for rendered in _iter_rendered(items, config, workers):
+                write(rendered)
+        except BrokenProcessPool:
+            # 子进程被杀：重建留给下一次，已写进 zip 的跳过，剩下的在当前线程做完
+            _reset_pool()
+            for it in items[len(rows):]:
+                write(_render(it, config))
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=list(rows[0]) if rows else ["文件"])
+        writer.writeheader()
+        writer.writerows(rows)
+        zf.writestr(SUMMARY_NAME, "\ufeff" + buf.getvalue())
+    return {"drafts": len(rows), "documents": n_files,
+            "passed": sum(1 for r in rows if r["初审"] == "通过"),
+            "fixed_passed": sum(1 for r in rows if r["修复后"] == "通过"),
+            "seconds": round(time.perf_counter() - t0, 3)}
+
+
+def export_zip_bytes(items: list, config: dict, workers: int = None) -> bytes:
+    buf = io.BytesIO()
+    export_zip(items, config, buf, workers)
+    return buf.getvalue()
+
+
+def _collect(paths):
+    for p in paths:
+        if os.path.isdir(p):
+            files = sorted(os.path.join(root, n) for root, _, names in os.walk(p) for n in names)
+        else:
+            files = [p]
+        for fp in files:
+            if os.path.splitext(fp)[1].lower() in DRAFT_EXTS and not os.path.basename(fp).startswith("~$"):
+                with open(fp, "rb") as f:
+                    yield os.path.relpath(fp), f.read()
+
+
+def main():
+    from core.config_loader import load_config
+
+    ap = argparse.ArgumentParser(description="批量审核并把标注版 / 修复版 .docx 和汇总 CSV 打成一个 zip")
+    ap.add_argument("out")
+    ap.add_argument("inputs", nargs="+")
+    ap.add_argument("--config", default="nengen_direction1")
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args()
+
+    config = load_config(args.config)
+    t0 = time.perf_counter()
+    items = audit_files(list(_collect(args.inputs)), config, args.workers)
+    audit_s = time.perf_counter() - t0
+    report = export_zip(items, config, args.out, args.workers)
+    report["audit_seconds"] = round(audit_s, 3)
+    report["bytes"] = os.path.getsize(args.out)
+    print(json.dumps(report, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
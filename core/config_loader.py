@@ -1,6 +1,23 @@
-"""配置加载器"""
+"""配置加载器
+
+load_config / list_configs 直接读文件；应用内用 REGISTRY（ConfigRegistry）：
+目录只扫描一次并保存 meta 索引，之后按文件 mtime（装了 watchdog 时用文件系统事件）热更新，
+配置有增删改时 REGISTRY.version 加一，下游缓存可以按它失效。
+"""
+import hashlib
 import json
 import os
+import threading
+import time
+
+from core.rewrite import get_rewrite_tables
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    HAS_WATCHDOG = True
+except ImportError:
+    HAS_WATCHDOG = False
 
 CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "configs")
 
@@ -26,41 +43,166 @@ def _validate_config(data: dict, file_path: str):
         raise ValueError(f"配置文件 hashtags 缺少 'required': {file_path}")
 
 
-def load_config(config_name: str) -> dict:
+def load_config(config_name: str, config_dir: str = CONFIG_DIR) -> dict:
     """加载指定的审核配置文件"""
-    path = os.path.join(CONFIG_DIR, f"{config_name}.json")
+    path = os.path.join(config_dir, f"{config_name}.json")
     if not os.path.exists(path):
         raise FileNotFoundError(f"配置文件不存在: {path}")
+    with open(path, 'rb') as f:
+        raw = f.read()
     try:
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = json.loads(raw.decode('utf-8'))
     except json.JSONDecodeError as e:
         raise ValueError(f"配置文件 JSON 格式错误: {path}\n{e}")
 
     _validate_config(data, path)
+    # 文件内容指纹，下游缓存（如 prompt 编译）按它判断配置是否变化
+    data["_fingerprint"] = hashlib.sha1(raw).hexdigest()
+    # 配置文件名，审核历史按它区分方向
+    data["_name"] = config_name
+    # 编译单遍改写表：替换规则成环 / 冲突在加载时就报错，同时预热 auto_fix 用的缓存
+    try:
+        get_rewrite_tables(data)
+    except ValueError as e:
+        raise ValueError(f"配置文件替换规则错误: {path}\n{e}")
     return data
 
 
+def _meta_entry(name: str, data: dict) -> dict:
+    """侧边栏展示用的配置摘要"""
+    meta = data.get("meta", {})
+    did = meta.get("direction_id", "")
+    num = did.replace("direction_", "方向") if did.startswith("direction_") else ""
+    return {
+        "file": name,
+        "brand": meta.get("brand", "未知"),
+        "direction": meta.get("direction", "未知"),
+        "label": f"{num} · {meta.get('direction', '未知')}" if num else f"{meta.get('brand', '未知')} - {meta.get('direction', '未知')}",
+    }
+
+
+def _config_names(config_dir: str) -> list[str]:
+    if not os.path.isdir(config_dir):
+        return []
+    return sorted(f[:-5] for f in os.listdir(config_dir) if f.endswith('.json') and not f.startswith('_'))
+
+
 def list_configs() -> list[dict]:
     """列出所有可用配置"""
     configs = []
-    if not os.path.isdir(CONFIG_DIR):
-        return configs
-    for f in sorted(os.listdir(CONFIG_DIR)):
-        if f.endswith('.json') and not f.startswith('_'):
-            path = os.path.join(CONFIG_DIR, f)
-            try:
-                with open(path, 'r', encoding='utf-8') as fh:
-                    data = json.load(fh)
-                    meta = data.get("meta", {})
-                    did = meta.get("direction_id", "")
-                    num = did.replace("direction_", "方向") if did.startswith("direction_") else ""
-                    configs.append({
-                        "file": f.replace('.json', ''),
-                        "brand": meta.get("brand", "未知"),
-                        "direction": meta.get("direction", "未知"),
-                        "label": f"{num} · {meta.get('direction', '未知')}" if num else f"{meta.get('brand', '未知')} - {meta.get('direction', '未知')}",
-                    })
-            except (json.JSONDecodeError, KeyError):
-                continue
+    for name in _config_names(CONFIG_DIR):
+        try:
+            with open(os.path.join(CONFIG_DIR, f"{name}.json"), 'r', encoding='utf-8') as fh:
+                configs.append(_meta_entry(name, json.load(fh)))
+        except (json.JSONDecodeError, KeyError):
+            continue
     return configs
+
+
+class ConfigRegistry:
+    """配置注册表：目录索引 + 已解析配置 + 热更新
+
+    check_interval 秒内的重复访问不再 stat 文件；装了 watchdog 时 watch() 之后由文件事件触发重扫。
+    返回的配置 dict 在进程内共享，只读。
+    """
+
+    def __init__(self, config_dir: str = CONFIG_DIR, check_interval: float = 1.0):
+        self.config_dir = config_dir
+        self.check_interval = check_interval
+        self.version = 0
+        self.errors = {}       # name -> 错误信息（JSON / 字段校验失败的配置不进索引）
+        self._entries = {}     # name -> (mtime_ns, size, config, meta)
+        self._checked = 0.0
+        self._dirty = True
+        self._lock = threading.Lock()
+        self._observer = None
+
+    def warm(self):
+        """解析目录下全部配置（服务启动时调用一次）"""
+        self.refresh(force=True)
+        return self
+
+    def refresh(self, force: bool = False) -> bool:
+        """按 mtime 重新加载有变化的配置，返回是否有变化"""
+        now = time.monotonic()
+        if not force and not self._dirty and now - self._checked < self.check_interval:
+            return False
+        with self._lock:
+            self._dirty = False
+            self._checked = now
+            changed = False
+            seen = set()
+            for name in _config_names(self.config_dir):
+                seen.add(name)
+                path = os.path.join(self.config_dir, f"{name}.json")
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                old = self._entries.get(name)
+                if old and old[0] == st.st_mtime_ns and old[1] == st.st_size:
+                    continue
+                if not old and self.errors.get(name, (None,))[0] == (st.st_mtime_ns, st.st_size):
+                    continue
+                try:
+                    config = load_config(name, self.config_dir)
+                except (ValueError, FileNotFoundError) as e:
+                    self.errors[name] = ((st.st_mtime_ns, st.st_size), str(e))
+                    if self._entries.pop(name, None):
+                        changed = True
+                    continue
+                self.errors.pop(name, None)
+                self._entries[name] = (st.st_mtime_ns, st.st_size, config, _meta_entry(name, config))
+                changed = True
+            for name in set(self._entries) - seen:
+                del self._entries[name]
+                changed = True
+            for name in set(self.errors) - seen:
+                del self.errors[name]
+            if changed:
+                self.version += 1
+            return changed
+
+    def list(self) -> list[dict]:
+        """可用配置摘要（按文件名排序）"""
+        self.refresh()
+        return [self._entries[name][3] for name in sorted(self._entries)]
+
+    def get(self, name: str) -> dict:
+        """取已解析的配置；配置文件有错误时抛出 ValueError"""
+        self.refresh()
+        entry = self._entries.get(name)
+        if entry is None:
+            if name in self.errors:
+                raise ValueError(self.errors[name][1])
+            raise FileNotFoundError(f"配置文件不存在: {os.path.join(self.config_dir, name + '.json')}")
+        return entry[2]
+
+    def error_messages(self) -> dict:
+        return {name: err for name, (_, err) in self.errors.items()}
+
+    def watch(self) -> bool:
+        """用文件系统事件代替定时 stat（需要 watchdog），返回是否启用"""
+        if not HAS_WATCHDOG or self._observer is not None or not os.path.isdir(self.config_dir):
+            return False
+        registry = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                registry._dirty = True
+
+        observer = Observer()
+        observer.daemon = True
+        try:
+            observer.schedule(_Handler(), self.config_dir, recursive=False)
+            observer.start()
+        except OSError:
+            # inotify 句柄不足等情况，退回按 mtime 轮询
+            return False
+        self._observer = observer
+        # 事件驱动后不再需要按间隔 stat，只在收到事件时重扫
+        self.check_interval = float("inf")
+        return True
+
+
+REGISTRY = ConfigRegistry()
@@ -0,0 +1,182 @@
+"""稿件倒排索引 - 新增违禁词 / 改必提词时，秒查哪些已通过的稿件受影响，不用把历史稿件重新审一遍
+
+    idx = draft_index()                                   # 从审核历史库建好，之后随审核增量更新
+    idx.search("最", exceptions=["最近", "最后"])          # 含「最」但不是例外用法的已通过稿件
+    idx.search("敏宝", approved=None, config="nengen_direction1")   # 不限是否通过，只看某方向
+    idx.impact(config)                                    # 配置里每个违禁词（含例外）各影响哪些稿件
+    idx.missing("适度水解")                                # 已通过稿件里没提到某必提词的
+
+索引对象是归一化后的全文（标题 + 正文 + 标签，与 check_forbidden_words 扫描的文本一致），
+按 1 字和 2 字片段建倒排表：片段 -> 稿件编号（升序 array）。查询时取词里最稀有的片段的倒排表
+作为候选，再在候选稿件的归一化文本上定位全部出现位置、按违禁词的例外规则排除，
+例外判断与违禁词审核共用 hard_checks._is_exception，结论一致。
+
+稿件按内容 hash 存，文本不会变；同一篇再次审核只更新它的达人、方向和是否通过。
+"""
+import operator
+import threading
+from array import array
+
+from core.hard_checks import _is_exception
+from core.history import HISTORY, config_name
+from core.normalize import normalize, normalize_word
+
+
+def full_text(titles, body: str, tags: str) -> str:
+    """与 run_all_checks 交给违禁词审核的全文相同"""
+    return "\n".join(titles) + "\n" + body + "\n" + tags
+
+
+class DraftIndex:
+    """1 / 2 字片段倒排索引；线程安全（写入线程增量更新，页面线程查询）"""
+
+    def __init__(self):
+        self._ids = {}        # 稿件 hash -> 编号
+        self._hashes = []     # 编号 -> 稿件 hash
+        self._texts = []      # 编号 -> 归一化全文
+        self._kols = []       # 编号 -> 达人
+        self._configs = []    # 编号 -> {方向: 是否有通过的审核}
+        self._postings = {}   # 片段 -> array('I') 编号
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __contains__(self, h: str) -> bool:
+        return h in self._ids
+
+    def add(self, h: str, titles, body: str, tags: str, kol: str = "", config: str = "", passed: bool = False,
+            **_) -> int:
+        """登记一篇稿件（已登记的只合并达人 / 方向 / 是否通过），返回编号；可直接作为 AuditStore 的订阅回调"""
+        with self._lock:
+            doc = self._ids.get(h)
+            if doc is None:
+                doc = len(self._hashes)
+                text = normalize.__wrapped__(full_text(titles, body, tags)).text
+                self._ids[h] = doc
+                self._hashes.append(h)
+                self._texts.append(text)
+                self._kols.append(kol or "")
+                self._configs.append({})
+                grams = set(text)
+                grams.update(map(operator.add, text, text[1:]))
+                postings = self._postings
+                for g in grams:
+                    p = postings.get(g)
+                    if p is None:
+                        postings[g] = array("I", (doc,))
+                    else:
+                        p.append(doc)
+            elif kol:
+                self._kols[doc] = kol
+            if config:
+                configs = self._configs[doc]
+                configs[config] = configs.get(config, False) or bool(passed)
+            return doc
+
+    def _candidates(self, word: str) -> list:
+        """word 的全部片段都出现过的稿件编号（候选，未验证相邻）"""
+        if len(word) == 1:
+            return self._postings.get(word, ())
+        best = None
+        for i in range(len(word) - 1):
+            p = self._postings.get(word[i:i + 2])
+            if p is None:
+                return ()
+            if best is None or len(p) < len(best):
+                best = p
+        return best
+
+    def _selected(self, doc: int, approved, config, kol) -> bool:
+        if kol is not None and self._kols[doc] != kol:
+            return False
+        configs = self._configs[doc]
+        if config is not None:
+            if config not in configs:
+                return False
+            return approved is None or configs[config] == approved
+        return approved is None or any(configs.values()) == approved
+
+    def search(self, word: str, exceptions=(), approved=True, config=None, kol=None) -> list[dict]:
+        """含 word（不算例外用法）的稿件：[{draft, kol, configs, count, positions}]，positions 为归一化全文中的位置
+
+        approved=True 只看有通过审核的稿件，False 只看没通过的，None 不限；config / kol 进一步过滤。
+        """
+        nw = normalize_word(word)
+        if not nw:
+            raise ValueError("查询词不能为空")
+        exceptions = [normalize_word(exc) for exc in exceptions]
+        out = []
+        with self._lock:
+            for doc in self._candidates(nw):
+                text = self._texts[doc]
+                i = text.find(nw)
+                if i == -1 or not self._selected(doc, approved, config, kol):
+                    continue
+                positions = []
+                while i != -1:
+                    if not (exceptions and _is_exception(text, i, exceptions)):
+                        positions.append(i)
+                    i = text.find(nw, i + 1)
+                if positions:
+                    out.append({"draft": self._hashes[doc], "kol": self._kols[doc],
+                                "configs": sorted(self._configs[doc]), "count": len(positions),
+                                "positions": positions})
+        return out
+
+    def missing(self, word: str, approved=True, config=None, kol=None) -> list[str]:
+        """不含 word 的稿件 hash（如新增必提词后哪些已通过的稿件要补）"""
+        nw = normalize_word(word)
+        with self._lock:
+            has = set(doc for doc in self._candidates(nw) if nw in self._texts[doc])
+            return [self._hashes[doc] for doc in range(len(self._hashes))
+                    if doc not in has and self._selected(doc, approved, config, kol)]
+
+    def impact(self, config: dict, approved=True, only_config: bool = False) -> dict:
+        """按配置的违禁词表（含例外）查受影响的稿件：{违禁词: [稿件 hash]}，只列有命中的词
+
+        only_config=True 时只看该方向审核过的稿件。
+        """
+        hr = config.get("hard_rules", config)
+        name = config_name(config) if only_config else None
+        out = {}
+        for fw in hr["forbidden_words"]:
+            hits = self.search(fw["word"], fw.get("exceptions", []), approved=approved, config=name)
+            if hits:
+                out[fw["word"]] = [h["draft"] for h in hits]
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "drafts": len(self._hashes),
+                "grams": len(self._postings),
+                "postings": sum(len(p) for p in self._postings.values()),
+            }
+
+
+def build_index(store=HISTORY, subscribe: bool = True) -> DraftIndex:
+    """从审核历史库建索引；subscribe=True 时之后每条审核记录落盘即增量加入"""
+    idx = DraftIndex()
+    if subscribe:
+        # 先订阅再回放：回放期间新落盘的稿件也不会漏（重复登记只合并元信息）
+        store.subscribe(idx.add)
+    for h, titles, body, tags, kol, runs in store.iter_audited():
+        idx.add(h, titles, body, tags, kol=kol)
+        for cfg, _, passed, _ in runs:
+            idx.add(h, titles, body, tags, config=cfg, passed=passed)
+    return idx
+
+
+_INDEX = None
+_INDEX_LOCK = threading.Lock()
+
+
+def draft_index() -> DraftIndex:
+    """进程内共用的索引，第一次调用时从 HISTORY 建好"""
+    global _INDEX
+    if _INDEX is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                _INDEX = build_index()
+    return _INDEX
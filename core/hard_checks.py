@@ -1,6 +1,12 @@
-"""硬性审核检查引擎"""
-import re
-from core.text_utils import count_chinese, extract_hashtags, count_tag_occurrences
+"""硬性审核检查引擎
+
+违禁词、关键词、标签都在归一化文本上匹配（normalize.py：全半角、繁简、零宽字符、词中空格），
+报告里的位置和上下文仍然指向原文。字数按原文统计。
+"""
+from core.normalize import normalize, normalize_word
+from core.structure import analyze_structure
+from core.tags import tag_index
+from core.text_utils import count_chinese
 
 
 def check_word_count(body: str, config: dict) -> dict:
@@ -38,14 +44,16 @@ def check_title_count(titles: list[str], config: dict) -> dict:
 def check_title_keywords(titles: list[str], config: dict) -> dict:
     """标题关键词审核"""
     keywords = config["titles"]["keywords"]
-    all_titles = " ".join(titles)
+    norm_titles = [normalize(t).text for t in titles]
+    all_titles = " ".join(norm_titles)
     details = []
     for kw in keywords:
-        found = kw in all_titles
+        nkw = normalize_word(kw)
+        found = nkw in all_titles
         found_in = []
         if found:
-            for i, t in enumerate(titles):
-                if kw in t:
+            for i, t in enumerate(norm_titles):
+                if nkw in t:
                     found_in.append(i + 1)
         details.append({
             "keyword": kw,
@@ -69,11 +77,12 @@ def check_title_keywords(titles: list[str], config: dict) -> dict:
 def check_hashtags(tags_text: str, config: dict) -> dict:
     """话题标签审核"""
     required = config["hashtags"]["required"]
+    idx = tag_index(tags_text)
     details = []
     for req in required:
         tag = req["tag"]
         min_count = req["min_count"]
-        actual = count_tag_occurrences(tags_text, tag)
+        actual = idx.count(tag)
         details.append({
             "tag": tag,
             "required_count": min_count,
@@ -94,71 +103,90 @@ def check_hashtags(tags_text: str, config: dict) -> dict:
     }
 
 
-def check_forbidden_words(full_text: str, config: dict) -> dict:
-    """违禁词审核"""
-    forbidden_list = config["forbidden_words"]
-    violations = []
+def _is_exception(text, idx: int, exceptions: list) -> bool:
+    """idx 处的命中是否落在某个例外用法里（exceptions 为归一化后的例外词）
+
+    只在 idx 前后各一个例外词长度内查找，text 也可以是 bytes / mmap（例外词同为 UTF-8 字节）。
+    """
+    for exc in exceptions:
+        exc_idx = text.find(exc, max(0, idx - len(exc)), idx + len(exc))
+        if exc_idx != -1 and idx >= exc_idx and idx < exc_idx + len(exc):
+            return True
+    return False
 
-    for fw in forbidden_list:
-        word = fw["word"]
-        exceptions = fw.get("exceptions", [])
-        replacement = fw.get("replacement", "")
-        category = fw.get("category", "禁止词")
 
+def _forbidden_hits(text: str, forbidden_list: list):
+    """归一化文本上逐个产出违禁词命中 (配置项, 归一化词, 位置)，例外用法已排除"""
+    for fw in forbidden_list:
+        word = normalize_word(fw["word"])
+        exceptions = [normalize_word(exc) for exc in fw.get("exceptions", [])]
         start = 0
         while True:
-            idx = full_text.find(word, start)
+            idx = text.find(word, start)
             if idx == -1:
                 break
-            # 检查是否在例外中
-            is_exception = False
-            for exc in exceptions:
-                exc_idx = full_text.find(exc, max(0, idx - len(exc)))
-                if exc_idx != -1 and idx >= exc_idx and idx < exc_idx + len(exc):
-                    is_exception = True
-                    break
-            if not is_exception:
-                ctx_start = max(0, idx - 15)
-                ctx_end = min(len(full_text), idx + len(word) + 15)
-                violations.append({
-                    "word": word,
-                    "category": category,
-                    "position": idx,
-                    "context": full_text[ctx_start:ctx_end],
-                    "replacement": replacement,
-                })
+            if not _is_exception(text, idx, exceptions):
+                yield fw, word, idx
             start = idx + 1
 
-    # 特殊替换规则
-    special_violations = []
-    for rule in config.get("special_replacements", []):
-        find_text = rule["find"]
+
+def _special_hits(text: str, rules: list):
+    """特殊替换命中 (规则, 归一化词, 位置)；后面紧跟配置里 skip_if_followed_by（可以是多个字）的不算"""
+    for rule in rules:
+        find_text = normalize_word(rule["find"])
+        skip = normalize_word(rule["skip_if_followed_by"]) if rule.get("skip_if_followed_by") else ""
         start = 0
         while True:
-            idx = full_text.find(find_text, start)
+            idx = text.find(find_text, start)
             if idx == -1:
                 break
-            next_char = full_text[idx + len(find_text)] if idx + len(find_text) < len(full_text) else ""
-            if next_char != "粉":
-                ctx_start = max(0, idx - 10)
-                ctx_end = min(len(full_text), idx + len(find_text) + 10)
-                special_violations.append({
-                    "find": find_text,
-                    "context": full_text[ctx_start:ctx_end],
-                    "replace_with": rule["replace_with"],
-                    "description": rule.get("description", ""),
-                })
+            end = idx + len(find_text)
+            if not skip or text[end:end + len(skip)] != skip:
+                yield rule, find_text, idx
             start = idx + 1
 
+
+def _tag_hits(full_text: str, config: dict):
+    """标签中的违禁词 (标签条目, 违禁词)：每个不同的标签只比对一次"""
+    safe_tags = {normalize_word(t) for t in config.get("safe_tags", ["#防敏奶粉", "#第一口奶粉"])}
+    words = [(normalize_word(fw["word"]), fw["word"]) for fw in config["forbidden_words"]]
+    tag_words = {}
+    for e in tag_index(full_text).entries:
+        if e.key not in tag_words:
+            tag_words[e.key] = [] if e.key in safe_tags else [w for nw, w in words if nw in e.key]
+        for word in tag_words[e.key]:
+            yield e, word
+
+
+def check_forbidden_words(full_text: str, config: dict) -> dict:
+    """违禁词审核"""
+    nt = normalize(full_text)
+    text = nt.text
+
+    violations = []
+    for fw, word, idx in _forbidden_hits(text, config["forbidden_words"]):
+        violations.append({
+            "word": fw["word"],
+            "matched": nt.original_slice(idx, idx + len(word)),
+            "category": fw.get("category", "禁止词"),
+            "position": nt.orig_index(idx),
+            "context": nt.context(idx, idx + len(word), 15),
+            "replacement": fw.get("replacement", ""),
+        })
+
+    # 特殊替换规则
+    special_violations = []
+    for rule, find_text, idx in _special_hits(text, config.get("special_replacements", [])):
+        special_violations.append({
+            "find": rule["find"],
+            "position": nt.orig_index(idx),
+            "context": nt.context(idx, idx + len(find_text), 10),
+            "replace_with": rule["replace_with"],
+            "description": rule.get("description", ""),
+        })
+
     # 标签中的违禁词检查
-    tags = extract_hashtags(full_text)
-    tag_violations = []
-    safe_tags = set(config.get("safe_tags", ["#防敏奶粉", "#第一口奶粉"]))
-    for tag in tags:
-        for fw in forbidden_list:
-            word = fw["word"]
-            if word in tag and tag not in safe_tags:
-                tag_violations.append({"tag": tag, "word": word})
+    tag_violations = [{"tag": e.tag, "word": word} for e, word in _tag_hits(full_text, config)]
 
     all_pass = len(violations) == 0 and len(special_violations) == 0 and len(tag_violations) == 0
     return {
@@ -174,39 +202,38 @@ def check_forbidden_words(full_text: str, config: dict) -> dict:
 
 
 def check_structure(body: str, config: dict) -> dict:
-    """文章结构审核 - 检查内容是否包含4个主题且顺序正确（不要求严格分段）"""
+    """文章结构审核 - 检查内容是否包含4个主题且顺序正确（不要求严格分段）
+
+    主题区间划分见 structure.py：全部锚点出现位置按句子投票，顺序看各主题的主体区间。
+    """
     paragraphs_spec = config["structure"]["paragraphs"]
+    sa = analyze_structure(body, config)
 
-    # 在全文中搜索每个主题的锚点关键词位置
     detected = []
-    for spec in paragraphs_spec:
-        positions = []
-        found_keywords = []
-        for kw in spec["anchor_keywords"]:
-            idx = body.find(kw)
-            if idx != -1:
-                positions.append(idx)
-                found_keywords.append(kw)
-
-        avg_pos = sum(positions) / len(positions) if positions else -1
+    for t, spec in enumerate(paragraphs_spec):
+        hits = sa.hits[t]
+        hit_keywords = {kw for _, kw in hits}
         detected.append({
             "name": spec["name"],
-            "found": len(positions) > 0,
-            "found_keywords": found_keywords,
+            "found": len(hits) > 0,
+            "found_keywords": [kw for kw in spec["anchor_keywords"] if kw in hit_keywords],
             "total_anchor": len(spec["anchor_keywords"]),
-            "avg_position": avg_pos,
+            "occurrences": len(hits),
+            "avg_position": sum(p for p, _ in hits) / len(hits) if hits else -1,
+            "position": sa.position(t),
+            "regions": sa.spans(t),
         })
 
     # 检查所有主题是否都有内容
     all_found = all(d["found"] for d in detected)
     missing_sections = [d["name"] for d in detected if not d["found"]]
 
-    # 检查顺序（按锚点关键词的平均位置排序）
+    # 检查顺序（按各主题主体区间的先后）
     found_topics = [d for d in detected if d["found"]]
-    positions = [d["avg_position"] for d in found_topics]
+    positions = [d["position"] for d in found_topics]
     order_correct = all(positions[i] <= positions[i + 1] for i in range(len(positions) - 1))
 
-    actual_order = [d["name"] for d in sorted(found_topics, key=lambda x: x["avg_position"])]
+    actual_order = [d["name"] for d in sorted(found_topics, key=lambda x: x["position"])]
     expected_order = [p["name"] for p in paragraphs_spec]
 
     return {
@@ -226,14 +253,21 @@ def check_structure(body: str, config: dict) -> dict:
     }
 
 
-def check_selling_points(body: str, config: dict) -> dict:
-    """卖点必提词审核"""
+def check_selling_points(body: str, config: dict, strict: bool = None) -> dict:
+    """卖点必提词审核
+
+    strict（默认读 structure.strict_selling_points）：必提词必须出现在本段主题的区间内，
+    写在别的段落里不算。两种模式都查结构分析里的 必提词 -> 位置 索引，不再逐词扫全文。
+    """
     paragraphs_spec = config["structure"]["paragraphs"]
+    if strict is None:
+        strict = config["structure"].get("strict_selling_points", False)
+    sa = analyze_structure(body, config)
     results = []
     total = 0
     passed = 0
 
-    for para_spec in paragraphs_spec:
+    for t, para_spec in enumerate(paragraphs_spec):
         para_results = {
             "paragraph_name": para_spec["name"],
             "selling_points": [],
@@ -252,7 +286,9 @@ def check_selling_points(body: str, config: dict) -> dict:
             total += 1
             kw_results = []
             for kw in sp["required_keywords"]:
-                kw_results.append({"keyword": kw, "found": kw in body})
+                anywhere = bool(sa.keyword_positions(kw))
+                found = sa.keyword_in(kw, t) if strict else anywhere
+                kw_results.append({"keyword": kw, "found": found, "misplaced": anywhere and not found})
 
             sp_pass = all(r["found"] for r in kw_results)
             if sp_pass:
@@ -266,18 +302,24 @@ def check_selling_points(body: str, config: dict) -> dict:
                 "pass": sp_pass,
                 "keywords": kw_results,
                 "missing": missing,
+                "misplaced": [r["keyword"] for r in kw_results if r["misplaced"]],
                 "paraphrase_ref": sp.get("paraphrase_ref", ""),
             })
         results.append(para_results)
 
+    misplaced = sum(1 for p in results for sp in p["selling_points"] if sp.get("misplaced") and not sp["pass"])
     return {
         "id": "selling_points",
         "name": "卖点必提词审核",
         "pass": passed == total,
         "total": total,
         "passed": passed,
+        "strict": strict,
         "paragraphs": results,
-        "message": f"卖点必提词 {passed}/{total} 通过" if passed == total else f"卖点必提词 {passed}/{total} 通过，{total - passed}个卖点有缺失",
+        "message": f"卖点必提词 {passed}/{total} 通过" if passed == total else (
+            f"卖点必提词 {passed}/{total} 通过，{total - passed}个卖点有缺失"
+            + (f"（{misplaced}个写在了别的段落）" if misplaced else "")
+        ),
         "editable": True,
     }
 
@@ -296,3 +338,66 @@ def run_all_checks(titles: list[str], body: str, tags: str, config: dict) -> lis
         check_structure(body, hr),
         check_selling_points(body, hr),
     ]
+
+
+# ── 快速筛查 ──
+# 批量初筛只要知道哪些稿件不过：按单项耗时从低到高只算通过与否，遇到第一项不通过就停。
+# 顺序依据 python -m bench.bench_triage 输出的 per_check_us。
+
+def _ok_title_keywords(titles, hr):
+    all_titles = " ".join(normalize(t).text for t in titles)
+    return all(normalize_word(kw) in all_titles for kw in hr["titles"]["keywords"])
+
+
+def _ok_hashtags(tags, hr):
+    idx = tag_index(tags)
+    return all(idx.count(req["tag"]) >= req["min_count"] for req in hr["hashtags"]["required"])
+
+
+def _ok_forbidden_words(full_text, hr):
+    text = normalize(full_text).text
+    return (next(_forbidden_hits(text, hr["forbidden_words"]), None) is None
+            and next(_special_hits(text, hr.get("special_replacements", [])), None) is None
+            and next(_tag_hits(full_text, hr), None) is None)
+
+
+TRIAGE_ORDER = [
+    ("title_count", lambda t, b, tg, ft, hr: len(t) == hr["titles"]["required_count"]),
+    ("title_keywords", lambda t, b, tg, ft, hr: _ok_title_keywords(t, hr)),
+    ("hashtags", lambda t, b, tg, ft, hr: _ok_hashtags(tg, hr)),
+    ("word_count", lambda t, b, tg, ft, hr: hr["word_count"]["min"] <= count_chinese(b) <= hr["word_count"]["max"]),
+    ("forbidden_words", lambda t, b, tg, ft, hr: _ok_forbidden_words(ft, hr)),
+    # 这两项共用一次结构分析（structure.py 按正文缓存）
+    ("selling_points", lambda t, b, tg, ft, hr: check_selling_points(b, hr)["pass"]),
+    ("structure", lambda t, b, tg, ft, hr: check_structure(b, hr)["pass"]),
+]
+
+
+class Triage:
+    """快速筛查结果：passed / failed（第一项不通过的检查 id）；detail() 时才跑完整审核并缓存"""
+
+    __slots__ = ("passed", "failed", "_args", "_detail")
+
+    def __init__(self, passed: bool, failed, args: tuple):
+        self.passed = passed
+        self.failed = failed
+        self._args = args
+        self._detail = None
+
+    def detail(self) -> list[dict]:
+        if self._detail is None:
+            self._detail = run_all_checks(*self._args)
+        return self._detail
+
+    def __repr__(self):
+        return f"Triage(passed={self.passed}, failed={self.failed!r})"
+
+
+def triage_checks(titles: list[str], body: str, tags: str, config: dict) -> Triage:
+    """快速筛查：结论与 run_all_checks 全部通过与否一致，但不生成上下文、明细表、顺序列表"""
+    full_text = "\n".join(titles) + "\n" + body + "\n" + tags
+    hr = config["hard_rules"]
+    for check_id, ok in TRIAGE_ORDER:
+        if not ok(titles, body, tags, full_text, hr):
+            return Triage(False, check_id, (titles, body, tags, config))
+    return Triage(True, None, (titles, body, tags, config))
@@ -0,0 +1,414 @@
+"""审核历史 - 每次审核结果、一键修复变更和终稿写入 SQLite，按达人 / 方向 / 日期 / 通过与否 / 未通过项查询
+
+    h = HISTORY.record(titles, body, tags, results, config, kol="小美")           # 初审，返回稿件 hash
+    HISTORY.record(ft, fb, ftg, fixed_results, config, stage="fixed", changes=changes, source=h)
+    HISTORY.record(..., stage="final", source=h)                                  # 终稿
+    HISTORY.query(kol="小美", config="nengen_direction1", passed=False,
+                  failed_check="forbidden_words", since="2026-10-01", until="2026-10-31")
+    HISTORY.summary(since="2026-10-01")      # 看板：各方向通过率、各检查项未通过次数、各达人稿件数
+    HISTORY.draft(h)                         # 稿件全文 + 它的全部审核记录（含修复稿、终稿）
+    HISTORY.flush()                          # 等待队列写完（脚本 / 压测用）
+
+record 只入队，由后台线程攒批后一个事务写入，不占 Streamlit 脚本线程；查询读的是已落盘的数据。
+稿件按内容 hash（标题 + 正文 + 标签）只存一份；同一稿件在同一方向配置版本、同一环节重复审核，
+只更新结果和时间，不新增记录。未通过项单独建表，按检查项过滤走索引。
+
+数据库路径：环境变量或 .env 的 AUDIT_DB，默认 data/audit_history.sqlite3；AUDIT_DB=off 关闭记录。
+"""
+import atexit
+import datetime
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from core.llm_backends import load_env
+from core.prompts import config_fingerprint
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "audit_history.sqlite3")
+
+# 初审 / 一键修复后复检 / AI 改写后复检 / 终检
+STAGES = ("initial", "fixed", "ai", "final")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS drafts (
+    hash    TEXT PRIMARY KEY,
+    titles  TEXT NOT NULL,
+    body    TEXT NOT NULL,
+    tags    TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS audits (
+    id          INTEGER PRIMARY KEY,
+    draft       TEXT NOT NULL REFERENCES drafts(hash),
+    source      TEXT NOT NULL,
+    kol         TEXT NOT NULL DEFAULT '',
+    config      TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    stage       TEXT NOT NULL,
+    passed      INTEGER NOT NULL,
+    failed      TEXT NOT NULL DEFAULT '',
+    results     TEXT NOT NULL,
+    changes     TEXT,
+    created     REAL NOT NULL,
+    UNIQUE (draft, config, fingerprint, stage)
+);
+CREATE TABLE IF NOT EXISTS audit_failures (
+    check_id TEXT NOT NULL,
+    audit    INTEGER NOT NULL REFERENCES audits(id) ON DELETE CASCADE,
+    PRIMARY KEY (check_id, audit)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS signatures (
+    hash TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (hash, kind)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_audits_created ON audits(created);
+CREATE INDEX IF NOT EXISTS idx_audits_kol ON audits(kol, created);
+CREATE INDEX IF NOT EXISTS idx_audits_config ON audits(config, created);
+CREATE INDEX IF NOT EXISTS idx_audits_passed ON audits(passed, created);
+CREATE INDEX IF NOT EXISTS idx_audits_source ON audits(source);
+CREATE INDEX IF NOT EXISTS idx_failures_audit ON audit_failures(audit);
+"""
+
+_UPSERT = """
+INSERT INTO audits (draft, source, kol, config, fingerprint, stage, passed, failed, results, changes, created)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (draft, config, fingerprint, stage) DO UPDATE SET
+    source = excluded.source,
+    kol = CASE WHEN excluded.kol != '' THEN excluded.kol ELSE audits.kol END,
+    passed = excluded.passed, failed = excluded.failed, results = excluded.results,
+    changes = COALESCE(excluded.changes, audits.changes), created = excluded.created
+RETURNING id
+"""
+
+_COLUMNS = "a.id, a.draft, a.source, a.kol, a.config, a.stage, a.passed, a.failed, a.created"
+
+_STOP = object()
+
+
+def draft_hash(titles, body: str, tags: str) -> str:
+    """稿件内容哈希（与配置无关）"""
+    raw = json.dumps([list(titles), body, tags], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def config_name(config: dict) -> str:
+    """配置文件名（load_config 写入 _name），没有时退回 meta.direction_id"""
+    return config.get("_name") or config.get("meta", {}).get("direction_id", "")
+
+
+def _timestamp(value, end: bool = False):
+    """日期参数 → 时间戳：支持 'YYYY-MM-DD'、date、datetime、数字；end=True 时纯日期取当天结束"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value) if len(value) > 10 else datetime.date.fromisoformat(value)
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value + datetime.timedelta(days=1) if end else value, datetime.time())
+        return value.timestamp() - (1e-6 if end else 0)
+    return value.timestamp()
+
+
+def _where(kol=None, config=None, stage=None, passed=None, failed_check=None, since=None, until=None, source=None):
+    clauses, params = [], []
+    for column, value in (("a.kol", kol), ("a.config", config), ("a.stage", stage), ("a.source", source)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if passed is not None:
+        clauses.append("a.passed = ?")
+        params.append(int(bool(passed)))
+    if failed_check is not None:
+        clauses.append("a.id IN (SELECT audit FROM audit_failures WHERE check_id = ?)")
+        params.append(failed_check)
+    if since is not None:
+        clauses.append("a.created >= ?")
+        params.append(_timestamp(since))
+    if until is not None:
+        clauses.append("a.created <= ?")
+        params.append(_timestamp(until, end=True))
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def _row(r) -> dict:
+    return {
+        "id": r[0], "draft": r[1], "source": r[2], "kol": r[3], "config": r[4], "stage": r[5],
+        "passed": bool(r[6]), "failed": r[7].split(",") if r[7] else [],
+        "created": datetime.datetime.fromtimestamp(r[8]).isoformat(timespec="seconds"),
+    }
+
+
+class AuditStore:
+    """SQLite 审核历史：写入走后台线程攒批，读取每次开一个只读连接（WAL 模式下读写互不阻塞）
+
+    path 为 None 时关闭：record 只返回 hash，查询返回空。
+    """
+
+    def __init__(self, path, batch_size: int = 200, flush_interval: float = 0.2):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.errors = 0
+        self.last_error = None
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._ready = False
+        self._listeners = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def _ensure(self):
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with closing(self._connect()) as conn:
+                conn.executescript(SCHEMA)
+            self._ready = True
+
+    # ── 写入 ──
+
+    def record(self, titles, body: str, tags: str, results: list, config: dict, stage: str = "initial",
+               kol: str = "", changes=None, source: str = None) -> str:
+        """登记一次审核（入队即返回），返回稿件 hash
+
+        source 为最初上传稿件的 hash，修复稿 / 改写稿 / 终稿用它关联回原稿；初审不填即为自身。
+        """
+        if stage not in STAGES:
+            raise ValueError(f"未知的审核环节: {stage}，可选 {', '.join(STAGES)}")
+        h = draft_hash(titles, body, tags)
+        if not self.enabled:
+            return h
+        # JSON 序列化留给后台线程做，调用方只付入队的开销（results / changes 入队后不要再修改）
+        item = (h, list(titles), body, tags, source or h, kol or "", config_name(config),
+                config_fingerprint(config), stage, results, changes, time.time())
+        self._start()
+        self._queue.put(item)
+        return h
+
+    def _start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-history", daemon=True)
+                self._thread.start()
+                # 进程退出前把队列里剩下的写完
+                atexit.register(self.close)
+
+    def _run(self):
+        # 库打不开时照常消费队列、只计错误，flush() 不会卡住
+        try:
+            self._ensure()
+            conn = self._connect()
+        except (OSError, sqlite3.Error) as e:
+            conn, self.last_error = None, str(e)
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    self._queue.task_done()
+                    return
+                batch = [item]
+                deadline = time.monotonic() + self.flush_interval
+                stop = False
+                while len(batch) < self.batch_size:
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stop = True
+                        break
+                    batch.append(item)
+                try:
+                    if conn is None:
+                        raise sqlite3.OperationalError(self.last_error)
+                    self._write(conn, batch)
+                except (sqlite3.Error, TypeError, ValueError) as e:
+                    if conn is not None:
+                        conn.rollback()
+                    self.errors += len(batch)
+                    self.last_error = str(e)
+                for _ in range(len(batch) + stop):
+                    self._queue.task_done()
+                if stop:
+                    return
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _write(self, conn, batch):
+        now = time.time()
+        drafts, audits = [], []
+        for h, titles, body, tags, source, kol, config, fingerprint, stage, results, changes, created in batch:
+            failed = [r["id"] for r in results if not r["pass"]]
+            drafts.append((h, json.dumps(titles, ensure_ascii=False), body, tags, now))
+            audits.append(((h, source, kol, config, fingerprint, stage, int(not failed), ",".join(failed),
+                            json.dumps(results, ensure_ascii=False),
+                            None if changes is None else json.dumps(changes, ensure_ascii=False), created), failed))
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO drafts (hash, titles, body, tags, created) VALUES (?, ?, ?, ?, ?)",
+                             drafts)
+            for audit, failed in audits:
+                audit_id = conn.execute(_UPSERT, audit).fetchone()[0]
+                conn.execute("DELETE FROM audit_failures WHERE audit = ?", (audit_id,))
+                conn.executemany("INSERT INTO audit_failures (check_id, audit) VALUES (?, ?)",
+                                 [(c, audit_id) for c in failed])
+        self.written += len(batch)
+        for fn in self._listeners:
+            for h, titles, body, tags, source, kol, config, _, stage, results, _, created in batch:
+                try:
+                    fn(h, titles, body, tags, kol=kol, config=config, stage=stage,
+                       passed=all(r["pass"] for r in results), source=source, created=created)
+                except Exception as e:
+                    # 订阅方出错不影响落盘
+                    self.last_error = f"{getattr(fn, '__qualname__', fn)}: {e}"
+
+    def subscribe(self, fn):
+        """每条记录落盘后在写入线程里回调 fn(hash, titles, body, tags, kol=, config=, stage=, passed=, source=, created=)"""
+        self._listeners.append(fn)
+
+    def signatures(self, kind: str) -> dict:
+        """按稿件存的派生数据（如近似重复检测的签名）：{稿件 hash: bytes}"""
+        return dict(self._read("SELECT hash, data FROM signatures WHERE kind = ?", (kind,)))
+
+    def save_signatures(self, kind: str, rows: list):
+        """rows 为 [(稿件 hash, bytes)]，已有的覆盖"""
+        if not self.enabled or not rows:
+            return
+        self._ensure()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO signatures (hash, kind, data) VALUES (?, ?, ?)",
+                             [(h, kind, data) for h, data in rows])
+
+    def draft_times(self) -> dict:
+        """各稿件首次登记的时间戳：{稿件 hash: created}（同一稿件再次审核不会改变）"""
+        return dict(self._read("SELECT hash, created FROM drafts"))
+
+    def iter_audited(self):
+        """逐篇给出库里的稿件及其审核概况 (hash, titles, body, tags, kol, [(config, stage, passed, source)])"""
+        if not self.enabled:
+            return
+        self._ensure()
+        with closing(self._connect()) as conn:
+            audits = {}
+            for draft, kol, config, stage, passed, source in conn.execute(
+                    "SELECT draft, kol, config, stage, passed, source FROM audits ORDER BY created"):
+                entry = audits.setdefault(draft, ["", []])
+                entry[0] = kol or entry[0]
+                entry[1].append((config, stage, bool(passed), source))
+            for h, titles, body, tags in conn.execute("SELECT hash, titles, body, tags FROM drafts ORDER BY created"):
+                kol, runs = audits.get(h, ("", []))
+                yield h, json.loads(titles), body, tags, kol, runs
+
+    def flush(self):
+        """阻塞到队列里已登记的记录全部写完"""
+        if self.enabled and self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """写完剩余记录并停止后台线程"""
+        atexit.unregister(self.close)
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._thread = None
+
+    # ── 查询 ──
+
+    def _read(self, sql: str, params=()) -> list:
+        if not self.enabled:
+            return []
+        self._ensure()
+        with closing(self._connect()) as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def query(self, kol=None, config=None, stage=None, passed=None, failed_check=None,
+              since=None, until=None, source=None, limit: int = 100, offset: int = 0) -> list[dict]:
+        """按条件查审核记录，新的在前；每条含 第一个标题，完整结果用 draft() 取"""
+        where, params = _where(kol, config, stage, passed, failed_check, since, until, source)
+        rows = self._read(
+            f"SELECT {_COLUMNS}, d.titles FROM audits a JOIN drafts d ON d.hash = a.draft{where} "
+            "ORDER BY a.created DESC, a.id DESC LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        )
+        out = []
+        for r in rows:
+            rec = _row(r)
+            titles = json.loads(r[9])
+            rec["title"] = titles[0] if titles else ""
+            out.append(rec)
+        return out
+
+    def count(self, **filters) -> int:
+        where, params = _where(**filters)
+        rows = self._read(f"SELECT COUNT(*) FROM audits a{where}", params)
+        return rows[0][0] if rows else 0
+
+    def summary(self, **filters) -> dict:
+        """看板汇总（条件同 query）：总数、通过数、按方向 / 达人的通过率、各检查项未通过次数"""
+        where, params = _where(**filters)
+        total = self._read(f"SELECT COUNT(*), COALESCE(SUM(a.passed), 0) FROM audits a{where}", params)
+        by_config = self._read(
+            f"SELECT a.config, COUNT(*), SUM(a.passed) FROM audits a{where} GROUP BY a.config ORDER BY 2 DESC", params)
+        by_kol = self._read(
+            f"SELECT a.kol, COUNT(*), SUM(a.passed), COUNT(DISTINCT a.source) FROM audits a{where} "
+            "GROUP BY a.kol ORDER BY 2 DESC LIMIT 50", params)
+        by_check = self._read(
+            f"SELECT f.check_id, COUNT(*) FROM audit_failures f JOIN audits a ON a.id = f.audit{where} "
+            "GROUP BY f.check_id ORDER BY 2 DESC", params)
+        n, ok = total[0] if total else (0, 0)
+        rate = lambda p, c: round(p / c, 4) if c else 0.0
+        return {
+            "audits": n,
+            "passed": ok,
+            "pass_rate": rate(ok, n),
+            "by_config": [{"config": c, "audits": k, "passed": p, "pass_rate": rate(p, k)} for c, k, p in by_config],
+            "by_kol": [{"kol": c, "audits": k, "passed": p, "drafts": d, "pass_rate": rate(p, k)} for c, k, p, d in by_kol],
+            "failed_checks": dict(by_check),
+        }
+
+    def draft(self, h: str):
+        """稿件全文和以它为原稿的全部审核记录（含结果和修复变更）；不存在返回 None"""
+        rows = self._read("SELECT titles, body, tags FROM drafts WHERE hash = ?", (h,))
+        if not rows:
+            return None
+        titles, body, tags = rows[0]
+        audits = []
+        for r in self._read(
+                f"SELECT {_COLUMNS}, a.results, a.changes FROM audits a WHERE a.draft = ? OR a.source = ? "
+                "ORDER BY a.created, a.id", (h, h)):
+            rec = _row(r)
+            rec["results"] = json.loads(r[9])
+            rec["changes"] = json.loads(r[10]) if r[10] else None
+            audits.append(rec)
+        return {"hash": h, "titles": json.loads(titles), "body": body, "tags": tags, "audits": audits}
+
+
+def default_store() -> AuditStore:
+    path = load_env("AUDIT_DB", DEFAULT_PATH)
+    return AuditStore(None if path.lower() in ("off", "0", "false", "none") else path)
+
+
+HISTORY = default_store()
@@ -0,0 +1,133 @@
+"""进程内后台任务 - 长操作（AI 改写、docx 导出、大段 diff）不占用 Streamlit 脚本线程
+
+    job_id = JOBS.submit("AI 改写", run_ai_rewrite, titles, body, tags, config)
+    job = JOBS.get(job_id)        # job.state: pending / running / done / failed / cancelled
+    JOBS.cancel(job_id)
+
+需要汇报进度或响应取消的函数用 with_job=True 提交，第一个参数会收到 Job：
+    def work(job, ...):
+        job.set_progress(0.5, "生成中")
+        if job.cancel_requested(): return None
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from core.llm_backends import load_env
+
+PENDING, RUNNING, DONE, FAILED, CANCELLED = "pending", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class Job:
+    """单个后台任务的状态"""
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.state = PENDING
+        self.progress = 0.0
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.future = None
+        self._cancel = threading.Event()
+
+    def set_progress(self, progress: float, message: str = ""):
+        self.progress = max(0.0, min(1.0, progress))
+        if message:
+            self.message = message
+
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self.state in FINISHED
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id, "name": self.name, "state": self.state,
+            "progress": self.progress, "message": self.message, "error": self.error,
+            "elapsed": round((self.finished or time.time()) - (self.started or self.created), 3),
+        }
+
+
+class JobManager:
+    """线程池 + 任务表；已结束的任务最多保留 keep 个"""
+
+    def __init__(self, max_workers: int = 4, keep: int = 500):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._keep = keep
+
+    def submit(self, name: str, fn, *args, with_job: bool = False, **kwargs) -> str:
+        job = Job(name)
+
+        def run():
+            if job.cancel_requested():
+                job.state, job.finished = CANCELLED, time.time()
+                return
+            job.state, job.started = RUNNING, time.time()
+            try:
+                result = fn(job, *args, **kwargs) if with_job else fn(*args, **kwargs)
+            except Exception as e:
+                job.error = str(e) or type(e).__name__
+                job.state = FAILED
+            else:
+                if job.cancel_requested():
+                    job.state = CANCELLED
+                else:
+                    job.result = result
+                    job.progress = 1.0
+                    job.state = DONE
+            job.finished = time.time()
+
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+        job.future = self._executor.submit(run)
+        return job.id
+
+    def _evict(self):
+        if len(self._jobs) <= self._keep:
+            return
+        for jid in [jid for jid, j in self._jobs.items() if j.done][:len(self._jobs) - self._keep]:
+            del self._jobs[jid]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id) -> bool:
+        """请求取消：排队中的直接取消；运行中的由任务自行检查 cancel_requested()，结果会被丢弃"""
+        job = self.get(job_id)
+        if job is None or job.done:
+            return False
+        job._cancel.set()
+        if job.future is not None and job.future.cancel():
+            job.state, job.finished = CANCELLED, time.time()
+        return True
+
+    def wait(self, job_id, timeout=None):
+        """阻塞等待任务结束（压测 / 脚本用），返回 Job"""
+        job = self.get(job_id)
+        if job is not None and job.future is not None:
+            try:
+                job.future.result(timeout=timeout)
+            except Exception:
+                pass
+        return job
+
+    def active(self) -> list[dict]:
+        with self._lock:
+            return [j.to_dict() for j in self._jobs.values() if not j.done]
+
+
+JOBS = JobManager(max_workers=int(load_env("JOB_WORKERS", "4")))
@@ -0,0 +1,277 @@
+"""LLM 后端 - Gemini / 本地 Mock / HTTP 替身
+
+所有后端实现同一个接口 generate(prompt) -> dict：
+    {"text": 输出文本, "usage": {"prompt_tokens": int|None, "completion_tokens": int|None},
+     "ttft": 首 token 耗时（秒）|None}
+失败统一抛 LLMError，由 llm_client 转成 (None, error) 返回给 UI。
+
+选择方式（环境变量或 .env）：
+    LLM_BACKEND=gemini|mock|http     默认 gemini
+    MOCK_LLM_LATENCY=lognormal:0.8,0.4   延迟分布（秒），见 parse_latency
+    MOCK_LLM_ERROR_RATE=0.05         注入错误概率
+    MOCK_LLM_OUTPUT={body}           输出模板，可用 {body} {prompt} {n}
+    MOCK_LLM_CANNED=path.json        固定输出列表（JSON 数组，按调用次数轮换）
+    MOCK_LLM_SEED=42                 随机种子，保证可复现
+    LLM_HTTP_URL=http://127.0.0.1:8765/generate
+"""
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+
+try:
+    import google.generativeai as genai
+    HAS_GEMINI = True
+except ImportError:
+    HAS_GEMINI = False
+
+GEMINI_MODEL = "gemini-2.0-flash"
+DEFAULT_HTTP_URL = "http://127.0.0.1:8765/generate"
+
+
+class LLMError(Exception):
+    """LLM 调用失败"""
+
+
+def load_env(key: str, default: str = "") -> str:
+    """先读环境变量，再读项目根目录 .env"""
+    value = os.environ.get(key, "")
+    if value:
+        return value
+    env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".env")
+    if os.path.exists(env_path):
+        with open(env_path) as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith(f"{key}="):
+                    return line.split("=", 1)[1].strip()
+    return default
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中文约 1 字 1 token，其余按 4 字符 1 token"""
+    cjk = len(re.findall(r'[\u4e00-\u9fff]', text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+class LLMBackend:
+    """后端接口"""
+    name = "base"
+
+    def generate(self, prompt: str) -> dict:
+        raise NotImplementedError
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini"""
+    name = "gemini"
+
+    def __init__(self, api_key: str, model_name: str = GEMINI_MODEL):
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt: str) -> dict:
+        # 流式调用只为拿到首 token 时间，文本仍整段返回
+        t0 = time.perf_counter()
+        ttft = None
+        parts = []
+        try:
+            response = self.model.generate_content(prompt, stream=True)
+            for chunk in response:
+                if ttft is None:
+                    ttft = time.perf_counter() - t0
+                parts.append(chunk.text)
+        except Exception as e:
+            raise LLMError(str(e)) from e
+        meta = getattr(response, "usage_metadata", None)
+        return {
+            "text": "".join(parts),
+            "usage": {
+                "prompt_tokens": getattr(meta, "prompt_token_count", None),
+                "completion_tokens": getattr(meta, "candidates_token_count", None),
+            },
+            "ttft": ttft,
+        }
+
+
+def parse_latency(spec: str):
+    """解析延迟分布描述，返回 sampler(rng) -> 秒
+
+    支持：
+        const:0.5            固定 0.5s
+        uniform:0.2,1.5      均匀分布
+        normal:0.8,0.2       正态分布（截断到 >=0）
+        lognormal:0.8,0.4    对数正态，参数为中位数和 sigma，适合模拟长尾
+        exp:0.8              指数分布，参数为均值
+    """
+    spec = (spec or "const:0").strip()
+    kind, _, args = spec.partition(":")
+    try:
+        params = [float(x) for x in args.split(",") if x.strip()]
+    except ValueError:
+        raise ValueError(f"延迟分布参数错误: {spec}")
+
+    def need(n):
+        if len(params) != n:
+            raise ValueError(f"延迟分布 {kind} 需要 {n} 个参数: {spec}")
+
+    if kind == "const":
+        need(1)
+        return lambda rng: params[0]
+    if kind == "uniform":
+        need(2)
+        return lambda rng: rng.uniform(params[0], params[1])
+    if kind == "normal":
+        need(2)
+        return lambda rng: max(0.0, rng.gauss(params[0], params[1]))
+    if kind == "lognormal":
+        need(2)
+        if params[0] <= 0:
+            raise ValueError(f"lognormal 中位数必须大于 0: {spec}")
+        mu = math.log(params[0])
+        return lambda rng: rng.lognormvariate(mu, params[1])
+    if kind == "exp":
+        need(1)
+        return lambda rng: rng.expovariate(1.0 / params[0]) if params[0] > 0 else 0.0
+    raise ValueError(f"不支持的延迟分布: {spec}")
+
+
+def extract_prompt_body(prompt: str) -> str:
+    """从改写 prompt 中取出【原文】/【当前文案】段，供 Mock 回显"""
+    m = re.search(r'【原文】\n(.*?)\n【原文结束】', prompt, re.S)
+    if m:
+        return m.group(1)
+    m = re.search(r'【当前文案】(.*?)(?:\n|$)', prompt)
+    if m:
+        return m.group(1)
+    return prompt
+
+
+class MockBackend(LLMBackend):
+    """本地假后端：按配置的延迟分布 sleep，按概率注入错误，输出固定或模板文本
+
+    默认原样回显 prompt 中的原文，这样 auto_fix / 复检的工作量与真实改写相当。
+    """
+    name = "mock"
+
+    def __init__(self, latency="const:0", error_rate=0.0, template="{body}", canned=None, seed=None,
+                 ttft_ratio=0.25):
+        self.sample_latency = parse_latency(latency) if isinstance(latency, str) else latency
+        self.ttft_ratio = ttft_ratio
+        self.error_rate = float(error_rate)
+        self.template = template
+        self.canned = list(canned) if canned else None
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _next(self):
+        with self._lock:
+            n = self.calls
+            self.calls += 1
+            delay = self.sample_latency(self.rng)
+            fail = self.rng.random() < self.error_rate
+        return n, delay, fail
+
+    def render(self, prompt: str, n: int) -> str:
+        if self.canned:
+            return self.canned[n % len(self.canned)]
+        return self.template.format(body=extract_prompt_body(prompt), prompt=prompt, n=n)
+
+    def generate(self, prompt: str) -> dict:
+        n, delay, fail = self._next()
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            raise LLMError(f"mock 注入错误（第 {n + 1} 次调用）")
+        text = self.render(prompt, n)
+        return {
+            "text": text,
+            "usage": {
+                "prompt_tokens": estimate_tokens(prompt),
+                "completion_tokens": estimate_tokens(text),
+            },
+            "ttft": delay * self.ttft_ratio,
+        }
+
+
+class HTTPBackend(LLMBackend):
+    """HTTP 替身：POST {"prompt": ...} 到 core.mock_llm_server 或兼容服务"""
+    name = "http"
+
+    def __init__(self, url: str = DEFAULT_HTTP_URL, timeout: float = 60.0):
+        self.url = url
+        self.timeout = timeout
+
+    def generate(self, prompt: str) -> dict:
+        payload = json.dumps({"prompt": prompt}, ensure_ascii=False).encode("utf-8")
+        req = urllib.request.Request(self.url, data=payload, headers={"Content-Type": "application/json"})
+        t0 = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                ttft = time.perf_counter() - t0  # 非流式，以收到响应头为准
+                data = json.loads(resp.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            detail = e.read().decode("utf-8", "replace")
+            raise LLMError(f"HTTP {e.code}: {detail}") from e
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            raise LLMError(f"HTTP 后端不可用: {e}") from e
+        usage = data.get("usage", {})
+        return {
+            "text": data.get("text", ""),
+            "usage": {
+                "prompt_tokens": usage.get("prompt_tokens"),
+                "completion_tokens": usage.get("completion_tokens"),
+            },
+            "ttft": ttft,
+        }
+
+
+def mock_from_env() -> MockBackend:
+    """按 MOCK_LLM_* 环境变量构造 MockBackend"""
+    canned = None
+    canned_path = load_env("MOCK_LLM_CANNED")
+    if canned_path:
+        with open(canned_path, encoding="utf-8") as f:
+            canned = json.load(f)
+    seed = load_env("MOCK_LLM_SEED")
+    return MockBackend(
+        latency=load_env("MOCK_LLM_LATENCY", "const:0"),
+        error_rate=float(load_env("MOCK_LLM_ERROR_RATE", "0") or 0),
+        template=load_env("MOCK_LLM_OUTPUT", "{body}"),
+        canned=canned,
+        seed=int(seed) if seed else None,
+    )
+
+
+_mock_cache = {}
+
+
+def backend_from_env():
+    """按 LLM_BACKEND 选择后端；Gemini 未安装或缺 key 时返回 None
+
+    Mock 实例按参数缓存，保证同一进程内随机序列连续、可复现。
+    """
+    kind = load_env("LLM_BACKEND", "gemini").lower()
+    if kind == "mock":
+        key = tuple(load_env(k) for k in (
+            "MOCK_LLM_LATENCY", "MOCK_LLM_ERROR_RATE", "MOCK_LLM_OUTPUT", "MOCK_LLM_CANNED", "MOCK_LLM_SEED",
+        ))
+        if key not in _mock_cache:
+            _mock_cache[key] = mock_from_env()
+        return _mock_cache[key]
+    if kind == "http":
+        return HTTPBackend(load_env("LLM_HTTP_URL", DEFAULT_HTTP_URL))
+    if kind != "gemini":
+        raise ValueError(f"未知的 LLM_BACKEND: {kind}")
+    if not HAS_GEMINI:
+        return None
+    api_key = load_env("GOOGLE_API_KEY")
+    if not api_key:
+        return None
+    return GeminiBackend(api_key)
@@ -0,0 +1,181 @@
+"""LLM 调用计量 - 每次调用的 token / 耗时 / 重试 / 结果，按方向聚合成直方图
+
+导出：
+    METRICS.export_json()        -> dict（可直接 json.dumps）
+    METRICS.export_prometheus()  -> Prometheus 文本格式
+"""
+import threading
+import time
+from collections import deque
+
+# 直方图桶上界（最后一个隐含 +Inf）
+SIZE_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+SECONDS_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 40, 80)
+
+HISTOGRAMS = {
+    "llm_prompt_chars": ("prompt 字符数", SIZE_BUCKETS),
+    "llm_prompt_tokens": ("prompt token 数", SIZE_BUCKETS),
+    "llm_completion_tokens": ("输出 token 数", SIZE_BUCKETS),
+    "llm_wall_seconds": ("单次调用总耗时（含重试）", SECONDS_BUCKETS),
+    "llm_ttft_seconds": ("首 token 耗时", SECONDS_BUCKETS),
+}
+
+
+class Histogram:
+    """累积桶直方图（Prometheus 语义）"""
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, b in enumerate(self.bounds):
+            if value <= b:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """[(上界, 累计次数)]，最后一项上界为 +Inf"""
+        out, acc = [], 0
+        for b, c in zip(self.bounds + (float("inf"),), self.counts):
+            acc += c
+            out.append((b, acc))
+        return out
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "buckets": {("+Inf" if b == float("inf") else str(b)): c for b, c in self.cumulative()},
+        }
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(labels: tuple) -> str:
+    inner = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+    return "{" + inner + "}" if inner else ""
+
+
+class LLMMetrics:
+    """进程内计量注册表（线程安全）"""
+
+    def __init__(self, recent_size: int = 200):
+        self._lock = threading.Lock()
+        self._hist = {}       # (metric, labels) -> Histogram
+        self._counters = {}   # (metric, labels) -> int
+        self.recent = deque(maxlen=recent_size)
+
+    def reset(self):
+        with self._lock:
+            self._hist.clear()
+            self._counters.clear()
+            self.recent.clear()
+
+    def _inc(self, metric, labels, n=1):
+        key = (metric, labels)
+        self._counters[key] = self._counters.get(key, 0) + n
+
+    def _observe(self, metric, labels, value):
+        key = (metric, labels)
+        if key not in self._hist:
+            self._hist[key] = Histogram(HISTOGRAMS[metric][1])
+        self._hist[key].observe(value)
+
+    def record(self, rec: dict):
+        """记录一次调用
+
+        rec 字段：config, kind, backend, outcome(ok/error), prompt_chars, prompt_tokens,
+        prompt_tokens_source(usage/estimate), completion_tokens, wall_s, ttft_s, retries, error
+        """
+        rec = dict(rec, ts=time.time())
+        labels = (("config", rec.get("config", "")), ("kind", rec.get("kind", "")), ("backend", rec.get("backend", "")))
+        with self._lock:
+            self.recent.append(rec)
+            self._inc("llm_calls_total", labels + (("outcome", rec["outcome"]),))
+            if rec.get("retries"):
+                self._inc("llm_retries_total", labels, rec["retries"])
+            self._observe("llm_prompt_chars", labels, rec["prompt_chars"])
+            if rec.get("prompt_tokens") is not None:
+                self._observe("llm_prompt_tokens", labels, rec["prompt_tokens"])
+            self._observe("llm_wall_seconds", labels, rec["wall_s"])
+            if rec["outcome"] == "ok":
+                if rec.get("completion_tokens") is not None:
+                    self._observe("llm_completion_tokens", labels, rec["completion_tokens"])
+                if rec.get("ttft_s") is not None:
+                    self._observe("llm_ttft_seconds", labels, rec["ttft_s"])
+
+    def summary_by_config(self) -> list[dict]:
+        """按方向汇总：调用数、失败数、平均 prompt token、平均耗时（便于找出最贵的方向）"""
+        rows = {}
+        with self._lock:
+            for (metric, labels), n in self._counters.items():
+                cfg = dict(labels)["config"]
+                row = rows.setdefault(cfg, {"config": cfg, "calls": 0, "errors": 0, "retries": 0})
+                if metric == "llm_calls_total":
+                    row["calls"] += n
+                    if dict(labels)["outcome"] != "ok":
+                        row["errors"] += n
+                elif metric == "llm_retries_total":
+                    row["retries"] += n
+            for (metric, labels), h in self._hist.items():
+                cfg = dict(labels)["config"]
+                row = rows.setdefault(cfg, {"config": cfg, "calls": 0, "errors": 0, "retries": 0})
+                if metric in ("llm_prompt_tokens", "llm_wall_seconds"):
+                    acc = row.setdefault(metric, [0.0, 0])
+                    acc[0] += h.sum
+                    acc[1] += h.count
+        out = []
+        for row in rows.values():
+            for metric, name in (("llm_prompt_tokens", "avg_prompt_tokens"), ("llm_wall_seconds", "avg_wall_s")):
+                s, c = row.pop(metric, [0.0, 0])
+                row[name] = round(s / c, 3) if c else 0.0
+            out.append(row)
+        return sorted(out, key=lambda r: r["avg_prompt_tokens"], reverse=True)
+
+    def export_json(self) -> dict:
+        with self._lock:
+            return {
+                "counters": [
+                    {"name": m, "labels": dict(l), "value": v} for (m, l), v in sorted(self._counters.items())
+                ],
+                "histograms": [
+                    {"name": m, "labels": dict(l), **h.to_dict()} for (m, l), h in sorted(self._hist.items(), key=lambda x: x[0])
+                ],
+                "recent": list(self.recent),
+            }
+
+    def export_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            counter_names = sorted({m for m, _ in self._counters})
+            for name in counter_names:
+                lines.append(f"# TYPE {name} counter")
+                for (m, labels), v in sorted(self._counters.items()):
+                    if m == name:
+                        lines.append(f"{name}{_fmt_labels(labels)} {v}")
+            for name, (help_text, _) in HISTOGRAMS.items():
+                series = sorted(((l, h) for (m, l), h in self._hist.items() if m == name), key=lambda x: x[0])
+                if not series:
+                    continue
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, h in series:
+                    for b, c in h.cumulative():
+                        le = "+Inf" if b == float("inf") else str(b)
+                        lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', le),))} {c}")
+                    lines.append(f"{name}_sum{_fmt_labels(labels)} {h.sum}")
+                    lines.append(f"{name}_count{_fmt_labels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = LLMMetrics()
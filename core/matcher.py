@@ -0,0 +1,74 @@
+"""多模式匹配 - Aho-Corasick 自动机，一遍扫描找出所有模式的所有出现位置
+
+    ac = AhoCorasick(["过敏", "敏感", "最近"])
+    for start, end, idx in ac.find_all(text): ...
+
+    # 分块输入：状态带到下一块，跨块的匹配不会丢
+    state = 0
+    for offset, chunk in chunks:
+        state, hits = ac.feed(chunk, state, offset)
+
+模式可以是 str（按字符）也可以是 bytes（按字节），同一个自动机里不要混用。
+"""
+from collections import deque
+
+
+class AhoCorasick:
+    """goto / fail / output 三张表；节点 0 为根"""
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        for idx, pat in enumerate(self.patterns):
+            if not pat:
+                continue
+            node = 0
+            for sym in pat:
+                nxt = self._goto[node].get(sym)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][sym] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = nxt
+            self._out[node] += (idx,)
+        self._build_fail()
+        self.max_len = max((len(p) for p in self.patterns), default=0)
+
+    def _build_fail(self):
+        """广度优先求 fail 指针，同时把 goto + fail 展开成确定的转移表 _delta（扫描时每个字查一次表）"""
+        self._delta = [dict(self._goto[0])] + [None] * (len(self._goto) - 1)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for sym, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and sym not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(sym, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] += self._out[self._fail[nxt]]
+            if node:
+                delta = dict(self._delta[self._fail[node]])
+                delta.update(self._goto[node])
+                self._delta[node] = delta
+
+    def feed(self, text, state: int = 0, offset: int = 0):
+        """扫描一块输入，返回 (新状态, [(start, end, 模式下标)])，位置加上 offset"""
+        delta, out, patterns = self._delta, self._out, self.patterns
+        hits = []
+        for i, sym in enumerate(text):
+            state = delta[state].get(sym, 0)
+            if out[state]:
+                end = offset + i + 1
+                for idx in out[state]:
+                    hits.append((end - len(patterns[idx]), end, idx))
+        return state, hits
+
+    def find_all(self, text) -> list:
+        """全部出现位置（可重叠），按结束位置排序"""
+        return self.feed(text)[1]
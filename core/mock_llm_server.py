@@ -0,0 +1,91 @@
+"""本地 Mock LLM HTTP 服务 - 离线压测 / 延迟测试用
+
+用法：
+    python -m core.mock_llm_server --port 8765 --latency lognormal:0.8,0.4 --error-rate 0.05 --seed 42
+    LLM_BACKEND=http LLM_HTTP_URL=http://127.0.0.1:8765/generate streamlit run app.py
+
+POST /generate  {"prompt": "..."}  ->  200 {"text": "...", "usage": {...}}
+                                   ->  500 {"error": "..."}（按 error-rate 注入）
+GET  /health    ->  200 {"ok": true, "calls": n}
+"""
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from core.llm_backends import LLMError, MockBackend
+
+
+def make_handler(backend: MockBackend):
+    """构造绑定到指定 MockBackend 的请求处理类"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code, data):
+            body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, {"ok": True, "calls": backend.calls})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/generate":
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                prompt = json.loads(self.rfile.read(length).decode("utf-8"))["prompt"]
+            except (ValueError, KeyError) as e:
+                self._send(400, {"error": f"bad request: {e}"})
+                return
+            try:
+                self._send(200, backend.generate(prompt))
+            except LLMError as e:
+                self._send(500, {"error": str(e)})
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def serve(backend: MockBackend, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """创建服务（不启动循环），port=0 时自动分配端口"""
+    server = ThreadingHTTPServer((host, port), make_handler(backend))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Mock LLM HTTP 服务")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", default="const:0", help="延迟分布，如 lognormal:0.8,0.4")
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--template", default="{body}", help="输出模板，可用 {body} {prompt} {n}")
+    ap.add_argument("--canned", help="固定输出 JSON 数组文件")
+    ap.add_argument("--seed", type=int)
+    args = ap.parse_args()
+
+    canned = None
+    if args.canned:
+        with open(args.canned, encoding="utf-8") as f:
+            canned = json.load(f)
+    backend = MockBackend(args.latency, args.error_rate, args.template, canned, args.seed)
+    server = serve(backend, args.host, args.port)
+    print(f"Mock LLM 服务已启动: http://{args.host}:{server.server_port}/generate")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""近似重复稿件检测 - 上传时查出和以前审过的稿件几乎一样的正文（换方向 / 换活动、轻微改写后重投）
+
+    idx = near_dup_index()                 # 从审核历史库建好，之后随审核增量更新
+    idx.query(body)                        # [{source, draft, similarity, kol, configs}]，相似度从高到低
+    sig = signature(body)                  # 128 个 MinHash 值
+
+正文归一化后去掉空白和标点，切成 5 字的字符片段（shingle），每个片段用 crc32 取 32 位哈希，
+再用 128 组 (a·x + b) mod p 各取最小值得到 MinHash 签名；两个签名相同位置取值相同的比例
+即 Jaccard 相似度的估计。LSH 把 128 个值分成 32 段、每段 4 个值，任一段完全相同的稿件才进候选，
+查询只看候选，不随库的大小线性变慢（相似度 0.5 的稿件约 87% 进候选、0.6 的 99%，无关稿件几乎不进）；
+候选再用完整的 128 个值算相似度，不低于 0.5 的报出。
+阈值的取舍：每处改动会打断前后 5 个片段，改动一成词语（约 15 处）相似度就降到 0.65 左右，
+阈值 0.7 时这类改写稿只能查出约两成；降到 0.5 后改动一成的全部查出、改动两成的约两成，
+无关稿件仍不误报（bench/bench_near_dup.py 实测）。
+
+同一篇原稿的修复稿、改写稿、终稿按 source 归成一组，每组只报相似度最高的一篇。
+每篇记下首次登记时间：query(since=会话开始时间) 只排除本次会话 / 本批上传才登记的稿件，
+原样重投的旧稿（稿件 hash 相同）仍按相似度 1.0 报出。
+装了 numpy 时签名向量化计算，没有时逐个计算，结果相同。
+"""
+import random
+import re
+import threading
+import time
+import zlib
+from array import array
+
+from core.history import HISTORY
+from core.normalize import normalize
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+SHINGLE = 5
+NUM_PERM = 128
+BANDS, ROWS = 32, 4     # LSH 用全部 128 个签名值
+THRESHOLD = 0.5
+# 签名算法或参数变了就改版本号，历史库里存的旧签名会被重算
+SIG_KIND = "minhash5-128-v1"
+_MASK64 = (1 << 64) - 1
+
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def _params():
+    """固定种子的 multiply-shift 哈希参数：h(x) = ((a·x + b) mod 2^64) >> 32，a 为奇数"""
+    rnd = random.Random(20260101)
+    return [rnd.getrandbits(64) | 1 for _ in range(NUM_PERM)], [rnd.getrandbits(64) for _ in range(NUM_PERM)]
+
+
+_A, _B = _params()
+if HAS_NUMPY:
+    _A_NP = np.array(_A, dtype=np.uint64)[:, None]
+    _B_NP = np.array(_B, dtype=np.uint64)[:, None]
+    _SHIFT = np.uint64(32)
+
+
+def shingles(body: str) -> set:
+    """归一化、去掉空白和标点后的 5 字片段哈希集合；不足 5 字的整段算一个"""
+    text = _NON_WORD.sub("", normalize.__wrapped__(body).text)
+    if not text:
+        return set()
+    if len(text) <= SHINGLE:
+        return {zlib.crc32(text.encode("utf-8"))}
+    return {zlib.crc32(text[i:i + SHINGLE].encode("utf-8")) for i in range(len(text) - SHINGLE + 1)}
+
+
+def signature(body: str):
+    """MinHash 签名（NUM_PERM 个 32 位整数的 tuple）；正文为空返回 None"""
+    hashes = shingles(body)
+    if not hashes:
+        return None
+    if HAS_NUMPY:
+        # uint64 乘加溢出即取模 2^64
+        x = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))[None, :]
+        return tuple(((_A_NP * x + _B_NP) >> _SHIFT).min(axis=1).tolist())
+    return tuple(min(((a * x + b) & _MASK64) >> 32 for x in hashes) for a, b in zip(_A, _B))
+
+
+def similarity(sig1, sig2) -> float:
+    """两个签名的 Jaccard 估计"""
+    return sum(1 for u, v in zip(sig1, sig2) if u == v) / NUM_PERM
+
+
+def _bands(sig) -> list:
+    return [hash(sig[i * ROWS:(i + 1) * ROWS]) for i in range(BANDS)]
+
+
+class NearDupIndex:
+    """MinHash 签名 + LSH 分段桶；线程安全（写入线程增量更新，页面线程查询）"""
+
+    def __init__(self, threshold: float = THRESHOLD):
+        self.threshold = threshold
+        self._ids = {}        # 稿件 hash -> 编号
+        self._hashes = []     # 编号 -> 稿件 hash
+        self._sources = []    # 编号 -> 原稿 hash
+        self._sigs = []       # 编号 -> 签名（array('I')，每篇 512 字节）
+        self._kols = []
+        self._configs = []    # 编号 -> [方向]
+        self._first = []      # 编号 -> 首次登记时间戳
+        self._buckets = [{} for _ in range(BANDS)]   # 段 -> {段哈希: 编号 或 [编号]}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def add(self, h: str, titles, body: str, tags: str, kol: str = "", config: str = "", source: str = None,
+            sig=None, created: float = None, **_):
+        """登记一篇稿件（已登记的只合并达人 / 方向，首次登记时间取较早的），
+        可直接作为 AuditStore 的订阅回调；正文为空不登记"""
+        created = time.time() if created is None else created
+        with self._lock:
+            doc = self._ids.get(h)
+            if doc is None:
+                sig = sig or signature(body)
+                if sig is None:
+                    return None
+                doc = len(self._hashes)
+                self._ids[h] = doc
+                self._hashes.append(h)
+                self._sources.append(source or h)
+                self._sigs.append(array("I", sig))
+                self._kols.append(kol or "")
+                self._configs.append([])
+                self._first.append(created)
+                for bucket, key in zip(self._buckets, _bands(sig)):
+                    cur = bucket.get(key)
+                    # 大部分桶只有一篇，存编号本身省掉列表开销
+                    if cur is None:
+                        bucket[key] = doc
+                    elif isinstance(cur, list):
+                        cur.append(doc)
+                    else:
+                        bucket[key] = [cur, doc]
+            else:
+                if kol:
+                    self._kols[doc] = kol
+                if created < self._first[doc]:
+                    self._first[doc] = created
+            if config and config not in self._configs[doc]:
+                self._configs[doc].append(config)
+            return doc
+
+    def candidates(self, sig) -> set:
+        """至少一段签名完全相同的稿件编号"""
+        out = set()
+        with self._lock:
+            for bucket, key in zip(self._buckets, _bands(sig)):
+                cur = bucket.get(key)
+                if cur is None:
+                    continue
+                if isinstance(cur, list):
+                    out.update(cur)
+                else:
+                    out.add(cur)
+        return out
+
+    def query(self, body: str, threshold: float = None, limit: int = 5, exclude=(), sig=None,
+              since: float = None) -> list[dict]:
+        """与 body 近似重复的历史稿件（按原稿归组，每组取最相似的一篇），相似度从高到低
+
+        exclude 为要排除的稿件 / 原稿 hash；since 为时间戳，在它之后才首次登记的稿件不报
+        （本次会话、本批上传刚登记的），之前审过的同一稿件照常报出。结果里 first_seen 为首次登记时间。
+        """
+        threshold = self.threshold if threshold is None else threshold
+        sig = sig or signature(body)
+        if sig is None:
+            return []
+        best = {}
+        with self._lock:
+            for doc in self.candidates(sig):
+                h, source = self._hashes[doc], self._sources[doc]
+                if h in exclude or source in exclude or (since is not None and self._first[doc] >= since):
+                    continue
+                score = similarity(sig, self._sigs[doc])
+                if score >= threshold and score > best.get(source, (0.0,))[0]:
+                    best[source] = (score, doc)
+            out = [{"source": source, "draft": self._hashes[doc], "similarity": round(score, 3),
+                    "kol": self._kols[doc], "configs": list(self._configs[doc]), "first_seen": self._first[doc]}
+                   for source, (score, doc) in best.items()]
+        out.sort(key=lambda r: -r["similarity"])
+        return out[:limit]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "drafts": len(self._hashes),
+                "buckets": sum(len(b) for b in self._buckets),
+                "shared_buckets": sum(1 for b in self._buckets for v in b.values() if isinstance(v, list)),
+            }
+
+
+def build_index(store=HISTORY, subscribe: bool = True) -> NearDupIndex:
+    """从审核历史库建索引；subscribe=True 时之后每条审核记录落盘即增量加入
+
+    签名存回历史库（signatures 表），下次启动直接读取；本次运行中增量加入的稿件在下次建索引时补存。
+    """
+    idx = NearDupIndex()
+    if subscribe:
+        store.subscribe(idx.add)
+    stored = store.signatures(SIG_KIND)
+    times = store.draft_times()
+    new = []
+    for h, titles, body, tags, kol, runs in store.iter_audited():
+        blob = stored.get(h)
+        if blob is not None:
+            sig = array("I")
+            sig.frombytes(blob)
+            sig = tuple(sig)
+        else:
+            sig = signature(body)
+            if sig is not None:
+                new.append((h, array("I", sig).tobytes()))
+        if sig is None:
+            continue
+        created = times.get(h)
+        idx.add(h, titles, body, tags, kol=kol, source=runs[0][3] if runs else h, sig=sig, created=created)
+        for cfg, _, _, _ in runs:
+            idx.add(h, titles, body, tags, config=cfg, created=created)
+    store.save_signatures(SIG_KIND, new)
+    return idx
+
+
+_INDEX = None
+_INDEX_LOCK = threading.Lock()
+
+
+def near_dup_index() -> NearDupIndex:
+    """进程内共用的索引，第一次调用时从 HISTORY 建好"""
+    global _INDEX
+    if _INDEX is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                _INDEX = build_index()
+    return _INDEX
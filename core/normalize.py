@@ -0,0 +1,227 @@
+"""文本归一化 - 违禁词 / 关键词 / 标签匹配前先消除常见规避写法
+
+    nt = normalize(text)
+    idx = nt.text.find(normalize_word("过敏"))
+    start, end = nt.span(idx, idx + 2)          # 对应原文位置
+    nt.context(idx, idx + 2, 15)                # 原文上下文
+
+处理的规避写法：
+- 全角 / 半角（ＴＯＰ１ → top1），拉丁字母统一小写
+- 繁体 → 简体（過敏 → 过敏；内置常用字表，装了 opencc 时用完整字表）
+- 零宽字符（U+200B 等）
+- 中文词中间插空格（过 敏 → 过敏；#标签 之间的空格保留）
+
+字符映射是一对一的（str.translate），只有删除会改变位置，偏移表按「连续保留段」记录，
+原文位置用二分查找换算。映射和删除都先用正则定位（C 层扫描），Python 只处理命中的片段；
+没有需要删除的字符时偏移表为空。
+"""
+import bisect
+import re
+from functools import lru_cache
+
+try:
+    import opencc
+    HAS_OPENCC = True
+except ImportError:
+    HAS_OPENCC = False
+
+# 繁体 → 简体常用字（与下一行逐字对应）
+_T2S_TRAD = (
+    "專業兩個為爲麼書亂產從優會傳體內寫況準創別劑協賣壓參雙髮發號們嗎後國堅壯處備夠媽"
+    "孫學實寶對將屬歲廣庫張強彈徑復憂應戰擔撥擇擠換據擺數敵斷時條東來極標樣機權檢歐歷"
+    "歸殘氣沒溫滿潛無熱點愛燈爺牆現環畫當療癥盡監礦礎確禮種稱穩窮筆簽類係紀約紅純紙級"
+    "組細終經結絕給統絲綠維網緊線練續總績繼聯聲職膚腦膽臉與舉舊藝補裝製複見規視親覺觀"
+    "認討記許設訪證評試話該詳語說誰課調談請論諮講謝識議護讀變讓貝負財貨質購費資賴趕趙"
+    "跡踐車軟輕較輔輸轉辦農這進過達違遠適選遺還邊鄉醫釋裡裏針錯鍵鐘錢鐵長門問間開關閱"
+    "陽隊際隨險隱雖雞離難電靜響頁項順須預領頭題顏願顯風飛飯飲養餵館馬驗驚髒鬆魚鳥麗麥"
+    "齊齒龍營獲薦藥蟲衛術衝覽觸計訂詞譯讚豐貼買賽贊趨躍輪辭邏鄰釀鏡閉陳陸隻雜靈頓頻額"
+    "颱飄餅騙驟鬥鹽黃壞塊報場塵墊奮奪婦嬰寧審導尋層嶄幣幫廠廢廳異彎錄徵態懷懶戲擁擊擴"
+    "攝敗斂暫曆曉殺殼濃濕災爐狀獨獎瑪畢疊瘡癢皺盤眾衆礙禍積穀筍範節糧緒縮罰聖聞肅脅腎"
+    "膠舖艙莊萬葉蓋蘭蝦褲襪訓詢誌誕誤諾謎謹譜豬貓賞贏蹤軍載辯遞遲郵醜鈣鋅鎂鈉鉀錳銅閃"
+    "陣陰雲霧韌頸顧飢餓餘駐騰鬧鮮鴨鵝麵黴齡嬤錶兒腸臟潰瀉嘔癒痠癬嚥喚碼價偉傷億僅儲兇"
+    "淨減劃勁勞勢勵區華單厭員喪嚴團園圖圓壽夢夾奧寵屆島帶帳幹幾廟徹恆悅惡惱慣慮慶憑憶"
+    "懼戶拋捨掃掛揚損搖撐撫擬擾攜敘斬昇晉暈暢樂樹橋檔檯臺櫃歡氫決淚淺測湯溝滅滯滲漢漲"
+    "潔澀澤濁濾烏煉煩燒燙爭牽猶獸獻畝盜睏矯碩磚禦稅窩競築簡籃籤糾紋納紛紡紮絡綁綜綿緩"
+    "編縣縱繩繪繳纖罷羅習聰脹膩艱蓮蘇蘋虛蝕覓詐誇誠諸謀謠譽豎貢貫貴賀賓贈軌輩轟迴週遊"
+    "運醬鈴銀銳鋪鍋鎖鎮鏈闆闊頂頒顆餡饞驅驕鬍鷹黨於藍鍛頑頰噸囑穫嘗啟鹼樸瀏濟剛劍勸喬"
+    "壇夥傑軀腳膿臍蘆荊廁壺鍾鑽腫瘋瘧瘍癱嬌嫻嬸孃慘憐懸戀揀撿擋攤棄檸歎殤氾涼漁潑澆瀝"
+    "灑煙燭牠犢狹猙獄璣甕癲瞇矚祕稜穢竊筧糞紗絞綢緞縫繃繞繡纏罈翹聳艦芻蔣薑藉蘊蠟衊襯"
+    "覲訴詛誘諷謊譏讒貶賄賠賦贖踴軸輛輻轄遜遷遼釘鈍鉛銘銷鋒錦鍊鎊鏟鐮鑄鑑鑰閒閣闖闡隴"
+    "雋霑靨韻頹顫飽餞饒駁駕駛騎驢鬱魯鯨鳴鴻鵬鶴鷗黷齣齋龜嬭妳"
+)
+_T2S_SIMP = (
+    "专业两个为为么书乱产从优会传体内写况准创别剂协卖压参双发发号们吗后国坚壮处备够妈"
+    "孙学实宝对将属岁广库张强弹径复忧应战担拨择挤换据摆数敌断时条东来极标样机权检欧历"
+    "归残气没温满潜无热点爱灯爷墙现环画当疗症尽监矿础确礼种称稳穷笔签类系纪约红纯纸级"
+    "组细终经结绝给统丝绿维网紧线练续总绩继联声职肤脑胆脸与举旧艺补装制复见规视亲觉观"
+    "认讨记许设访证评试话该详语说谁课调谈请论咨讲谢识议护读变让贝负财货质购费资赖赶赵"
+    "迹践车软轻较辅输转办农这进过达违远适选遗还边乡医释里里针错键钟钱铁长门问间开关阅"
+    "阳队际随险隐虽鸡离难电静响页项顺须预领头题颜愿显风飞饭饮养喂馆马验惊脏松鱼鸟丽麦"
+    "齐齿龙营获荐药虫卫术冲览触计订词译赞丰贴买赛赞趋跃轮辞逻邻酿镜闭陈陆只杂灵顿频额"
+    "台飘饼骗骤斗盐黄坏块报场尘垫奋夺妇婴宁审导寻层崭币帮厂废厅异弯录征态怀懒戏拥击扩"
+    "摄败敛暂历晓杀壳浓湿灾炉状独奖玛毕叠疮痒皱盘众众碍祸积谷笋范节粮绪缩罚圣闻肃胁肾"
+    "胶铺舱庄万叶盖兰虾裤袜训询志诞误诺谜谨谱猪猫赏赢踪军载辩递迟邮丑钙锌镁钠钾锰铜闪"
+    "阵阴云雾韧颈顾饥饿余驻腾闹鲜鸭鹅面霉龄嬷表儿肠脏溃泻呕愈酸癣咽唤码价伟伤亿仅储凶"
+    "净减划劲劳势励区华单厌员丧严团园图圆寿梦夹奥宠届岛带帐干几庙彻恒悦恶恼惯虑庆凭忆"
+    "惧户抛舍扫挂扬损摇撑抚拟扰携叙斩升晋晕畅乐树桥档台台柜欢氢决泪浅测汤沟灭滞渗汉涨"
+    "洁涩泽浊滤乌炼烦烧烫争牵犹兽献亩盗困矫硕砖御税窝竞筑简篮签纠纹纳纷纺扎络绑综绵缓"
+    "编县纵绳绘缴纤罢罗习聪胀腻艰莲苏苹虚蚀觅诈夸诚诸谋谣誉竖贡贯贵贺宾赠轨辈轰回周游"
+    "运酱铃银锐铺锅锁镇链板阔顶颁颗馅馋驱骄胡鹰党于蓝锻顽颊吨嘱获尝启碱朴浏济刚剑劝乔"
+    "坛伙杰躯脚脓脐芦荆厕壶钟钻肿疯疟疡瘫娇娴婶娘惨怜悬恋拣捡挡摊弃柠叹殇泛凉渔泼浇沥"
+    "洒烟烛它犊狭狰狱玑瓮癫眯瞩秘棱秽窃笕粪纱绞绸缎缝绷绕绣缠坛翘耸舰刍蒋姜借蕴蜡蔑衬"
+    "觐诉诅诱讽谎讥谗贬贿赔赋赎踊轴辆辐辖逊迁辽钉钝铅铭销锋锦炼镑铲镰铸鉴钥闲阁闯阐陇"
+    "隽沾靥韵颓颤饱饯饶驳驾驶骑驴郁鲁鲸鸣鸿鹏鹤鸥黩出斋龟奶你"
+)
+
+_ZERO_WIDTH = "\u200b\u200c\u200d\u200e\u200f\u2060\ufeff\u00ad"
+GAP_CHARS = " \t\u3000" + _ZERO_WIDTH
+
+
+def _is_cjk(ch: str) -> bool:
+    return "\u4e00" <= ch <= "\u9fff" or "\u3400" <= ch <= "\u4dbf"
+
+
+def _build_table() -> dict:
+    table = {0x3000: ord(" "), 0xFF03: ord("#")}
+    for code in range(0xFF10, 0xFF1A):  # 全角数字
+        table[code] = code - 0xFEE0
+    for code in range(0xFF21, 0xFF3B):  # 全角大写直接映射到小写
+        table[code] = code - 0xFEE0 + 32
+    for code in range(0xFF41, 0xFF5B):  # 全角小写
+        table[code] = code - 0xFEE0
+    for code in range(ord("A"), ord("Z") + 1):
+        table[code] = code + 32
+    table.update({ord(t): ord(s) for t, s in zip(_T2S_TRAD, _T2S_SIMP)})
+    if HAS_OPENCC:
+        converter = opencc.OpenCC("t2s")
+        for code in range(0x4E00, 0xA000):
+            s = converter.convert(chr(code))
+            if len(s) == 1 and ord(s) != code:
+                table[code] = ord(s)
+    return table
+
+
+_TABLE = _build_table()
+# 需要映射的字符连续段：大多数稿件只有零星几处（英文大写、繁体字），逐段 translate 比整篇 translate 快
+_MAPPED = re.compile("[" + "".join(re.escape(chr(c)) for c in sorted(_TABLE)) + "]+")
+
+
+def _translate_run(m) -> str:
+    return m.group().translate(_TABLE)
+
+
+class NormText:
+    """归一化文本：text 为归一化结果，original 为原文
+
+    _segs 为 [(归一化起点, 原文起点)]，每段内一一对应；为空表示两者等长逐字对应。
+    """
+
+    __slots__ = ("text", "original", "_segs", "_starts")
+
+    def __init__(self, text: str, original: str, segs: list):
+        self.text = text
+        self.original = original
+        self._segs = segs
+        self._starts = [s[0] for s in segs]
+
+    def orig_index(self, i: int) -> int:
+        """归一化位置 → 原文位置"""
+        if not self._segs:
+            return i
+        k = bisect.bisect_right(self._starts, i) - 1
+        norm_start, orig_start = self._segs[k]
+        return orig_start + (i - norm_start)
+
+    def span(self, start: int, end: int) -> tuple:
+        """归一化区间 [start, end) → 原文区间（含被删掉的中间字符）"""
+        if end <= start:
+            o = self.orig_index(start)
+            return o, o
+        return self.orig_index(start), self.orig_index(end - 1) + 1
+
+    def original_slice(self, start: int, end: int) -> str:
+        s, e = self.span(start, end)
+        return self.original[s:e]
+
+    def context(self, start: int, end: int, pad: int) -> str:
+        """原文中命中位置前后各 pad 个字符"""
+        s, e = self.span(start, end)
+        return self.original[max(0, s - pad):min(len(self.original), e + pad)]
+
+
+# 标签边界：空白分隔标签，# 开始一个标签
+_TOKEN_MARKS = re.compile(r'[ \n\t#]')
+
+
+def _hashtag_gap(text: str, marks: list, start: int) -> bool:
+    """start 处的空白是否紧跟在一个 #标签 之后（标签之间的空格是分隔符，不能删）
+
+    marks 为 text 中全部空白 / # 的位置：start 之前最近的一个是 # 即说明在标签里。
+    （逐次 rfind 在缺某种空白的长文本上会一路扫回开头，退化成平方）
+    """
+    k = bisect.bisect_left(marks, start) - 1
+    return k >= 0 and text[marks[k]] == "#"
+
+
+def _gaps(text: str):
+    """空白 / 零宽字符的连续段 [start, end)；稿件里这类字符很少，逐字符 find 比正则扫全文快"""
+    positions = []
+    for ch in GAP_CHARS:
+        i = text.find(ch)
+        while i != -1:
+            positions.append(i)
+            i = text.find(ch, i + 1)
+    if not positions:
+        return
+    positions.sort()
+    start = prev = positions[0]
+    for i in positions[1:]:
+        if i != prev + 1:
+            yield start, prev + 1
+            start = i
+        prev = i
+    yield start, prev + 1
+
+
+def _deletions(text: str):
+    """逐个给出要删除的 [start, end)：零宽字符，以及夹在两个汉字之间、不在标签后面的空白"""
+    marks = None
+    for start, end in _gaps(text):
+        gap = text[start:end]
+        if not gap.strip(_ZERO_WIDTH):
+            yield start, end
+            continue
+        if start > 0 and end < len(text) and _is_cjk(text[start - 1]) and _is_cjk(text[end]):
+            if marks is None:
+                marks = [m.start() for m in _TOKEN_MARKS.finditer(text)]
+            if not _hashtag_gap(text, marks, start):
+                yield start, end
+                continue
+        for i, ch in enumerate(gap):
+            if ch in _ZERO_WIDTH:
+                yield start + i, start + i + 1
+
+
+@lru_cache(maxsize=64)
+def normalize(text: str) -> NormText:
+    """一遍归一化并生成偏移表（同一字符串重复调用直接取缓存）"""
+    mapped = _MAPPED.sub(_translate_run, text)
+    parts, segs = [], []
+    kept = pos = 0
+    for start, end in _deletions(mapped):
+        if start > pos:
+            segs.append((kept, pos))
+            parts.append(mapped[pos:start])
+            kept += start - pos
+        pos = end
+    if not segs and pos == 0:
+        return NormText(mapped, text, [])
+    segs.append((kept, pos))
+    parts.append(mapped[pos:])
+    return NormText("".join(parts), text, segs)
+
+
+@lru_cache(maxsize=4096)
+def normalize_word(word: str) -> str:
+    """规则里的词（违禁词、必提词、标签）按同样方式归一化"""
+    return normalize.__wrapped__(word).text
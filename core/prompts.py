@@ -0,0 +1,184 @@
+"""改写 prompt 编译 - 每个配置版本只编译一次，运行时只填正文槽位
+
+静态内容（人设、违禁词、必提词、去AI痕迹规则）全部排在前面，待改写文本放在最后，
+同一方向的多次调用共享完全相同的前缀，后端的前缀 / 上下文缓存可以直接命中。
+
+    python -m core.prompts [config_name ...]   # 打印各段 token 体积
+"""
+import hashlib
+import json
+import sys
+import threading
+
+from core.llm_backends import estimate_tokens
+
+BODY_SLOT = "{body}"
+
+ROLE_FULL = "你是一个真实的小红书博主，不是AI。请用你自己的语气改写文末的原文。"
+ROLE_SP = "你是一个真实的小红书博主，不是AI。用你自己的语气改写文末的卖点文案。"
+
+WORD_COUNT_RULE = "1. 字数严格控制在 {lo}-{hi} 字之间（中文字符数），绝对不能超过 {max} 字"
+
+HUMANIZE_RULES = """【去AI痕迹 - 让文字像真人写的（基于Humanizer反AI检查清单）】
+❌ 禁止使用AI典型句式：
+- 不要用"值得一提的是""总而言之""综上所述""不仅...而且...""无论...还是..."
+- 不要用"作为一个XX""说到XX""关于XX""众所周知"
+- 不要每句话都用"的""了""呢"结尾
+- 不要三段式排比（AI最爱凑三个并列）
+- 不要空洞的总结句（如"选它准没错""值得每个妈妈拥有"）
+- 不要用"重要的是""关键在于""核心是"这类伪深度表达
+
+✅ 要像真人这样写：
+- 句子长短交错，有时候一个词就是一句话。有时候拉长说
+- 要有自己的态度和反应（"我当时真的吓到了""说实话一开始我也犹豫"）
+- 可以有不确定感（"我也说不好""反正我家是这样"）
+- 像在微信里跟闺蜜语音转文字，有口语的碎片感
+- 适当用拼音缩写、网络用语（yyds、绝绝子、姐妹们）
+- 中间可以插一句跟主题无关的感叹（"天气好热啊说远了"）让文章更真实
+- 用具体的场景和细节，不要笼统概括"""
+
+STRUCTURE_RULES = """【结构要求】
+- 保持原文的内容结构顺序
+- 段落之间不要用生硬的过渡句，自然地聊下去就好"""
+
+SP_STYLE_RULES = """- 像跟闺蜜聊天一样写，句子长短交错，可以用语气词
+- 不要用AI味的句式（"不仅...而且""值得一提""作为一个"）
+- 不要三段排比，不要空洞总结"""
+
+
+class CompiledPrompt:
+    """编译后的 prompt：sections 为 [(段名, 文本)]，恰好一段含正文槽位 BODY_SLOT"""
+
+    def __init__(self, sections):
+        self.sections = sections
+        self.prefix, self.suffix = "\n\n".join(text for _, text in sections).split(BODY_SLOT, 1)
+
+    def render(self, body: str) -> str:
+        return self.prefix + body + self.suffix
+
+    def size_report(self) -> list[dict]:
+        """各段字符数 / token 数（正文槽位本身不计）"""
+        rows = []
+        for name, text in self.sections:
+            static = text.replace(BODY_SLOT, "")
+            rows.append({
+                "section": name,
+                "chars": len(static),
+                "tokens": estimate_tokens(static),
+                "has_slot": BODY_SLOT in text,
+            })
+        return rows
+
+
+def _dedupe(items):
+    seen, out = set(), []
+    for x in items:
+        if x and x not in seen:
+            seen.add(x)
+            out.append(x)
+    return out
+
+
+def _forbidden_rules(hr: dict) -> str:
+    """违禁词 + 替换写法 + 例外合并成一段，每个词只出现一次"""
+    items = []
+    for fw in hr.get("forbidden_words", []):
+        s = fw["word"]
+        if fw.get("replacement"):
+            s += f"→{fw['replacement']}"
+        if fw.get("exceptions"):
+            s += f"（仅允许：{'/'.join(fw['exceptions'])}）"
+        items.append(s)
+    lines = [
+        "⚠️ 绝对禁止出现以下违禁词，一个都不能有（→后为替换写法，括号内为仅允许的用法）：",
+        "、".join(items),
+    ]
+    for rule in hr.get("special_replacements", []):
+        lines.append(f"「{rule['find']}」必须写成「{rule['replace_with'][-1]}」")
+    return "\n".join(lines)
+
+
+def _required_keywords(paragraphs) -> list[str]:
+    return _dedupe(kw for para in paragraphs for sp in para.get("selling_points", [])
+                   for kw in sp.get("required_keywords", []))
+
+
+def compile_full_body(config: dict, paragraphs=None) -> CompiledPrompt:
+    """编译整篇改写 prompt"""
+    hr = config.get("hard_rules", {})
+    paragraphs = paragraphs if paragraphs is not None else hr.get("structure", {}).get("paragraphs", [])
+    wc = hr.get("word_count", {"min": 800, "max": 900})
+    # 目标区间两端各留 20 字安全余量
+    lo, hi = wc["min"] + 20, wc["max"] - 20
+    kw_str = "\n".join(f"- {kw}" for kw in _required_keywords(paragraphs))
+    return CompiledPrompt([
+        ("role", ROLE_FULL),
+        ("hard_rules", "【硬性要求 - 必须100%遵守】\n"
+                       + WORD_COUNT_RULE.format(lo=lo, hi=hi, max=wc["max"]) + "\n"
+                       + "2. 以下必提词必须原封不动保留（一字不差、不能省略、不能改写）：\n" + kw_str),
+        ("forbidden", "3. " + _forbidden_rules(hr)),
+        ("humanize", HUMANIZE_RULES),
+        ("structure", STRUCTURE_RULES),
+        ("body", "【原文】\n" + BODY_SLOT + "\n【原文结束】"),
+        ("instruction", "请直接输出改写后的完整正文，不要加任何解释或前言："),
+    ])
+
+
+def compile_selling_point(config: dict) -> CompiledPrompt:
+    """编译单卖点改写 prompt 的静态部分；卖点信息和当前文案一起填入正文槽位"""
+    sections = [("role", ROLE_SP)]
+    rules = "【要求】\n- 必须保留【必提词】（一字不差）\n" + SP_STYLE_RULES
+    sections.append(("rules", rules))
+    sections.append(("forbidden", _forbidden_rules(config.get("hard_rules", {}))))
+    sections.append(("selling_point", BODY_SLOT))
+    sections.append(("instruction", "只输出改写后的文字"))
+    return CompiledPrompt(sections)
+
+
+def config_fingerprint(config: dict) -> str:
+    """配置版本标识：load_config 已写入 _fingerprint 时直接使用"""
+    fp = config.get("_fingerprint")
+    if fp:
+        return fp
+    raw = json.dumps(config, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+_CACHE_MAX = 256
+
+
+def get_compiled(kind: str, config: dict) -> CompiledPrompt:
+    """按 (kind, 配置版本) 取编译结果，未命中时编译并缓存"""
+    key = (kind, config_fingerprint(config))
+    compiled = _cache.get(key)
+    if compiled is None:
+        compiled = compile_full_body(config) if kind == "full_body" else compile_selling_point(config)
+        with _cache_lock:
+            if len(_cache) >= _CACHE_MAX:
+                _cache.clear()
+            _cache[key] = compiled
+    return compiled
+
+
+def size_report(config: dict) -> list[dict]:
+    """整篇改写 prompt 各段 token 体积"""
+    return get_compiled("full_body", config).size_report()
+
+
+def main():
+    from core.config_loader import list_configs, load_config
+
+    names = sys.argv[1:] or [c["file"] for c in list_configs()]
+    for name in names:
+        rows = size_report(load_config(name))
+        total = sum(r["tokens"] for r in rows)
+        print(f"== {name}（静态部分约 {total} tokens）")
+        for r in rows:
+            slot = "  + 正文槽位" if r["has_slot"] else ""
+            print(f"  {r['section']:<14}{r['tokens']:>5} tokens  {r['chars']:>5} chars{slot}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""紧凑审核报告 - 带版本号的机器可读格式：检查项、是否通过、违规项 (类型, 规则编号, 起, 止)
+
+    rep = compact_report(titles, body, tags, config)       # 已有 run_all_checks 结果时传 results= 省去重跑
+    rep.to_json() / CompactReport.from_json(s)             # 紧凑 JSON
+    rep.to_bytes() / CompactReport.from_bytes(b)           # 二进制（struct 定长字段，一篇约一两百字节）
+    rep.expand(titles, body, tags, config)                 # 按需还原规则原文、命中原文和上下文
+    write_reports(reports, f) / read_reports(f)            # 大量报告顺序写入 / 读出（每条带长度前缀）
+
+run_all_checks 的结果带 message、context 等展示文本，下游要再解析，体积也随稿件变化很大；
+这里只存结论和位置，展示文本用 expand 从稿件原文和配置现算。
+
+位置是规范文本 canonical_text（标题逐行 + 正文 + 标签，即违禁词审核扫描的原文）里的字符下标，半开区间；
+缺关键词、缺标签、缺主题这类没有位置的违规记 -1。规则编号是配置中对应列表的下标（类型决定是哪个列表），
+报告里记了配置指纹，按指纹对应的那一版配置解读；稿件原文用 sha1 前 8 字节 + 长度校验。
+
+二进制格式（小端）：MAGIC "KR" + 版本(B) + 配置名长度(B) + 配置名 + 配置指纹(20s) + 原文 sha1(8s) + 原文长度(I)
++ 检查项数(B)，每个检查项：编号(B) + 是否通过(B) + 数值(i) + 违规数(H) + 违规 (类型 B, 规则 H, 起 i, 止 i) × 违规数。
+"""
+import hashlib
+import io
+import json
+import struct
+
+from core.hard_checks import _forbidden_hits, _special_hits, _tag_hits, run_all_checks
+from core.normalize import normalize
+from core.prompts import config_fingerprint
+
+VERSION = 1
+MAGIC = b"KR"
+
+# 检查项编号即下标，与 run_all_checks 的顺序一致；只能在末尾追加
+CHECK_IDS = ("word_count", "title_count", "title_keywords", "hashtags", "forbidden_words", "structure",
+             "selling_points")
+CHECK_NAMES = {
+    "word_count": "字数审核", "title_count": "标题数量审核", "title_keywords": "标题关键词审核",
+    "hashtags": "话题标签审核", "forbidden_words": "违禁词审核", "structure": "文章结构审核",
+    "selling_points": "卖点必提词审核",
+}
+
+# 违规类型：决定规则编号指向配置里的哪个列表；只能在末尾追加
+KIND_WORD = 0            # forbidden_words[i] 出现在正文 / 标题 / 标签中
+KIND_SPECIAL = 1         # special_replacements[i]
+KIND_TAG = 2             # forbidden_words[i] 出现在某个标签里（位置为整个标签）
+KIND_TITLE_KEYWORD = 3   # titles.keywords[i] 标题里没有
+KIND_HASHTAG = 4         # hashtags.required[i] 次数不足
+KIND_SECTION = 5         # structure.paragraphs[i] 缺少
+KIND_ORDER = 6           # structure.paragraphs[i] 排在了前一个主题之前
+KIND_SELLING_KEYWORD = 7  # 全部卖点必提词按配置顺序展开后的第 i 个缺失
+KIND_NAMES = ("word", "special", "tag", "title_keyword", "hashtag", "section", "order", "selling_keyword")
+
+_HEAD = struct.Struct("<20s8sIB")
+_CHECK = struct.Struct("<BBiH")
+_VIOLATION = struct.Struct("<BHii")
+_LEN = struct.Struct("<I")
+
+
+def canonical_text(titles, body: str, tags: str) -> str:
+    return "\n".join(titles) + "\n" + body + "\n" + tags
+
+
+def _text_digest(text: str) -> bytes:
+    return hashlib.sha1(text.encode("utf-8")).digest()[:8]
+
+
+def _selling_keywords(hr: dict) -> list:
+    """卖点必提词按 段落 → 卖点 → 必提词 的配置顺序展开"""
+    return [kw for p in hr["structure"]["paragraphs"] for sp in p["selling_points"] for kw in sp["required_keywords"]]
+
+
+class CompactReport:
+    """一篇稿件的紧凑审核报告；checks 为 [(检查项 ID, 是否通过, 数值, [(类型, 规则编号, 起, 止)])]"""
+
+    __slots__ = ("config", "fingerprint", "text_sha1", "text_len", "checks")
+
+    def __init__(self, config: str, fingerprint: str, text_sha1: bytes, text_len: int, checks: list):
+        self.config = config
+        self.fingerprint = fingerprint
+        self.text_sha1 = text_sha1
+        self.text_len = text_len
+        self.checks = checks
+
+    @property
+    def passed(self) -> bool:
+        return all(c[1] for c in self.checks)
+
+    @property
+    def failed(self) -> list:
+        return [c[0] for c in self.checks if not c[1]]
+
+    def __eq__(self, other):
+        return isinstance(other, CompactReport) and all(getattr(self, k) == getattr(other, k) for k in self.__slots__)
+
+    def __repr__(self):
+        return f"CompactReport({self.config!r}, passed={self.passed}, failed={self.failed})"
+
+    # ── JSON ──
+
+    def to_dict(self) -> dict:
+        return {
+            "v": VERSION,
+            "config": self.config,
+            "fp": self.fingerprint,
+            "text": [self.text_sha1.hex(), self.text_len],
+            "checks": [{"id": cid, "pass": ok, "value": value, "violations": [list(v) for v in violations]}
+                       for cid, ok, value, violations in self.checks],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CompactReport":
+        if data.get("v") != VERSION:
+            raise ValueError(f"不支持的报告版本: {data.get('v')}")
+        return cls(data["config"], data["fp"], bytes.fromhex(data["text"][0]), data["text"][1],
+                   [(c["id"], c["pass"], c["value"], [tuple(v) for v in c["violations"]]) for c in data["checks"]])
+
+    @classmethod
+    def from_json(cls, s) -> "CompactReport":
+        return cls.from_dict(json.loads(s))
+
+    # ── 二进制 ──
+
+    def to_bytes(self) -> bytes:
+        name = self.config.encode("utf-8")
+        parts = [MAGIC, bytes((VERSION, len(name))), name,
+                 _HEAD.pack(bytes.fromhex(self.fingerprint), self.text_sha1, self.text_len, len(self.checks))]
+        for cid, ok, value, violations in self.checks:
+            parts.append(_CHECK.pack(CHECK_IDS.index(cid), ok, value, len(violations)))
+            parts.extend(_VIOLATION.pack(*v) for v in violations)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data) -> "CompactReport":
+        data = memoryview(data)
+        if bytes(data[:2]) != MAGIC:
+            raise ValueError("不是紧凑审核报告")
+        if data[2] != VERSION:
+            raise ValueError(f"不支持的报告版本: {data[2]}")
+        pos = 4 + data[3]
+        name = bytes(data[4:pos]).decode("utf-8")
+        fp, sha, text_len, n = _HEAD.unpack_from(data, pos)
+        pos += _HEAD.size
+        checks = []
+        for _ in range(n):
+            code, ok, value, nv = _CHECK.unpack_from(data, pos)
+            pos += _CHECK.size
+            violations = list(_VIOLATION.iter_unpack(data[pos:pos + nv * _VIOLATION.size]))
+            pos += nv * _VIOLATION.size
+            checks.append((CHECK_IDS[code], bool(ok), value, violations))
+        return cls(name, fp.hex(), sha, text_len, checks)
+
+    # ── 展示 ──
+
+    def expand(self, titles, body: str, tags: str, config: dict, context: int = 15) -> list[dict]:
+        """还原展示用的明细：每个检查项 {id, name, pass, value, violations: [{kind, rule, start, end, matched, context}]}
+
+        稿件原文或配置版本与报告不符时抛出 ValueError。
+        """
+        text = canonical_text(titles, body, tags)
+        if len(text) != self.text_len or _text_digest(text) != self.text_sha1:
+            raise ValueError("报告与稿件原文不匹配")
+        if config_fingerprint(config) != self.fingerprint:
+            raise ValueError(f"报告基于另一版配置（{self.fingerprint[:8]}），规则编号无法对应")
+        hr = config["hard_rules"]
+        rules = {
+            KIND_WORD: [fw["word"] for fw in hr["forbidden_words"]],
+            KIND_SPECIAL: [r["find"] for r in hr.get("special_replacements", [])],
+            KIND_TITLE_KEYWORD: hr["titles"]["keywords"],
+            KIND_HASHTAG: [r["tag"] for r in hr["hashtags"]["required"]],
+            KIND_SECTION: [p["name"] for p in hr["structure"]["paragraphs"]],
+            KIND_SELLING_KEYWORD: _selling_keywords(hr),
+        }
+        rules[KIND_TAG] = rules[KIND_WORD]
+        rules[KIND_ORDER] = rules[KIND_SECTION]
+        out = []
+        for cid, ok, value, violations in self.checks:
+            items = []
+            for kind, rule, start, end in violations:
+                item = {"kind": KIND_NAMES[kind], "rule": rules[kind][rule], "start": start, "end": end}
+                if start >= 0:
+                    item["matched"] = text[start:end]
+                    item["context"] = text[max(0, start - context):end + context]
+                items.append(item)
+            out.append({"id": cid, "name": CHECK_NAMES[cid], "pass": ok, "value": value, "violations": items})
+        return out
+
+
+def _violations(cid: str, r: dict, full: str, hr: dict) -> tuple:
+    """从 run_all_checks 的单项结果取 (数值, 违规列表)"""
+    if cid == "word_count":
+        return r["value"], []
+    if cid == "title_count":
+        return r["value"], []
+    if cid == "title_keywords":
+        return 0, [(KIND_TITLE_KEYWORD, i, -1, -1) for i, d in enumerate(r["details"]) if not d["found"]]
+    if cid == "hashtags":
+        return 0, [(KIND_HASHTAG, i, -1, -1) for i, d in enumerate(r["details"]) if not d["pass"]]
+    if cid == "forbidden_words":
+        # 与 check_forbidden_words 用同一组命中生成器，归一化结果有缓存
+        nt = normalize(full)
+        fw_index = {id(fw): i for i, fw in enumerate(hr["forbidden_words"])}
+        sr_index = {id(rule): i for i, rule in enumerate(hr.get("special_replacements", []))}
+        word_index = {}
+        for i, fw in enumerate(hr["forbidden_words"]):
+            word_index.setdefault(fw["word"], i)
+        out = [(KIND_WORD, fw_index[id(fw)], *nt.span(idx, idx + len(word)))
+               for fw, word, idx in _forbidden_hits(nt.text, hr["forbidden_words"])]
+        out += [(KIND_SPECIAL, sr_index[id(rule)], *nt.span(idx, idx + len(find)))
+                for rule, find, idx in _special_hits(nt.text, hr.get("special_replacements", []))]
+        out += [(KIND_TAG, word_index[word], e.start, e.start + len(e.tag)) for e, word in _tag_hits(full, hr)]
+        return 0, out
+    if cid == "structure":
+        out = [(KIND_SECTION, i, -1, -1) for i, d in enumerate(r["detected"]) if not d["found"]]
+        last = None
+        for i, d in enumerate(r["detected"]):
+            if not d["found"]:
+                continue
+            if last is not None and d["position"] < last:
+                out.append((KIND_ORDER, i, -1, -1))
+            last = d["position"] if last is None else max(last, d["position"])
+        return int(r["order_correct"]), out
+    if cid == "selling_points":
+        out, k = [], 0
+        for p in r["paragraphs"]:
+            for sp in p["selling_points"]:
+                for kw in sp.get("keywords", []):
+                    if not kw["found"]:
+                        out.append((KIND_SELLING_KEYWORD, k, -1, -1))
+                    k += 1
+        return r["passed"], out
+    raise ValueError(f"未知的检查项: {cid}")
+
+
+def compact_report(titles, body: str, tags: str, config: dict, results: list = None) -> CompactReport:
+    """审核一篇稿件（或转换已有的 run_all_checks 结果）为紧凑报告"""
+    if results is None:
+        results = run_all_checks(titles, body, tags, config)
+    hr = config["hard_rules"]
+    full = canonical_text(titles, body, tags)
+    checks = []
+    for r in results:
+        value, violations = _violations(r["id"], r, full, hr)
+        checks.append((r["id"], bool(r["pass"]), value, violations))
+    return CompactReport(config.get("_name", ""), config_fingerprint(config), _text_digest(full), len(full), checks)
+
+
+def write_reports(reports, f) -> int:
+    """二进制报告逐条写入文件对象（4 字节长度前缀），返回条数"""
+    n = 0
+    for rep in reports:
+        data = rep.to_bytes()
+        f.write(_LEN.pack(len(data)))
+        f.write(data)
+        n += 1
+    return n
+
+
+def read_reports(f):
+    """逐条读出 write_reports 写入的报告"""
+    if isinstance(f, (bytes, bytearray, memoryview)):
+        f = io.BytesIO(f)
+    while True:
+        head = f.read(_LEN.size)
+        if len(head) < _LEN.size:
+            return
+        (n,) = _LEN.unpack(head)
+        yield CompactReport.from_bytes(f.read(n))
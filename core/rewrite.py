@@ -0,0 +1,208 @@
+"""单遍改写表 - 加载配置时把违禁词替换、特殊替换、问题标签编译成一张闭包后的替换表
+
+    tables = compile_rewrite_rules(config["hard_rules"])   # 有循环 / 冲突时抛 ValueError
+    text, counts = tables["body"].apply(text)
+
+编译时：
+- 每条规则的替换结果再用其余规则改写到不动点（传递闭包），替换结果里不会再出现任何待替换词
+- 替换链成环（A→…A→…）、同一个词两条规则给出不同结果、替换结果含无法自动修复的违禁词、
+  必带标签或问题标签的修复结果会被改写，都在这里报错
+- 例外用法（如「最近」之于「最」、「第一口奶粉」之于「第一口奶」）编译成原样保留的条目
+
+运行时在归一化文本上按「最左、最长」扫描（繁体、全角、词中空格等规避写法与审核一样算命中），
+替换按偏移表写回原文；替换结果与前后文拼出的新违禁词再扫一轮处理，所以一次 apply 的输出再 apply 不会再变。
+
+问题标签（配置 problem_tags）按整个标签修复，不在这里，见 tags.py；标签行先修问题标签再过 tags 表。
+"""
+import re
+import threading
+
+from core.normalize import normalize, normalize_word
+from core.prompts import config_fingerprint
+
+
+class RewriteTable:
+    """key -> 输出；rules[i] 为 {"type", "old", "new"}，保留条目的规则下标为 None
+
+    key 按归一化写法在归一化文本上匹配（与审核相同，過敏、奶 瓶、ＴＯＰ１ 都算命中），
+    替换写回原文里对应的区间，命中以外的原文不动。
+    """
+
+    def __init__(self, entries: dict, rules: list):
+        self.entries = entries        # key -> (out, rule_idx)
+        self.rules = rules
+        self._keys = {}               # 归一化 key -> key；同一写法有保留条目时以保留为准
+        for key, (_, rule) in entries.items():
+            norm = normalize_word(key)
+            if norm and (norm not in self._keys or rule is None):
+                self._keys[norm] = key
+        self.max_len = max((len(k) for k in self._keys), default=0)
+        keys = sorted(self._keys, key=len, reverse=True)
+        self._pattern = re.compile("|".join(map(re.escape, keys))) if keys else None
+
+    def _hits(self, text: str) -> list:
+        """按「最左、最长」扫描归一化文本，返回要改写的 [(原文起点, 原文终点, key)]；例外用法占住位置但不改写"""
+        if self._pattern is None:
+            return []
+        nt = normalize(text)
+        hits = []
+        for m in self._pattern.finditer(nt.text):
+            key = self._keys[m.group()]
+            if self.entries[key][1] is not None:
+                start, end = nt.span(m.start(), m.end())
+                hits.append((start, end, key))
+        return hits
+
+    def apply(self, text: str):
+        """改写到不动点，返回 (新文本, {rule_idx: 次数})
+
+        每轮把全部命中一次写回原文；替换结果与前后文拼出新的命中时再扫一轮，没有命中即返回。
+        """
+        counts = {}
+        guard = 4 * (len(text) + 1) * max(self.max_len, 1)
+        while True:
+            hits = self._hits(text)
+            if not hits:
+                return text, counts
+            parts, pos = [], 0
+            for start, end, key in hits:
+                out, rule = self.entries[key]
+                counts[rule] = counts.get(rule, 0) + 1
+                parts += (text[pos:start], out)
+                pos = end
+            parts.append(text[pos:])
+            text = "".join(parts)
+            guard -= len(hits)
+            if guard < 0:
+                raise ValueError("替换规则在文本拼接处反复触发，无法收敛")
+
+    def matched_keys(self, text: str) -> list[str]:
+        """text 中按扫描顺序会被改写的 key（不做替换）"""
+        return [key for _, _, key in self._hits(text)]
+
+
+def _add(entries, key, out, rule, source):
+    """登记一个条目；同一 key 两条规则结果不同视为冲突"""
+    if not key:
+        return
+    old = entries.get(key)
+    if old is not None and old[0] != out:
+        raise ValueError(f"替换规则冲突：「{key}」同时被改写为「{old[0]}」和「{out}」（{source}）")
+    if old is None or old[1] is None:
+        entries[key] = (out, rule)
+
+
+def _forbidden_entries(hr, entries, rules):
+    for fw in hr.get("forbidden_words", []):
+        replacement = fw.get("replacement", "")
+        if not replacement:
+            continue  # 没有替换建议的不自动修复
+        rules.append({"type": "违禁词", "old": fw["word"], "new": replacement})
+        _add(entries, fw["word"], replacement, len(rules) - 1, f"违禁词 {fw['word']}")
+        for exc in fw.get("exceptions", []):
+            _add(entries, exc, exc, None, f"违禁词 {fw['word']} 的例外")
+
+
+def _special_entries(hr, entries, rules):
+    for rule in hr.get("special_replacements", []):
+        find = rule["find"]
+        replace = rule["replace_with"][-1]  # 用最后一个选项
+        rules.append({"type": "特殊替换", "old": find, "new": replace})
+        _add(entries, find, replace, len(rules) - 1, f"特殊替换 {find}")
+        # 后面紧跟指定字符（如"粉"）、或已经是完整替换词的一部分时保留
+        if rule.get("skip_if_followed_by"):
+            _add(entries, find + rule["skip_if_followed_by"], find + rule["skip_if_followed_by"], None, f"特殊替换 {find}")
+        if find in replace:
+            _add(entries, replace, replace, None, f"特殊替换 {find}")
+
+
+def _close(entries, rules):
+    """替换结果做传递闭包；替换链成环时报错"""
+    probe = RewriteTable(entries, rules)
+    deps = {k: probe.matched_keys(out) for k, (out, rule) in entries.items() if rule is not None}
+    state, order = {}, []
+
+    def visit(key, path):
+        if state.get(key) == "done":
+            return
+        if state.get(key) == "visiting":
+            cycle = path[path.index(key):] + [key]
+            raise ValueError(f"替换规则存在循环：{' → '.join(cycle)}")
+        state[key] = "visiting"
+        for dep in deps[key]:
+            visit(dep, path + [key])
+        state[key] = "done"
+        order.append(key)
+
+    for key in deps:
+        visit(key, [])
+
+    closed = dict(entries)
+    table = RewriteTable(closed, rules)  # 与 closed 共用条目，下面逐个更新结果
+    for key in order:  # 依赖在前，改写每个结果时它用到的条目都已闭包
+        out, rule = closed[key]
+        out, _ = table.apply(out)
+        closed[key] = (out, rule)
+        rules[rule]["new"] = out
+    return closed
+
+
+def _check_unfixable(hr, table):
+    """替换结果不能引入无法自动修复的违禁词（例外用法除外）"""
+    for key, (out, rule) in table.entries.items():
+        if rule is None or not out:
+            continue
+        norm_out = normalize_word(out)
+        for fw in hr.get("forbidden_words", []):
+            word = normalize_word(fw["word"])
+            if fw.get("replacement") or word not in norm_out:
+                continue
+            covered = any(word in normalize_word(exc) and normalize_word(exc) in norm_out
+                          for exc in fw.get("exceptions", []))
+            if not covered:
+                raise ValueError(f"「{key}」的替换结果「{out}」含违禁词「{fw['word']}」")
+
+
+def _build(hr, parts):
+    entries, rules = {}, []
+    if "forbidden" in parts:
+        _forbidden_entries(hr, entries, rules)
+    if "special" in parts:
+        _special_entries(hr, entries, rules)
+    table = RewriteTable(_close(entries, rules), rules)
+    _check_unfixable(hr, table)
+    return table
+
+
+def compile_rewrite_rules(hr: dict) -> dict:
+    """编译各作用域的改写表：正文（违禁词 + 特殊替换）、标签和标题（违禁词）"""
+    tables = {"body": _build(hr, ("forbidden", "special"))}
+    tables["tags"] = tables["titles"] = _build(hr, ("forbidden",))
+    for req in hr.get("hashtags", {}).get("required", []):
+        fixed, _ = tables["tags"].apply(req["tag"])
+        if fixed != req["tag"]:
+            raise ValueError(f"必带标签「{req['tag']}」会被自动修复改成「{fixed}」")
+    for bad_tag, good_tag in hr.get("problem_tags", {}).items():
+        if not bad_tag.startswith("#") or (good_tag and not good_tag.startswith("#")):
+            raise ValueError(f"问题标签「{bad_tag}」→「{good_tag}」必须以 # 开头")
+        if good_tag and tables["tags"].apply(good_tag)[0] != good_tag:
+            raise ValueError(f"问题标签「{bad_tag}」的修复结果「{good_tag}」含待替换的违禁词")
+    return tables
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+_CACHE_MAX = 64
+
+
+def get_rewrite_tables(config: dict) -> dict:
+    """按配置版本取编译好的改写表"""
+    key = config_fingerprint(config)
+    tables = _cache.get(key)
+    if tables is None:
+        tables = compile_rewrite_rules(config["hard_rules"])
+        with _cache_lock:
+            if len(_cache) >= _CACHE_MAX:
+                _cache.clear()
+            _cache[key] = tables
+    return tables
@@ -0,0 +1,167 @@
+"""推测式预计算 - 初审后在后台先跑一键修复 + 复检，再跑 AI 改写
+
+几乎每篇稿件初审后都会点「一键修复」和「AI 一键人话改写」，这里提前在后台线程里算好，
+结果按内容哈希存放，点击时直接取用：
+    一键修复：按原稿内容（标题/正文/标签 + 配置版本）取
+    AI 改写：按修复后内容取（用户改了修复稿就自然失效，重新调用）
+
+结果在进程内共享，相同内容只算一次；缓存有上限，按最近使用淘汰。任务跑在 jobs.JOBS 线程池上。
+"""
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from core.ai_pipeline import run_ai_rewrite
+from core.auto_fix import auto_fix_all
+from core.hard_checks import run_all_checks
+from core.jobs import JOBS
+from core.llm_backends import load_env
+from core.prompts import config_fingerprint
+
+MAX_ENTRIES = 128
+
+_lock = threading.Lock()
+_fix = OrderedDict()   # 原稿 key -> Future[(titles, body, tags, changes, results)]
+_ai = OrderedDict()    # 修复稿 key -> Future[(ai_body, ai_results, error)]
+
+
+def enabled_by_default() -> bool:
+    return load_env("SPECULATIVE_PRECOMPUTE", "0").lower() in ("1", "true", "yes", "on")
+
+
+def content_key(titles, body, tags, config) -> str:
+    """稿件内容 + 配置版本的哈希"""
+    raw = json.dumps([list(titles), body, tags, config_fingerprint(config)], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _claim(store, key):
+    """key 未登记时登记一个新 Future 并返回它；已登记返回 None"""
+    with _lock:
+        if key in store:
+            store.move_to_end(key)
+            return None
+        future = Future()
+        store[key] = future
+        while len(store) > MAX_ENTRIES:
+            store.popitem(last=False)
+        return future
+
+
+def _run(titles, body, tags, config, fix_future):
+    try:
+        ft, fb, ftg, changes = auto_fix_all(titles, body, tags, config)
+        fix_future.set_result((ft, fb, ftg, changes, run_all_checks(ft, fb, ftg, config)))
+    except Exception as e:
+        fix_future.set_exception(e)
+        return
+
+    ai_future = _claim(_ai, content_key(ft, fb, ftg, config))
+    if ai_future is not None:
+        _run_ai(ft, fb, ftg, config, ai_future)
+
+
+def _run_ai(titles, body, tags, config, ai_future):
+    try:
+        ai_future.set_result(run_ai_rewrite(titles, body, tags, config))
+    except Exception as e:
+        ai_future.set_exception(e)
+
+
+def _failed(future) -> bool:
+    """已完成但抛了异常或改写失败（结果为 (None, None, error)）"""
+    if not future.done():
+        return False
+    if future.exception() is not None:
+        return True
+    result = future.result()
+    return isinstance(result, tuple) and len(result) == 3 and result[0] is None
+
+
+def _drop(store, key, future):
+    with _lock:
+        if store.get(key) is future:
+            del store[key]
+
+
+def start(titles, body, tags, config) -> str:
+    """提交预计算（已在算或已算好则跳过），返回原稿 key
+
+    一键修复已算好、但对应的 AI 改写失败后被丢弃时，只重新提交 AI 改写。
+    """
+    key = content_key(titles, body, tags, config)
+    fix_future = _claim(_fix, key)
+    if fix_future is not None:
+        JOBS.submit("预计算", _run, list(titles), body, tags, config, fix_future)
+        return key
+    with _lock:
+        fix_future = _fix.get(key)
+    if fix_future is not None and fix_future.done() and fix_future.exception() is None:
+        ft, fb, ftg = fix_future.result()[:3]
+        ai_future = _claim(_ai, content_key(ft, fb, ftg, config))
+        if ai_future is not None:
+            JOBS.submit("预计算", _run_ai, list(ft), fb, ftg, config, ai_future)
+    return key
+
+
+def _get(store, key, timeout):
+    with _lock:
+        future = store.get(key)
+    if future is None:
+        return None
+    try:
+        return copy.deepcopy(future.result(timeout=timeout))
+    except FutureTimeout:
+        return None
+    except Exception:
+        return None
+
+
+def get_fix(titles, body, tags, config, timeout=0):
+    """取一键修复预计算结果 (titles, body, tags, changes, results)，没有或未完成返回 None"""
+    return _get(_fix, content_key(titles, body, tags, config), timeout)
+
+
+def get_ai(titles, body, tags, config, timeout=None):
+    """取 AI 改写预计算结果 (ai_body, ai_results, error)
+
+    改写已在进行中时默认等它完成（比重新调用快）；未提交或调用失败返回 None。
+    """
+    key = content_key(titles, body, tags, config)
+    result = _get(_ai, key, timeout)
+    if result is None or result[0] is None:
+        _drop_if_failed(key)
+        return None
+    return result
+
+
+def _drop_if_failed(key):
+    with _lock:
+        future = _ai.get(key)
+    if future is not None and _failed(future):
+        _drop(_ai, key, future)
+
+
+def ai_status(titles, body, tags, config) -> str:
+    """修复稿对应的后台改写状态：none / running / done；失败的改写丢弃并返回 none，之后可以重新提交"""
+    key = content_key(titles, body, tags, config)
+    with _lock:
+        future = _ai.get(key)
+    if future is None:
+        return "none"
+    if not future.done():
+        return "running"
+    if _failed(future):
+        _drop(_ai, key, future)
+        return "none"
+    return "done"
+
+
+def rewrite(titles, body, tags, config):
+    """优先取后台预计算的改写（进行中则等待），没有再现场改写；返回 (ai_body, ai_results, error)"""
+    pre = get_ai(titles, body, tags, config)
+    return pre if pre else run_ai_rewrite(titles, body, tags, config)
@@ -0,0 +1,344 @@
+"""长文流式审核 - 公众号长文、口播转写稿（5 万 - 20 万字）分块读入，边读边报违禁词
+
+    auditor = StreamAuditor(config)
+    for chunk in iter_text_file("article.txt"):
+        for event in auditor.feed(chunk):
+            ...
+    for event in auditor.close():     # 最后一个事件 type == "summary"
+        ...
+
+    # 或者一步到位
+    for event in stream_audit(iter_text_file("article.txt"), config): ...
+
+    python -m core.stream_audit article.txt --config nengen_direction1 [--chunk 65536]
+
+查出的违禁词、特殊替换、标签违规与 check_forbidden_words 对整篇文本的结果一致（位置、上下文指向原文）：
+- 块边界可以落在词中间、空白中间；归一化和 Aho-Corasick 状态跨块延续，
+  每块末尾的空白 / 零宽字符留到下一块再判断是否删除
+- 命中后等后文足够判断例外用法（如「最近」之于「最」）和截取上下文时才输出
+- 只保留有限的尾部窗口，内存占用只和块大小有关，与输入总长度无关
+"""
+import argparse
+import json
+import sys
+
+from core.matcher import AhoCorasick
+from core.normalize import GAP_CHARS, normalize, normalize_word
+from core.text_utils import HASHTAG_PATTERN, count_chinese
+
+DEFAULT_CHUNK = 65536
+WINDOW = 4096        # 保留的原文 / 归一化文本尾部长度
+CONTEXT_CHARS = 256  # 左侧上下文（判断词中空格、标签边界用）
+MAX_TAG = 64         # 跨块拼接的标签最长长度
+
+
+class _Piece:
+    """一块归一化输出：text 的第 i 个字对应原文 raw_base + nt.orig_index(n0 + i)"""
+
+    __slots__ = ("norm_start", "text", "nt", "n0", "raw_base")
+
+    def __init__(self, norm_start, text, nt, n0, raw_base):
+        self.norm_start = norm_start
+        self.text = text
+        self.nt = nt
+        self.n0 = n0
+        self.raw_base = raw_base
+
+    def raw_index(self, pos: int) -> int:
+        return self.raw_base + self.nt.orig_index(self.n0 + pos - self.norm_start)
+
+
+class StreamNormalizer:
+    """分块归一化：末尾的空白要看下一个字才能决定删不删，留到下一块"""
+
+    def __init__(self):
+        self.raw_pos = 0     # 已输出原文的结束位置
+        self.norm_pos = 0    # 已输出归一化文本的结束位置
+        self._ctx = ""       # 已输出原文的末尾一段（左侧上下文）
+        self._pending = ""   # 尚未输出的原文
+
+    def feed(self, chunk: str, final: bool = False):
+        """返回本块的 _Piece，没有可输出内容时返回 None"""
+        buf = self._pending + chunk
+        cut = len(buf)
+        if not final:
+            while cut and buf[cut - 1] in GAP_CHARS:
+                cut -= 1
+            if len(buf) - cut > WINDOW:
+                cut = len(buf)  # 超长空白段不再等待，按不删除处理
+        emit, self._pending = buf[:cut], buf[cut:]
+        if not emit:
+            return None
+        full = self._ctx + emit
+        nt = normalize.__wrapped__(full)
+        n0 = len(normalize.__wrapped__(self._ctx).text) if self._ctx else 0
+        piece = _Piece(self.norm_pos, nt.text[n0:], nt, n0, self.raw_pos - len(self._ctx))
+        self.raw_pos += len(emit)
+        self.norm_pos += len(piece.text)
+        tail = full[-CONTEXT_CHARS:]
+        k = max(tail.rfind(" "), tail.rfind("\n"), tail.rfind("\t"))
+        self._ctx = tail[k:] if k > 0 else tail
+        return piece
+
+
+class StreamAuditor:
+    """违禁词 / 特殊替换 / 标签违规的流式检查，外加字数和卖点必提词统计"""
+
+    def __init__(self, config: dict, pad: int = 15):
+        hr = config.get("hard_rules", config)
+        self.pad = pad
+        self._forbidden = hr["forbidden_words"]
+        self._specials = hr.get("special_replacements", [])
+        self._skips = [normalize_word(r["skip_if_followed_by"]) if r.get("skip_if_followed_by") else ""
+                       for r in self._specials]
+        self._safe_tags = {normalize_word(t) for t in hr.get("safe_tags", ["#防敏奶粉", "#第一口奶粉"])}
+        self._word_norm = [normalize_word(fw["word"]) for fw in self._forbidden]
+        keywords = {normalize_word(kw): kw for p in hr["structure"]["paragraphs"]
+                    for sp in p["selling_points"] for kw in sp["required_keywords"]}
+        self._selling_points = [(sp["name"], sp["required_keywords"]) for p in hr["structure"]["paragraphs"]
+                                for sp in p["selling_points"] if sp["required_keywords"]]
+
+        # 同一个字符串可能同时是违禁词、别的词的例外、必提词，自动机里只放一次
+        roles = {}
+        for wi, fw in enumerate(self._forbidden):
+            roles.setdefault(self._word_norm[wi], []).append(("word", wi))
+            for exc in fw.get("exceptions", []):
+                roles.setdefault(normalize_word(exc), []).append(("exc", wi))
+        for si, rule in enumerate(self._specials):
+            roles.setdefault(normalize_word(rule["find"]), []).append(("special", si))
+        for norm, kw in keywords.items():
+            roles.setdefault(norm, []).append(("keyword", kw))
+        self._patterns = list(roles)
+        self._roles = [roles[p] for p in self._patterns]
+        self._ac = AhoCorasick(self._patterns)
+        # 判断例外至少要看到命中起点之后这么多字；特殊替换还要看后面 skip_if_followed_by 那几个字
+        self._lookahead = max([len(normalize_word(exc)) for fw in self._forbidden for exc in fw.get("exceptions", [])]
+                              + [len(p) + 1 for p in self._patterns]
+                              + [len(normalize_word(r["find"])) + len(k) for r, k in zip(self._specials, self._skips)]
+                              + [1])
+
+        self._norm = StreamNormalizer()
+        self._state = 0
+        self._pieces = []
+        self._tail = ""           # 归一化文本尾部
+        self._tail_start = 0
+        self._raw = ""            # 原文尾部
+        self._raw_start = 0
+        self._raw_total = 0
+        self._pending = []        # 待定的命中 (start, end, kind, ref)
+        self._exc_hits = []       # 例外用法出现位置 (start, end, 违禁词下标)
+        self._tag_carry = ""      # 末尾可能没写完的 #标签
+        self._tag_carry_start = 0
+        self._found_keywords = set()
+        self._chinese = 0
+        self._counts = {"violations": 0, "special_violations": 0, "tag_violations": 0}
+        self._by_word = {}
+
+    # ── 位置换算 ──
+
+    def _raw_index(self, pos: int) -> int:
+        for piece in reversed(self._pieces):
+            if piece.norm_start <= pos:
+                return piece.raw_index(pos)
+        return self._pieces[0].raw_index(pos) if self._pieces else pos
+
+    def _raw_span(self, start: int, end: int):
+        return self._raw_index(start), self._raw_index(end - 1) + 1
+
+    def _raw_slice(self, start: int, end: int) -> str:
+        s = max(start, self._raw_start) - self._raw_start
+        return self._raw[s:max(s, end - self._raw_start)]
+
+    def _norm_slice(self, start: int, end: int) -> str:
+        i = max(start - self._tail_start, 0)
+        return self._tail[i:max(i, end - self._tail_start)]
+
+    # ── 输入 ──
+
+    def feed(self, chunk: str) -> list:
+        """读入一块原文，返回已能确定的事件"""
+        self._raw += chunk
+        self._raw_total += len(chunk)
+        self._chinese += count_chinese(chunk)
+        return self._process(self._norm.feed(chunk), final=False)
+
+    def close(self) -> list:
+        """输入结束：输出剩余事件和汇总"""
+        events = self._process(self._norm.feed("", final=True), final=True)
+        events.append(self._summary())
+        return events
+
+    def _process(self, piece, final: bool) -> list:
+        events = []
+        if piece is not None:
+            self._pieces.append(piece)
+            self._tail += piece.text
+            self._state, hits = self._ac.feed(piece.text, self._state, piece.norm_start)
+            for start, end, idx in hits:
+                for kind, ref in self._roles[idx]:
+                    if kind == "exc":
+                        self._exc_hits.append((start, end, ref))
+                    elif kind == "keyword":
+                        self._found_keywords.add(ref)
+                    else:
+                        self._pending.append((start, end, kind, ref))
+            events += self._scan_tags(piece.text, piece.norm_start, final)
+        elif final and self._tag_carry:
+            events += self._scan_tags("", self._norm.norm_pos, final)
+        events += self._finalize(final)
+        self._trim()
+        return events
+
+    # ── 违禁词 / 特殊替换 ──
+
+    def _finalize(self, final: bool) -> list:
+        events, keep = [], []
+        norm_end = self._norm.norm_pos
+        for hit in sorted(self._pending, key=lambda h: (h[2] != "word", h[3], h[0])):
+            start, end, kind, ref = hit
+            if not final:
+                raw_end = self._raw_index(end - 1) + 1
+                if norm_end < start + self._lookahead or self._norm.raw_pos < raw_end + self.pad:
+                    keep.append(hit)
+                    continue
+            event = self._word_event(start, end, ref) if kind == "word" else self._special_event(start, end, ref)
+            if event:
+                events.append(event)
+        self._pending = keep
+        events.sort(key=lambda e: (e["type"] != "violation", e["position"]))
+        return events
+
+    def _context(self, start: int, end: int, pad: int) -> str:
+        rs, re_ = self._raw_span(start, end)
+        return self._raw_slice(max(0, rs - pad), min(self._raw_total, re_ + pad))
+
+    def _word_event(self, start, end, wi):
+        for es, ee, ewi in self._exc_hits:
+            if ewi == wi and es <= start < ee:
+                return None
+        fw = self._forbidden[wi]
+        rs, re_ = self._raw_span(start, end)
+        self._counts["violations"] += 1
+        self._by_word[fw["word"]] = self._by_word.get(fw["word"], 0) + 1
+        return {
+            "type": "violation",
+            "word": fw["word"],
+            "matched": self._raw_slice(rs, re_),
+            "category": fw.get("category", "禁止词"),
+            "position": rs,
+            "context": self._context(start, end, self.pad),
+            "replacement": fw.get("replacement", ""),
+        }
+
+    def _special_event(self, start, end, si):
+        rule = self._specials[si]
+        skip = self._skips[si]
+        if skip and self._norm_slice(end, end + len(skip)) == skip:
+            return None
+        self._counts["special_violations"] += 1
+        return {
+            "type": "special",
+            "find": rule["find"],
+            "position": self._raw_index(start),
+            "context": self._context(start, end, 10),
+            "replace_with": rule["replace_with"],
+            "description": rule.get("description", ""),
+        }
+
+    # ── 标签 ──
+
+    def _scan_tags(self, text: str, start: int, final: bool) -> list:
+        base = self._tag_carry_start if self._tag_carry else start
+        text = self._tag_carry + text
+        cut = len(text)
+        if not final:
+            # 末尾没写完的标签（可能只有一个 #）留到下一块拼上再判断
+            k = text.rfind("#")
+            if k != -1 and len(text) - k < MAX_TAG and (k == cut - 1 or HASHTAG_PATTERN.fullmatch(text, k)):
+                cut = k
+        self._tag_carry, self._tag_carry_start = text[cut:], base + cut
+        events = []
+        for m in HASHTAG_PATTERN.finditer(text, 0, cut):
+            tag = m.group()
+            if tag in self._safe_tags:
+                continue
+            for wi, word in enumerate(self._word_norm):
+                if word in tag:
+                    rs, re_ = self._raw_span(base + m.start(), base + m.end())
+                    self._counts["tag_violations"] += 1
+                    events.append({"type": "tag", "tag": self._raw_slice(rs, re_),
+                                   "word": self._forbidden[wi]["word"], "position": rs})
+        return events
+
+    # ── 窗口裁剪 ──
+
+    def _trim(self):
+        keep_from = self._norm.norm_pos - WINDOW
+        if self._pending:
+            keep_from = min(keep_from, min(h[0] for h in self._pending))
+        if self._tag_carry:
+            keep_from = min(keep_from, self._tag_carry_start)
+        while len(self._pieces) > 1 and self._pieces[1].norm_start <= keep_from:
+            self._pieces.pop(0)
+        if keep_from > self._tail_start:
+            self._tail = self._tail[keep_from - self._tail_start:]
+            self._tail_start = keep_from
+        self._exc_hits = [h for h in self._exc_hits if h[1] > keep_from]
+        raw_keep = min(self._raw_total - WINDOW, self._raw_index(max(keep_from, 0)) - self.pad) if self._pieces else 0
+        if raw_keep > self._raw_start:
+            self._raw = self._raw[raw_keep - self._raw_start:]
+            self._raw_start = raw_keep
+
+    def _summary(self) -> dict:
+        missing = [{"name": name, "missing": [kw for kw in kws if kw not in self._found_keywords]}
+                   for name, kws in self._selling_points]
+        missing = [m for m in missing if m["missing"]]
+        total = len(self._selling_points)
+        return {
+            "type": "summary",
+            "chars": self._raw_total,
+            "chinese_chars": self._chinese,
+            **self._counts,
+            "by_word": self._by_word,
+            "selling_points": {"total": total, "passed": total - len(missing), "missing": missing},
+            "pass": not any(self._counts.values()),
+        }
+
+
+def stream_audit(chunks, config: dict, pad: int = 15):
+    """逐块审核，边读边产出事件；最后一个事件是汇总"""
+    auditor = StreamAuditor(config, pad=pad)
+    for chunk in chunks:
+        yield from auditor.feed(chunk)
+    yield from auditor.close()
+
+
+def iter_text_file(path: str, chunk_size: int = DEFAULT_CHUNK, encoding: str = "utf-8"):
+    """按字符块读文本文件（文本模式读取，多字节字符不会被切开）"""
+    with open(path, "r", encoding=encoding, errors="replace") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def main():
+    from core.config_loader import load_config
+
+    ap = argparse.ArgumentParser(description="长文流式审核，每行输出一个 JSON 事件")
+    ap.add_argument("path", help="文本文件路径，- 表示标准输入")
+    ap.add_argument("--config", default="nengen_direction1")
+    ap.add_argument("--chunk", type=int, default=DEFAULT_CHUNK)
+    args = ap.parse_args()
+
+    if args.path == "-":
+        chunks = iter(lambda: sys.stdin.read(args.chunk), "")
+    else:
+        chunks = iter_text_file(args.path, args.chunk)
+    for event in stream_audit(chunks, load_config(args.config)):
+        print(json.dumps(event, ensure_ascii=False), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""正文结构分析 - 一遍扫出全部锚点词，按句子投票划分主题区间
+
+    sa = analyze_structure(body, hr)       # 同一正文 + 同一结构配置只算一次
+    sa.regions                 # [Region]，按原文位置排列，首尾相接覆盖全文
+    sa.topic_at(pos)           # 原文位置所属主题下标（-1 表示没有任何主题）
+    sa.spans(t)                # 主题 t 的全部 (start, end)
+    sa.regions_in(start, end)  # 与原文区间相交的 Region，高亮 / 局部改写用
+    sa.order                   # 按主体区间先后排列的主题下标
+    sa.keyword_positions(kw)   # 卖点必提词的全部原文位置（同一遍扫描得到）
+    sa.keyword_in(kw, t)       # 必提词是否出现在主题 t 的区间内
+
+划分方法：
+1. 在归一化文本上找出所有锚点词、必提词的全部出现位置（逐词 str.find，
+   词表只有几十个，比纯 Python 的 Aho-Corasick 逐字扫描快）
+2. 按句末标点和换行切句
+3. 每个句子对各主题打分：本句的命中按比例折成 1 票，前后句的票按距离衰减（0.5、0.25），
+   再加一点按全文位置的先验（第 i 个主题预期在全文 (i+0.5)/n 附近）
+4. 最高分不到 MIN_SCORE（附近没有锚点）的句子跟随前一句的主题
+5. 相邻同主题句子合并为区间；每个主题本句命中最多的区间为主体区间，用它判断顺序
+"""
+import bisect
+import re
+from functools import lru_cache
+
+from core.normalize import normalize, normalize_word
+
+SENTENCE_PATTERN = re.compile(r'[^。！？!?；;\n]+[。！？!?；;…”」』）)]*')
+NEIGHBOR_WEIGHTS = (1.0, 0.5, 0.25)  # 本句、相邻一句、相隔一句
+PRIOR_WEIGHT = 0.3
+MIN_SCORE = 0.5
+
+
+class Region:
+    """一个主题区间（原文位置），votes 为区间内本主题锚点词的命中次数"""
+
+    __slots__ = ("topic", "start", "end", "votes")
+
+    def __init__(self, topic: int, start: int, end: int, votes: int = 0):
+        self.topic = topic
+        self.start = start
+        self.end = end
+        self.votes = votes
+
+    def __repr__(self):
+        return f"Region({self.topic}, {self.start}, {self.end}, votes={self.votes})"
+
+
+class StructureAnalysis:
+    """analyze_structure 的结果；hits[t] 为主题 t 的锚点命中 [(原文位置, 锚点词)]，
+    keywords 为 必提词 -> 升序的原文位置；都按位置排好序"""
+
+    def __init__(self, names: list, nt, hits: list, regions: list, keywords: dict):
+        self.names = names
+        self.nt = nt
+        self.hits = hits
+        self.regions = regions
+        self.keywords = keywords
+        self._starts = [r.start for r in regions]
+        self.main = {}
+        for r in regions:
+            best = self.main.get(r.topic)
+            if best is None or r.votes > best.votes:
+                self.main[r.topic] = r
+        self.order = sorted(self.main, key=lambda t: self.main[t].start)
+
+    def topic_at(self, pos: int) -> int:
+        k = bisect.bisect_right(self._starts, pos) - 1
+        return self.regions[k].topic if k >= 0 else -1
+
+    def spans(self, topic: int) -> list:
+        return [(r.start, r.end) for r in self.regions if r.topic == topic]
+
+    def regions_in(self, start: int, end: int) -> list:
+        k = max(bisect.bisect_right(self._starts, start) - 1, 0)
+        out = []
+        for r in self.regions[k:]:
+            if r.start >= end:
+                break
+            if r.end > start:
+                out.append(r)
+        return out
+
+    def keyword_positions(self, kw: str) -> list:
+        return self.keywords.get(kw, [])
+
+    def keyword_in(self, kw: str, topic: int) -> bool:
+        positions = self.keywords.get(kw)
+        if not positions:
+            return False
+        for start, end in self.spans(topic):
+            i = bisect.bisect_left(positions, start)
+            if i < len(positions) and positions[i] < end:
+                return True
+        return False
+
+    def position(self, topic: int) -> float:
+        """主题的位置：主体区间起点；锚点都被别的主题票数盖过时取命中位置的平均"""
+        if topic in self.main:
+            return self.main[topic].start
+        hits = self.hits[topic]
+        return sum(p for p, _ in hits) / len(hits) if hits else -1
+
+
+@lru_cache(maxsize=32)
+def _compile(spec: tuple):
+    """spec 为 ((主题名, (锚点词, ...), (必提词, ...)), ...)
+    返回 [(归一化模式, [(主题, 原词)])]，主题为 None 表示必提词"""
+    roles = {}
+    for t, (_, anchors, keywords) in enumerate(spec):
+        for kw in anchors:
+            roles.setdefault(normalize_word(kw), []).append((t, kw))
+        for kw in keywords:
+            role = roles.setdefault(normalize_word(kw), [])
+            if (None, kw) not in role:
+                role.append((None, kw))
+    return list(roles.items())
+
+
+def _spec_key(config: dict) -> tuple:
+    return tuple((p["name"], tuple(p["anchor_keywords"]),
+                  tuple(kw for sp in p["selling_points"] for kw in sp["required_keywords"]))
+                 for p in config["structure"]["paragraphs"])
+
+
+def _sentences(text: str) -> list:
+    return [m.span() for m in SENTENCE_PATTERN.finditer(text)]
+
+
+def _assign(sentences: list, sent_hits: list, n_topics: int, length: int) -> list:
+    """每个句子的主题（-1 表示还没有）"""
+    # 每句的票按比例折算成 1 票，锚点词密集的句子不会盖过邻句自己的命中
+    shares = []
+    for votes in sent_hits:
+        share = {}
+        for t in votes:
+            share[t] = share.get(t, 0) + 1 / len(votes)
+        shares.append(share)
+    assigned = []
+    for i, (s, e) in enumerate(sentences):
+        scores = [0.0] * n_topics
+        for d, w in enumerate(NEIGHBOR_WEIGHTS):
+            for j in {i - d, i + d}:
+                if 0 <= j < len(sentences):
+                    for t, v in shares[j].items():
+                        scores[t] += w * v
+        r = (s + e) / 2 / max(length, 1)
+        for t in range(n_topics):
+            scores[t] += PRIOR_WEIGHT * (1 - abs(r - (t + 0.5) / n_topics))
+        best = max(range(n_topics), key=scores.__getitem__)
+        if scores[best] >= MIN_SCORE:
+            assigned.append(best)
+        else:
+            assigned.append(assigned[-1] if assigned else -1)
+    # 开头没有锚点的句子归入第一个有主题的句子
+    first = next((t for t in assigned if t != -1), -1)
+    return [first if t == -1 else t for t in assigned]
+
+
+@lru_cache(maxsize=64)
+def _analyze(body: str, spec: tuple) -> StructureAnalysis:
+    nt = normalize(body)
+    text = nt.text
+    orig_index = nt.orig_index
+    n = len(spec)
+
+    sentences = _sentences(text)
+    sent_starts = [s for s, _ in sentences]
+    sent_hits = [[] for _ in sentences]
+    hits = [[] for _ in range(n)]
+    keywords = {}
+    for pattern, roles in _compile(spec):
+        start = text.find(pattern)
+        while start != -1:
+            for t, kw in roles:
+                if t is None:
+                    keywords.setdefault(kw, []).append(orig_index(start))
+                    continue
+                hits[t].append((orig_index(start), kw))
+                k = bisect.bisect_right(sent_starts, start) - 1
+                if k >= 0:
+                    sent_hits[k].append(t)
+            start = text.find(pattern, start + 1)
+    for topic_hits in hits:
+        topic_hits.sort()
+
+    regions = []
+    if any(hits):
+        for (s, _), t, votes in zip(sentences, _assign(sentences, sent_hits, n, len(text)), sent_hits):
+            own = votes.count(t)
+            if regions and regions[-1].topic == t:
+                regions[-1].votes += own
+                continue
+            regions.append(Region(t, nt.orig_index(s) if regions else 0, 0, own))
+        for r, nxt in zip(regions, regions[1:] + [None]):
+            r.end = nxt.start if nxt else len(body)
+    return StructureAnalysis([name for name, *_ in spec], nt, hits, regions, keywords)
+
+
+def analyze_structure(body: str, config: dict) -> StructureAnalysis:
+    """正文结构分析；config 为 hard_rules。结果按 (正文, 结构配置) 缓存，调用方不要修改"""
+    return _analyze(body, _spec_key(config))
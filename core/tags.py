@@ -0,0 +1,129 @@
+"""话题标签索引 - 标签行只解析一次，标签检查、违禁词检查、一键修复共用
+
+    idx = tag_index(tags_text)          # 按文本缓存
+    idx.count("#能恩全护")               # 出现次数，「#标签 3」按 3 次算
+    idx.entries                         # [TagEntry]，按出现顺序
+    idx.keys()                          # 去重后的标签（归一化写法），按首次出现顺序
+
+    text, changes = fix_problem_tags(tags_text, hr)    # 配置 problem_tags：整词修复 / 删除
+    text, changes = complete_tags(text, hr)            # 按 min_count 补齐必带标签
+
+标签按归一化后的整词比较（全半角、繁简、大小写、零宽字符不影响），
+「#能恩全护」不会再算进「#能恩全护水奶」的次数里。
+"""
+import re
+from functools import lru_cache
+
+from core.normalize import normalize, normalize_word
+
+# 「#标签」后面可跟空白和次数，如「#能恩全护 3」
+TAG_PATTERN = re.compile(r'(#[^\s#]+)(?:[ \t]+(\d+)(?![^\s#]))?')
+
+
+class TagEntry:
+    """一次标签出现：tag 为原文写法，key 为归一化写法，start / end 为原文区间（含次数）"""
+
+    __slots__ = ("tag", "key", "count", "explicit", "start", "end")
+
+    def __init__(self, tag: str, key: str, count: int, explicit: bool, start: int, end: int):
+        self.tag = tag
+        self.key = key
+        self.count = count
+        self.explicit = explicit
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"TagEntry({self.tag!r}, count={self.count}, span=({self.start}, {self.end}))"
+
+
+class TagIndex:
+    """标签的有序多重集：entries 保留出现顺序和区间，counts 为 归一化标签 -> 总次数"""
+
+    def __init__(self, text: str, entries: list):
+        self.text = text
+        self.entries = entries
+        self.counts = {}
+        for e in entries:
+            self.counts[e.key] = self.counts.get(e.key, 0) + e.count
+
+    def count(self, tag: str) -> int:
+        return self.counts.get(normalize_word(tag), 0)
+
+    def __contains__(self, tag: str) -> bool:
+        return normalize_word(tag) in self.counts
+
+    def keys(self) -> list:
+        return list(self.counts)
+
+    def entries_of(self, tag: str) -> list:
+        key = normalize_word(tag)
+        return [e for e in self.entries if e.key == key]
+
+
+@lru_cache(maxsize=256)
+def tag_index(text: str) -> TagIndex:
+    """解析文本中的全部标签；结果缓存，调用方不要修改"""
+    nt = normalize(text)
+    entries = []
+    for m in TAG_PATTERN.finditer(nt.text):
+        start, end = nt.span(m.start(), m.end())
+        tag_start, tag_end = nt.span(m.start(1), m.end(1))
+        count = m.group(2)
+        entries.append(TagEntry(text[tag_start:tag_end], m.group(1), int(count) if count else 1,
+                                bool(count), start, end))
+    return TagIndex(text, entries)
+
+
+def _splice(text: str, edits: list) -> str:
+    """edits 为 [(start, end, 新内容)]，互不重叠"""
+    for start, end, new in sorted(edits, reverse=True):
+        text = text[:start] + new + text[end:]
+    return text
+
+
+def fix_problem_tags(text: str, config: dict):
+    """按配置 problem_tags 整词修复（值为新标签）或删除（值为 null）问题标签
+
+    返回 (新文本, 变更记录)；变更记录格式与 auto_fix_all 相同。
+    """
+    problem = {normalize_word(bad): (bad, good) for bad, good in config.get("problem_tags", {}).items()}
+    if not problem:
+        return text, []
+    idx = tag_index(text)
+    edits, counts = [], {}
+    for e in idx.entries:
+        if e.key not in problem:
+            continue
+        bad, good = problem[e.key]
+        counts[bad] = counts.get(bad, 0) + e.count
+        if good:
+            edits.append((e.start, e.end, good + text[e.start + len(e.tag):e.end]))
+        else:
+            # 删除时连同后面的空白一起去掉
+            end = e.end
+            while end < len(text) and text[end] in " \t　":
+                end += 1
+            edits.append((e.start, end, ""))
+    changes = []
+    for bad, count in counts.items():
+        good = problem[normalize_word(bad)][1]
+        changes.append({"type": "标签修复" if good else "标签删除", "old": bad,
+                        "new": good or "(删除)", "count": count, "scope": "标签"})
+    return _splice(text, edits).strip(" \t　") if edits else text, changes
+
+
+def complete_tags(text: str, config: dict):
+    """必带标签次数不足 min_count 的补在标签行末尾，返回 (新文本, 变更记录)"""
+    idx = tag_index(text)
+    added, changes = [], []
+    for req in config["hashtags"]["required"]:
+        need = req["min_count"] - idx.count(req["tag"])
+        if need <= 0:
+            continue
+        added += [req["tag"]] * need
+        changes.append({"type": "标签补齐", "old": "(缺失)", "new": req["tag"], "count": need, "scope": "标签"})
+    if not added:
+        return text, changes
+    text = text.rstrip()
+    return (text + " " if text else "") + " ".join(added), changes
@@ -3,27 +3,83 @@ import re
 from docx import Document
 import io
 
+from core.tags import tag_index
+
+
+_NON_CHINESE = re.compile(r'[^\u4e00-\u9fff]+')
+
 
 def count_chinese(text: str) -> int:
-    """统计中文字符数量"""
-    return len(re.findall(r'[\u4e00-\u9fff]', text))
+    """统计中文字符数量（删掉非中文字符后取长度，比 findall 逐个收集快）"""
+    return len(_NON_CHINESE.sub('', text))
+
+
+HASHTAG_PATTERN = re.compile(r'#[^\s#]+')
 
 
 def extract_hashtags(text: str) -> list[str]:
     """提取所有话题标签"""
-    return re.findall(r'#[^\s#]+', text)
+    return HASHTAG_PATTERN.findall(text)
 
 
 def count_tag_occurrences(text: str, tag: str) -> int:
-    """计算特定标签在文本中的出现次数（支持 #标签 3 格式）"""
-    pattern = re.escape(tag) + r'(?:\s+(\d+))?'
-    matches = re.findall(pattern, text)
-    if matches:
-        for m in matches:
-            if m and m.isdigit():
-                return int(m)
-        return len(matches)
-    return 0
+    """计算特定标签在文本中的出现次数（支持 #标签 3 格式，整词比较，见 tags.py）"""
+    return tag_index(text).count(tag)
+
+
+_KOL_PATTERN = re.compile(r'^[ \t　]*达人昵称[ \t　]*[:：]?[ \t　]*(.*?)[ \t　]*$', re.M)
+
+
+def parse_kol(text: str) -> str:
+    """稿件抬头「达人昵称：xxx」里的达人昵称，没有时返回空字符串"""
+    m = _KOL_PATTERN.search(text)
+    return m.group(1) if m else ""
+
+
+def parse_input(text: str) -> tuple:
+    """把整篇稿件（docx 读出的文本或粘贴内容）拆成 (标题列表, 正文, 标签行)"""
+    lines = text.strip().split('\n')
+    titles, body_lines, tags_line, section = [], [], "", None
+    for line in lines:
+        s = line.strip()
+        if not s:
+            if section == 'body' and body_lines and body_lines[-1] != "":
+                body_lines.append("")
+            continue
+        if s.startswith(('一、', '二、', '三、', '四、')):
+            section = 'title' if '标题' in s else ('body' if any(x in s for x in ['笔记', '内容']) else 'skip')
+            continue
+        if any(s.startswith(p) for p in ['达人昵称', '合作形式', '合作方向', '发布时间', '拍图', 'live图']):
+            continue
+        if s.startswith('标题') and '备选' in s:
+            section = 'title'; continue
+        if s.startswith('大纲'):
+            section = 'body'
+            rest = s.split('）')[-1].strip() if '）' in s else s.split(')')[-1].strip() if ')' in s else ""
+            if rest and len(rest) > 5:
+                body_lines.append(rest)
+            continue
+        if '话题标签' in s or s.count('#') >= 3:
+            t = s.split('：')[-1].strip() if '话题标签' in s and '：' in s else s
+            if t.count('#') >= 2:
+                tags_line = t
+            continue
+        if section == 'title' and len(titles) < 5:
+            titles.append(s)
+            if len(titles) >= 3:
+                section = 'body'
+            continue
+        if section in ('body', None):
+            section = 'body'; body_lines.append(s)
+    cleaned, prev = [], False
+    for l in body_lines:
+        if l == "":
+            if not prev:
+                cleaned.append("")
+            prev = True
+        else:
+            cleaned.append(l); prev = False
+    return titles[:3], '\n'.join(cleaned).strip(), tags_line
 
 
 def read_docx(file) -> str:
@@ -31,3 +87,13 @@ def read_docx(file) -> str:
     doc = Document(io.BytesIO(file.read()))
     paragraphs = [p.text for p in doc.paragraphs if p.text.strip()]
     return '\n'.join(paragraphs)
+
+
+DRAFT_EXTS = (".docx", ".txt")
+
+
+def read_draft(data: bytes, ext: str) -> str:
+    """稿件文件内容（.docx / .txt 的原始字节）转成文本"""
+    if ext.lower() == ".docx":
+        return read_docx(io.BytesIO(data))
+    return data.decode("utf-8", errors="replace")
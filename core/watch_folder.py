@@ -0,0 +1,355 @@
+"""投稿目录监听 - 机构把稿件丢进共享目录，守护进程只审新增 / 改过的稿件，结果写在稿件旁边
+
+    watcher = FolderWatcher("投稿目录", config="nengen_direction1", fix=True)
+    watcher.scan()          # 扫一遍：{"audited": [...], "reaudited": [...], "unchanged": n, "removed": [...], "errors": {...}}
+    watcher.run()           # 常驻：装了 watchdog 时按文件事件触发，没有时每 interval 秒轮询
+
+    python -m core.watch_folder 投稿目录/ --config nengen_direction1 [--fix] [--once] [--interval 2]
+
+每篇 .docx / .txt 审完写出同名的 .audit.json（是否通过、未通过项、完整审核结果）；
+--fix 时不通过的稿件再一键修复，写出「<原名>_修复版.docx」；重审通过或没开 --fix 时删掉以前写出的修复版。
+稿件被删时一并删掉它的 .audit.json 和修复版。审核结果同时记入审核历史。
+一级子目录名是方向配置名时（投稿目录/nengen_direction3/xx.docx）按该方向审，否则用 --config。
+
+目录下的 .kol_audit_manifest.json 记录每篇的 (mtime, 大小, 内容 sha1, 方向, 配置指纹)：
+mtime 和大小都没变的不读文件；变了再比内容 sha1，只是被 touch 过的不重审。
+configs/ 下的配置改动后只重审结论可能变化的稿件：只改了违禁词 / 特殊替换 / 安全标签（--fix 时含问题标签）
+的，用倒排索引（draft_index.DraftIndex）查出含改动词的稿件重审，其余只更新配置指纹；
+改了字数、标题、标签、结构等其他规则的，该方向的稿件全部重审。
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+
+from core.auto_fix import auto_fix_all
+from core.config_loader import HAS_WATCHDOG, REGISTRY
+from core.doc_export import generate_clean_docx
+from core.draft_index import DraftIndex
+from core.hard_checks import run_all_checks
+from core.history import HISTORY, draft_hash
+from core.text_utils import DRAFT_EXTS, parse_input, parse_kol, read_draft
+
+if HAS_WATCHDOG:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+
+MANIFEST = ".kol_audit_manifest.json"
+RESULT_SUFFIX = ".audit.json"
+FIXED_SUFFIX = "_修复版.docx"
+
+# 只影响违禁词审核（和一键修复）的规则段：改动后按词定位受影响的稿件
+_WORD_SECTIONS = ("forbidden_words", "special_replacements", "safe_tags", "problem_tags")
+
+
+def _is_draft(name: str) -> bool:
+    if name.startswith((".", "~$")) or name.endswith(FIXED_SUFFIX):
+        return False
+    return os.path.splitext(name)[1].lower() in DRAFT_EXTS
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def changed_words(old_hr: dict, new_hr: dict, fix: bool = False):
+    """两版 hard_rules 之间改动涉及的词；改了违禁词类以外的规则时返回 None（需要全部重审）"""
+    words = set()
+    for key in set(old_hr) | set(new_hr):
+        old, new = old_hr.get(key), new_hr.get(key)
+        if old == new:
+            continue
+        if key not in _WORD_SECTIONS:
+            return None
+        if key == "problem_tags":
+            if fix:
+                old, new = old or {}, new or {}
+                words.update(k for k in set(old) | set(new) if old.get(k) != new.get(k))
+        elif key == "safe_tags":
+            words.update(set(old or ()) ^ set(new or ()))
+        else:
+            field = "word" if key == "forbidden_words" else "find"
+            old = {r[field]: r for r in old or ()}
+            new = {r[field]: r for r in new or ()}
+            words.update(k for k in set(old) | set(new) if old.get(k) != new.get(k))
+    return words
+
+
+class FolderWatcher:
+    """监听一个目录：清单记录已审稿件，scan() 只审新增 / 改动的稿件和受配置改动影响的稿件"""
+
+    def __init__(self, root: str, config: str = None, fix: bool = False, registry=REGISTRY, store=HISTORY):
+        self.root = os.path.abspath(root)
+        self.config = config
+        self.fix = fix
+        self.registry = registry
+        self.store = store
+        self.manifest_path = os.path.join(self.root, MANIFEST)
+        self.manifest = self._load_manifest()
+        self.index = DraftIndex()    # 本进程审过 / 读过的稿件，配置改动时按词定位
+        self._dirty = threading.Event()
+        self._dirty.set()
+        self._observer = None
+
+    def _load_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == 1:
+                return data
+        except (OSError, ValueError):
+            pass
+        return {"version": 1, "configs": {}, "files": {}}
+
+    def _save_manifest(self):
+        _write_atomic(self.manifest_path, json.dumps(self.manifest, ensure_ascii=False, indent=1).encode("utf-8"))
+
+    def _config_name(self, rel: str):
+        first = rel.split(os.sep, 1)[0]
+        if first != rel and any(c["file"] == first for c in self.registry.list()):
+            return first
+        return self.config
+
+    def _walk(self):
+        for dirpath, dirnames, names in os.walk(self.root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            for name in sorted(names):
+                if _is_draft(name):
+                    path = os.path.join(dirpath, name)
+                    yield os.path.relpath(path, self.root), path
+
+    def _read(self, path: str):
+        with open(path, "rb") as f:
+            data = f.read()
+        raw = read_draft(data, os.path.splitext(path)[1])
+        return data, raw, parse_input(raw)
+
+    # ── 配置改动 ──
+
+    def _stale_by_config(self) -> set:
+        """配置改动后需要重审的稿件（相对路径）；不受影响的直接更新清单里的配置指纹"""
+        stale = set()
+        files = self.manifest["files"]
+        for name, seen in list(self.manifest["configs"].items()):
+            try:
+                config = self.registry.get(name)
+            except (ValueError, FileNotFoundError):
+                continue    # 配置暂时有错或被删，等修好再说
+            if config["_fingerprint"] == seen["fingerprint"]:
+                continue
+            entries = [rel for rel, e in files.items() if e["config"] == name]
+            words = changed_words(seen["hard_rules"], config["hard_rules"], self.fix)
+            if words is None:
+                stale.update(entries)
+            elif words:
+                drafts = set()
+                for rel in entries:
+                    if files[rel]["draft"] not in self.index:
+                        # 重启后还没读过的稿件先读进索引
+                        try:
+                            _, raw, (titles, body, tags) = self._read(os.path.join(self.root, rel))
+                        except Exception:
+                            stale.add(rel)
+                            continue
+                        self.index.add(draft_hash(titles, body, tags), titles, body, tags)
+                for word in words:
+                    drafts.update(hit["draft"] for hit in self.index.search(word, approved=None))
+                stale.update(rel for rel in entries if files[rel]["draft"] in drafts)
+            for rel in entries:
+                if rel not in stale:
+                    files[rel]["fingerprint"] = config["_fingerprint"]
+            self.manifest["configs"][name] = {"fingerprint": config["_fingerprint"],
+                                              "hard_rules": config["hard_rules"]}
+        return stale
+
+    # ── 审核 ──
+
+    def _audit(self, path: str, data: bytes, raw: str, parsed: tuple, config: dict) -> dict:
+        titles, body, tags = parsed
+        kol = parse_kol(raw)
+        results = run_all_checks(titles, body, tags, config)
+        passed = all(r["pass"] for r in results)
+        h = self.store.record(titles, body, tags, results, config, kol=kol)
+        self.index.add(h, titles, body, tags, kol=kol)
+        report = {
+            "file": os.path.basename(path),
+            "config": config["_name"],
+            "kol": kol,
+            "passed": passed,
+            "failed": [r["id"] for r in results if not r["pass"]],
+            "audited": datetime.datetime.now().isoformat(timespec="seconds"),
+            "results": results,
+        }
+        stem = os.path.splitext(path)[0]
+        if self.fix and not passed:
+            ft, fb, ftg, changes = auto_fix_all(titles, body, tags, config)
+            fixed_results = run_all_checks(ft, fb, ftg, config)
+            self.store.record(ft, fb, ftg, fixed_results, config, stage="fixed", kol=kol, changes=changes, source=h)
+            _write_atomic(stem + FIXED_SUFFIX, generate_clean_docx(ft, fb, ftg).getvalue())
+            report["fixed"] = {"file": os.path.basename(stem + FIXED_SUFFIX), "changes": len(changes),
+                               "passed": all(r["pass"] for r in fixed_results),
+                               "failed": [r["id"] for r in fixed_results if not r["pass"]]}
+        else:
+            # 以前不通过时写出的修复版已经过期，留着会被机构误取
+            _remove(stem + FIXED_SUFFIX)
+        _write_atomic(stem + RESULT_SUFFIX, json.dumps(report, ensure_ascii=False, indent=1).encode("utf-8"))
+        st = os.stat(path)
+        return {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha1": hashlib.sha1(data).hexdigest(),
+                "config": config["_name"], "fingerprint": config["_fingerprint"], "draft": h,
+                "passed": passed, "failed": report["failed"], "fixed": "fixed" in report}
+
+    def _keep(self, path: str, entry: dict):
+        """不用重审的稿件：上次 --fix 写出的修复版在这次没开 --fix 时删掉，审核结果里也去掉它"""
+        if not entry.get("fixed") or self.fix:
+            return
+        stem = os.path.splitext(path)[0]
+        _remove(stem + FIXED_SUFFIX)
+        try:
+            with open(stem + RESULT_SUFFIX, encoding="utf-8") as f:
+                report = json.load(f)
+            report.pop("fixed", None)
+            _write_atomic(stem + RESULT_SUFFIX, json.dumps(report, ensure_ascii=False, indent=1).encode("utf-8"))
+        except (OSError, ValueError):
+            pass
+        entry["fixed"] = False
+
+    def scan(self) -> dict:
+        """扫一遍目录，返回本轮审核的汇总"""
+        self._dirty.clear()
+        self.registry.refresh()
+        files = self.manifest["files"]
+        before = json.dumps(self.manifest, sort_keys=True)
+        stale = self._stale_by_config()
+        out = {"audited": [], "reaudited": [], "unchanged": 0, "removed": [], "errors": {}}
+        seen = set()
+        for rel, path in self._walk():
+            seen.add(rel)
+            name = self._config_name(rel)
+            if name is None:
+                out["errors"][rel] = "未指定方向配置（--config 或以方向配置名命名的子目录）"
+                continue
+            try:
+                config = self.registry.get(name)
+                st = os.stat(path)
+            except (ValueError, OSError) as e:
+                out["errors"][rel] = str(e)
+                continue
+            entry = files.get(rel)
+            same_config = entry is not None and entry["config"] == name and entry["fingerprint"] == config["_fingerprint"]
+            if same_config and rel not in stale and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                self._keep(path, entry)
+                out["unchanged"] += 1
+                continue
+            try:
+                data, raw, parsed = self._read(path)
+                sha1 = hashlib.sha1(data).hexdigest()
+                if same_config and rel not in stale and entry["sha1"] == sha1:
+                    # 只是被 touch 过
+                    entry["mtime_ns"], entry["size"] = st.st_mtime_ns, st.st_size
+                    self._keep(path, entry)
+                    out["unchanged"] += 1
+                    continue
+                files[rel] = self._audit(path, data, raw, parsed, config)
+            except Exception as e:
+                # 多半是文件还没拷完，清单不更新，下一轮再审
+                out["errors"][rel] = f"{type(e).__name__}: {e}"
+                continue
+            self.manifest["configs"].setdefault(name, {"fingerprint": config["_fingerprint"],
+                                                       "hard_rules": config["hard_rules"]})
+            item = {"file": rel, "passed": files[rel]["passed"], "failed": files[rel]["failed"]}
+            (out["reaudited"] if entry is not None else out["audited"]).append(item)
+        for rel in sorted(set(files) - seen):
+            del files[rel]
+            out["removed"].append(rel)
+            # 审核结果和修复版随稿件一起删；同名不同扩展名的稿件还在时它们属于那一篇
+            stem = os.path.splitext(rel)[0]
+            if not any(os.path.splitext(other)[0] == stem for other in files):
+                _remove(os.path.join(self.root, stem + RESULT_SUFFIX))
+                _remove(os.path.join(self.root, stem + FIXED_SUFFIX))
+        if json.dumps(self.manifest, sort_keys=True) != before:
+            self._save_manifest()
+        return out
+
+    # ── 常驻 ──
+
+    def watch(self) -> bool:
+        """用文件系统事件触发扫描（需要 watchdog），返回是否启用"""
+        if not HAS_WATCHDOG or self._observer is not None:
+            return False
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                path = getattr(event, "dest_path", "") or event.src_path
+                if _is_draft(os.path.basename(path)):
+                    watcher._dirty.set()
+
+        observer = Observer()
+        observer.daemon = True
+        try:
+            observer.schedule(_Handler(), self.root, recursive=True)
+            observer.start()
+        except OSError:
+            return False
+        self._observer = observer
+        self.registry.watch()
+        return True
+
+    def run(self, interval: float = 2.0, on_scan=None, stop: threading.Event = None):
+        """常驻扫描直到 stop 被置位；每轮有审核或出错时调用 on_scan(汇总)"""
+        events = self.watch()
+        version = None
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            self.registry.refresh()
+            # 用文件事件时，没有稿件事件、配置也没变就不扫目录
+            if not events or self._dirty.is_set() or self.registry.version != version:
+                version = self.registry.version
+                report = self.scan()
+                if on_scan and (report["audited"] or report["reaudited"] or report["removed"] or report["errors"]):
+                    on_scan(report)
+            stop.wait(interval)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="监听投稿目录，增量审核新增 / 改动的稿件")
+    ap.add_argument("root")
+    ap.add_argument("--config", default=None, help="默认方向配置（一级子目录名是配置名时按子目录）")
+    ap.add_argument("--fix", action="store_true", help="不通过的稿件写出一键修复版 .docx")
+    ap.add_argument("--once", action="store_true", help="只扫一遍")
+    ap.add_argument("--interval", type=float, default=2.0)
+    args = ap.parse_args()
+    if not os.path.isdir(args.root):
+        ap.error(f"目录不存在: {args.root}")
+
+    watcher = FolderWatcher(args.root, config=args.config, fix=args.fix)
+
+    def emit(report):
+        print(json.dumps({"time": time.strftime("%H:%M:%S"), **report}, ensure_ascii=False), flush=True)
+
+    try:
+        if args.once:
+            emit(watcher.scan())
+        else:
+            watcher.run(args.interval, on_scan=emit)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.store.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -124,6 +124,43 @@ html, body, .stApp, .stMarkdown, p, span, div, li, td, th, label, input, textare
     padding: 24px 0 0 0;
 }
 
+/* 步骤导航（主区域横向 radio，外观同 Tabs） */
+.main div[role="radiogroup"],
+[data-testid="stMain"] div[role="radiogroup"] {
+    gap: 0;
+    background: var(--bg-card);
+    border: 1px solid var(--border);
+    border-radius: var(--radius);
+    padding: 4px;
+    margin-bottom: 24px;
+}
+.main div[role="radiogroup"] label[data-baseweb="radio"],
+[data-testid="stMain"] div[role="radiogroup"] label[data-baseweb="radio"] {
+    font-weight: 600;
+    padding: 10px 24px;
+    margin: 0;
+    border-radius: var(--radius);
+    border-bottom: 2px solid transparent;
+    transition: all 0.15s ease;
+}
+.main div[role="radiogroup"] label[data-baseweb="radio"] > div:first-child,
+[data-testid="stMain"] div[role="radiogroup"] label[data-baseweb="radio"] > div:first-child {
+    display: none;
+}
+.main div[role="radiogroup"] label[data-baseweb="radio"]:hover,
+[data-testid="stMain"] div[role="radiogroup"] label[data-baseweb="radio"]:hover {
+    background: var(--bg-subtle);
+}
+.main div[role="radiogroup"] label[data-baseweb="radio"]:has(input:checked),
+[data-testid="stMain"] div[role="radiogroup"] label[data-baseweb="radio"]:has(input:checked) {
+    background: var(--bg-warm);
+    border-bottom-color: var(--accent);
+}
+.main div[role="radiogroup"] label[data-baseweb="radio"]:has(input:checked) p,
+[data-testid="stMain"] div[role="radiogroup"] label[data-baseweb="radio"]:has(input:checked) p {
+    color: var(--accent) !important;
+}
+
 /* ====== Tab 锁定状态 ====== */
 .tab-locked {
     text-align: center;